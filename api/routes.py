@@ -1,10 +1,10 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, request, jsonify, render_template, send_from_directory, Response, stream_with_context
+import json
 import logging
 import os
 import re
 from typing import Optional
 from flasgger import Swagger, swag_from # Added for Swagger API docs
-import threading
 
 # Adjust import paths based on the assumption that 'api' is a package
 # and the script might be run from the project root or within the 'api' directory.
@@ -13,7 +13,8 @@ try:
     from src.core.config import Config
     from src.core.database import Database
     from src.core.discovery import LyricsDiscovery
-    from src.core.analyzer import LyricsAnalyzer
+    from src.core.analyzer import ANALYSIS_PROFILES, LyricsAnalyzer
+    from src.core.job_queue import AnalysisJobQueue, JobQueueFull
 except ImportError:
     # Fallback for running directly from api directory, assuming src is one level up and then into src
     import sys
@@ -25,7 +26,8 @@ except ImportError:
     from src.core.config import Config
     from src.core.database import Database
     from src.core.discovery import LyricsDiscovery
-    from src.core.analyzer import LyricsAnalyzer
+    from src.core.analyzer import ANALYSIS_PROFILES, LyricsAnalyzer
+    from src.core.job_queue import AnalysisJobQueue, JobQueueFull
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +38,16 @@ logger = logging.getLogger(__name__)
 db_instance: Optional[Database] = None
 discovery_service_instance: Optional[LyricsDiscovery] = None
 analyzer_service_instance: Optional[LyricsAnalyzer] = None
+job_queue_instance: Optional[AnalysisJobQueue] = None
 app_config_instance: Optional[Config] = None
 
+def _is_framework_list(value) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(name, str) and name for name in value)
+
+def _sse(event: str, data) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 def create_app(config_path: Optional[str] = None) -> Flask:
     """Create Flask application with all routes"""
     app = Flask(__name__)
@@ -93,7 +103,7 @@ def create_app(config_path: Optional[str] = None) -> Flask:
     }
     swagger = Swagger(app, config=swagger_config, template=swagger_template) # Pass template directly
 
-    global db_instance, discovery_service_instance, analyzer_service_instance, app_config_instance
+    global db_instance, discovery_service_instance, analyzer_service_instance, app_config_instance, job_queue_instance
 
     # Determine config path
     # If config_path is not provided, use default path relative to project_root_dir
@@ -127,13 +137,13 @@ def create_app(config_path: Optional[str] = None) -> Flask:
     logger.info(f"Flask App: Database URL is {app_config_instance.database_url}")
 
     # Initialize services
-    db_instance = Database(app_config_instance.database_url)
+    db_instance = Database(app_config_instance.database_url, app_config_instance)
     discovery_service_instance = LyricsDiscovery(app_config_instance, db_instance)
     analyzer_service_instance = LyricsAnalyzer(app_config_instance, db_instance)
-
-    # For tracking active analyses
-    active_analyses = set()
-    analysis_lock = threading.Lock() # To ensure thread-safe access to active_analyses
+    job_queue_instance = AnalysisJobQueue(
+        app_config_instance, db_instance, discovery_service_instance, analyzer_service_instance
+    )
+    job_queue_instance.resume()
 
     # Define the base directory for framework files
     FRAMEWORK_FILES_DIR = os.path.join(project_root_dir, "frameworks")  # Changed from "framework_files"
@@ -290,12 +300,92 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         except Exception as e:
             logger.error(f"Discovery API error: {e}", exc_info=True)
             return jsonify({'error': 'An internal server error occurred', 'details': str(e)}), 500
-    
+
+    @app.route('/api/discovery/search-batch', methods=['POST'])
+    @swag_from({
+        'tags': ['Discovery'],
+        'summary': 'Search for lyrics of many songs at once.',
+        'description': 'Searches lyrics for a list of songs. Duplicate songs are looked up once, cache hits are answered with a single bulk query '
+                       'and the rest are searched concurrently. Results are streamed back as JSONL (one JSON object per line, one line per input song) '
+                       'as soon as each is available, so lines are not in input order; use the `index` field to match them to the request.',
+        'parameters': [
+            {
+                'name': 'body',
+                'in': 'body',
+                'required': True,
+                'schema': {
+                    'id': 'SearchLyricsBatchRequest',
+                    'type': 'object',
+                    'required': ['songs'],
+                    'properties': {
+                        'songs': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'artist': {'type': 'string', 'example': 'Queen'},
+                                    'title': {'type': 'string', 'example': 'Bohemian Rhapsody'}
+                                }
+                            }
+                        },
+                        'force_refresh': {'type': 'boolean', 'description': 'Whether to force a refresh from providers.', 'default': False, 'example': False}
+                    }
+                }
+            }
+        ],
+        'produces': ['application/x-ndjson'],
+        'responses': {
+            200: {
+                'description': 'JSONL stream of per-song results.',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'index': {'type': 'integer', 'example': 0},
+                        'artist': {'type': 'string', 'example': 'Queen'},
+                        'title': {'type': 'string', 'example': 'Bohemian Rhapsody'},
+                        'status': {'type': 'string', 'example': 'found', 'description': 'found, not_found, invalid or error'},
+                        'data': {'type': 'object', 'description': 'Lyrics result, present when status is found.'}
+                    }
+                }
+            },
+            400: {'description': 'Invalid input (e.g., missing songs list, or too many songs).'},
+            500: {'description': 'Internal server error.'}
+        }
+    })
+    def search_lyrics_batch_route():
+        """Search lyrics for a list of songs, streaming JSONL results"""
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('songs'), list):
+            return jsonify({'error': 'JSON body with a "songs" list is required'}), 400
+
+        songs_param = data['songs']
+        force_refresh = data.get('force_refresh', False)
+        max_batch_size = app_config_instance.api_max_batch_size
+        if len(songs_param) > max_batch_size:
+            return jsonify({'error': f'Too many songs in one request (max {max_batch_size})'}), 400
+
+        songs = [
+            (str(song.get('artist') or ''), str(song.get('title') or '')) if isinstance(song, dict) else ('', '')
+            for song in songs_param
+        ]
+        logger.info(f"API: Batch searching lyrics for {len(songs)} songs, force_refresh={force_refresh}")
+
+        def generate():
+            try:
+                for record in discovery_service_instance.search_many(songs, force_refresh=force_refresh):
+                    yield json.dumps(record) + "\n"
+            except Exception as e:
+                # Headers are already sent, so report the failure in-band as a final line
+                logger.error(f"Batch discovery API error: {e}", exc_info=True)
+                yield json.dumps({'status': 'error', 'error': str(e)}) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
     @app.route('/api/discovery/providers', methods=['GET'])
     @swag_from({
         'tags': ['Discovery'],
         'summary': 'List available lyric providers.',
-        'description': 'Returns a list of configured lyric providers and their status.',
+        'description': 'Returns the configured lyric providers in the order they are currently tried, with each one\'s circuit breaker state and rolling hit rate and latency.',
         'responses': {
             200: {
                 'description': 'List of providers.',
@@ -309,9 +399,25 @@ def create_app(config_path: Optional[str] = None) -> Flask:
                                 'type': 'object',
                                 'properties': {
                                     'name': {'type': 'string', 'example': 'GeniusClient'},
-                                    'active': {'type': 'boolean', 'example': True}
+                                    'key': {'type': 'string', 'example': 'genius'},
+                                    'position': {'type': 'integer', 'example': 1},
+                                    'active': {'type': 'boolean', 'description': 'False while the circuit is open.', 'example': True},
+                                    'circuit': {
+                                        'type': 'object',
+                                        'example': {'state': 'closed', 'consecutive_failures': 0, 'times_opened': 1, 'rejected_calls': 12, 'retry_in_seconds': 0.0}
+                                    },
+                                    'health': {
+                                        'type': 'object',
+                                        'example': {'calls': 120, 'hits': 96, 'errors': 2, 'hit_rate': 0.81, 'avg_latency_seconds': 0.42, 'expected_cost_seconds': 0.519}
+                                    }
                                 }
                             }
+                        },
+                        'ordering': {'type': 'string', 'enum': ['static', 'adaptive'], 'example': 'static'},
+                        'http': {
+                            'type': 'object',
+                            'description': 'Shared provider HTTP session counters.',
+                            'example': {'timeout_seconds': 10, 'requests': 42, 'connections_created': 3, 'connections_reused': 39}
                         }
                     }
                 }
@@ -323,10 +429,22 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         """List available providers"""
         try:
             providers_info = [
-                {'name': p.__class__.__name__, 'active': True} # Assuming all instantiated providers are active
-                for p in discovery_service_instance.providers
+                {
+                    'name': p['class'],
+                    'key': p['name'],
+                    'position': p['position'],
+                    'active': p['circuit']['state'] != 'open',
+                    'circuit': p['circuit'],
+                    'health': p['health']
+                }
+                for p in discovery_service_instance.get_provider_status()
             ]
-            return jsonify({'status': 'success', 'providers': providers_info})
+            return jsonify({
+                'status': 'success',
+                'providers': providers_info,
+                'ordering': discovery_service_instance.config.provider_ordering,
+                'http': discovery_service_instance.http_session.stats()
+            })
         except Exception as e:
             logger.error(f"Providers API error: {e}", exc_info=True)
             return jsonify({'error': 'An internal server error occurred', 'details': str(e)}), 500
@@ -348,7 +466,9 @@ def create_app(config_path: Optional[str] = None) -> Flask:
                     'required': ['lyrics'],
                     'properties': {
                         'lyrics': {'type': 'string', 'description': 'The lyrics text to analyze.', 'example': 'Yesterday, all my troubles seemed so far away...'},
-                        'framework': {'type': 'string', 'description': 'The analysis framework to use (e.g., \"vanilla\", \"cinnamon\"). Optional, uses default if not provided.', 'example': 'vanilla'}
+                        'framework': {'type': 'string', 'description': 'The analysis framework to use (e.g., \"vanilla\", \"cinnamon\"). Optional, uses default if not provided.', 'example': 'vanilla'},
+                        'frameworks': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Analyze with several frameworks in one LLM call. Overrides framework; data is then keyed by framework name. Full profile only.', 'example': ['vanilla', 'sage']},
+                        'profile': {'type': 'string', 'enum': ['full', 'scores'], 'default': 'full', 'description': 'full: the complete analysis. scores: only framework_applied and filtering_scores, which is much faster to generate.', 'example': 'scores'}
                     }
                 }
             }
@@ -381,12 +501,20 @@ def create_app(config_path: Optional[str] = None) -> Flask:
             
             lyrics = data.get('lyrics', '').strip()
             framework = data.get('framework') # Optional, will use default if None
+            frameworks = data.get('frameworks')
+            profile = data.get('profile', 'full')
             
             if not lyrics:
                 return jsonify({'error': 'Lyrics text is required'}), 400
+            if frameworks is not None and not _is_framework_list(frameworks):
+                return jsonify({'error': 'frameworks must be a non-empty list of framework names'}), 400
+            if profile not in ANALYSIS_PROFILES:
+                return jsonify({'error': f"profile must be one of: {', '.join(ANALYSIS_PROFILES)}"}), 400
+            if frameworks and profile != 'full':
+                return jsonify({'error': 'frameworks runs one combined full analysis and requires profile full'}), 400
             
-            logger.info(f"API: Analyzing lyrics with framework '{framework if framework else app_config_instance.default_framework}'")
-            result = analyzer_service_instance.analyze_lyrics(lyrics, framework)
+            logger.info(f"API: Analyzing lyrics with framework '{frameworks or framework or app_config_instance.default_framework}', profile '{profile}'")
+            result = analyzer_service_instance.analyze_lyrics(lyrics, framework, frameworks=frameworks, profile=profile)
             if result:
                 return jsonify({'status': 'success', 'data': result})
             else:
@@ -404,11 +532,80 @@ def create_app(config_path: Optional[str] = None) -> Flask:
             logger.error(f"Analysis API error: {e}", exc_info=True)
             return jsonify({'error': 'An internal server error occurred', 'details': str(e)}), 500
     
+    @app.route('/api/analyzer/analyze/stream', methods=['POST'])
+    @swag_from({
+        'tags': ['Analyzer'],
+        'summary': 'Analyze provided lyrics text, streaming the result as server-sent events.',
+        'description': 'Like /analyzer/analyze, but the response is a text/event-stream. Each top-level field of the analysis '
+                       '(e.g. filtering_scores) is sent as a `section` event as soon as the model has finished generating it, '
+                       'followed by one `result` event with the complete analysis once it has been cached. '
+                       'Failures after the stream has started are sent as an `error` event.',
+        'parameters': [
+            {
+                'name': 'body',
+                'in': 'body',
+                'required': True,
+                'schema': {
+                    'id': 'AnalyzeLyricsStreamRequest',
+                    'type': 'object',
+                    'required': ['lyrics'],
+                    'properties': {
+                        'lyrics': {'type': 'string', 'description': 'The lyrics text to analyze.', 'example': 'Yesterday, all my troubles seemed so far away...'},
+                        'framework': {'type': 'string', 'description': 'The analysis framework to use. Optional, uses default if not provided.', 'example': 'vanilla'},
+                        'profile': {'type': 'string', 'enum': ['full', 'scores'], 'default': 'full', 'description': 'full: the complete analysis. scores: only framework_applied and filtering_scores, which is much faster to generate.', 'example': 'scores'}
+                    }
+                }
+            }
+        ],
+        'produces': ['text/event-stream'],
+        'responses': {
+            200: {
+                'description': 'Event stream. `section` events carry {"name": ..., "data": ...}; the `result` event carries {"data": ..., "cached": ...}; `error` events carry {"error": ...}.'
+            },
+            400: {'description': 'Invalid input (e.g., missing lyrics, or framework not found).'}
+        }
+    })
+    def analyze_lyrics_stream_route():
+        """Analyze provided lyrics text, streaming sections as server-sent events"""
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'error': 'JSON body required'}), 400
+        
+        lyrics = (data.get('lyrics') or '').strip()
+        framework = data.get('framework')
+        profile = data.get('profile', 'full')
+        if not lyrics:
+            return jsonify({'error': 'Lyrics text is required'}), 400
+        if framework and framework not in analyzer_service_instance.frameworks:
+            return jsonify({'error': f"Framework not found: {framework}"}), 400
+        if data.get('frameworks') is not None:
+            return jsonify({'error': 'Streaming analyzes with a single framework; use framework, or /api/analyzer/analyze for frameworks'}), 400
+        if profile not in ANALYSIS_PROFILES:
+            return jsonify({'error': f"profile must be one of: {', '.join(ANALYSIS_PROFILES)}"}), 400
+        
+        logger.info(f"API: Streaming analysis with framework '{framework or app_config_instance.default_framework}', profile '{profile}'")
+        
+        def generate():
+            try:
+                for event in analyzer_service_instance.stream_analysis(lyrics, framework, profile):
+                    kind = event.pop('event')
+                    yield _sse(kind, event)
+            except Exception as e:
+                # Headers are already sent, so report the failure in-band
+                logger.error(f"Streaming analysis API error: {e}", exc_info=True)
+                yield _sse('error', {'error': str(e)})
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
     @app.route('/api/analyzer/analyze-song', methods=['POST'])
     @swag_from({
         'tags': ['Analyzer'],
         'summary': 'Discover and analyze song lyrics.',
-        'description': 'First discovers lyrics for a given artist and title, then analyzes them using a specified or default framework. If an analysis for the same song is already in progress, it will return a 409 Conflict status.',
+        'description': 'First discovers lyrics for a given artist and title, then analyzes them using a specified or default framework. If the same song is already being discovered or analyzed, the request waits for that work and returns its result. With "async": true the request returns 202 with a job id straight away; poll GET /api/jobs/{job_id} for the result.',
         'parameters': [
             {
                 'name': 'body',
@@ -422,7 +619,10 @@ def create_app(config_path: Optional[str] = None) -> Flask:
                         'artist': {'type': 'string', 'description': 'The name of the artist.', 'example': 'The Beatles'},
                         'title': {'type': 'string', 'description': 'The title of the song.', 'example': 'Let It Be'},
                         'framework': {'type': 'string', 'description': 'The analysis framework to use. Optional.', 'example': 'cinnamon'},
-                        'force_refresh': {'type': 'boolean', 'description': 'Whether to force refresh of lyrics from providers.', 'default': False, 'example': False}
+                        'frameworks': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Analyze with several frameworks in one LLM call. Overrides framework; analysis is then keyed by framework name. Full profile only.', 'example': ['vanilla', 'sage', 'cinnamon']},
+                        'profile': {'type': 'string', 'enum': ['full', 'scores'], 'default': 'full', 'description': 'full: the complete analysis. scores: only framework_applied and filtering_scores, which is much faster to generate.', 'example': 'scores'},
+                        'force_refresh': {'type': 'boolean', 'description': 'Whether to force refresh of lyrics from providers.', 'default': False, 'example': False},
+                        'async': {'type': 'boolean', 'description': 'Run as a background job and return its id immediately.', 'default': False, 'example': False}
                     }
                 }
             }
@@ -455,10 +655,21 @@ def create_app(config_path: Optional[str] = None) -> Flask:
                     }
                 }
             },
+            202: {
+                'description': 'Analysis job queued (async mode).',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'status': {'type': 'string', 'example': 'queued'},
+                        'job_id': {'type': 'string', 'example': '3f2b8c1e9a7d4e6f8b0c1d2e3f4a5b6c'},
+                        'status_url': {'type': 'string', 'example': '/api/jobs/3f2b8c1e9a7d4e6f8b0c1d2e3f4a5b6c'}
+                    }
+                }
+            },
             400: {'description': 'Invalid input (e.g., missing artist/title).'},
             404: {'description': 'Lyrics not found for the song.'},
-            409: {'description': 'Conflict. An analysis for this song is already in progress.'}, # Added 409
-            500: {'description': 'Internal server error or analysis failure.'}
+            500: {'description': 'Internal server error or analysis failure.'},
+            503: {'description': 'Too many pending analysis jobs (async mode).'}
         }
     })
     def analyze_song_route(): # Renamed
@@ -471,11 +682,19 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         artist = data.get('artist', '').strip()
         title = data.get('title', '').strip()
         framework_param = data.get('framework') # Renamed to avoid conflict
+        frameworks_param = data.get('frameworks')
+        profile = data.get('profile', 'full')
         force_refresh = data.get('force_refresh', False)
         
         if not artist or not title:
             logger.warning(f"API: Analyze song request missing artist or title. Artist: '{artist}', Title: '{title}'.")
             return jsonify({'error': 'Artist and title are required'}), 400
+        if frameworks_param is not None and not _is_framework_list(frameworks_param):
+            return jsonify({'error': 'frameworks must be a non-empty list of framework names'}), 400
+        if profile not in ANALYSIS_PROFILES:
+            return jsonify({'error': f"profile must be one of: {', '.join(ANALYSIS_PROFILES)}"}), 400
+        if frameworks_param and profile != 'full':
+            return jsonify({'error': 'frameworks runs one combined full analysis and requires profile full'}), 400
 
         # Sanitize artist and title for song_id to be more robust
         # Replace sequences of non-alphanumeric characters with a single underscore
@@ -483,17 +702,21 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         sanitized_title = re.sub(r'[^a-zA-Z0-9]+', '_', title.lower())
         song_id = f"{sanitized_artist}_{sanitized_title}"
 
-        with analysis_lock:
-            if song_id in active_analyses:
-                logger.info(f"API: Analysis for song '{artist} - {title}' (ID: {song_id}) already in progress. Request rejected.")
-                return jsonify({
-                    'status': 'conflict', 
-                    'message': f"An analysis for '{artist} - {title}' is already in progress. Please wait for it to complete."
-                }), 409
-
-            active_analyses.add(song_id)
-            logger.info(f"API: Added '{artist} - {title}' (ID: {song_id}) to active analyses. Count: {len(active_analyses)}")
-
+        if data.get('async'):
+            job_framework = framework_param.get('name') if isinstance(framework_param, dict) else framework_param
+            for name in frameworks_param or [job_framework]:
+                if name and name not in analyzer_service_instance.frameworks:
+                    return jsonify({'error': f"Framework not found: {name}"}), 400
+            try:
+                job = job_queue_instance.submit(artist, title, job_framework, bool(force_refresh), frameworks_param, profile)
+            except JobQueueFull as e:
+                logger.warning(f"API: Rejected analysis job for '{artist} - {title}' (ID: {song_id}): {e}")
+                return jsonify({'error': str(e)}), 503
+            status_url = f"/api/jobs/{job['id']}"
+            return jsonify({'status': 'queued', 'job_id': job['id'], 'status_url': status_url}), 202, {'Location': status_url}
+
+        # Duplicate concurrent requests are coalesced inside the discovery and analyzer
+        # services, so they wait for the in-flight work instead of being rejected.
         try:
             logger.info(f"API: Starting discovery and analysis for song '{artist} - {title}' (ID: {song_id}). Framework: '{framework_param}', Force refresh: {force_refresh}")
             
@@ -509,8 +732,11 @@ def create_app(config_path: Optional[str] = None) -> Flask:
                 current_framework_name = framework_param
             # If framework_param is None, analyzer_service_instance.analyze_lyrics should use its default.
 
-            logger.info(f"API: Analyzing lyrics for '{artist} - {title}' (ID: {song_id}) with framework: '{current_framework_name if current_framework_name else 'default'}'.")
-            analysis_result = analyzer_service_instance.analyze_lyrics(lyrics_result['lyrics'], current_framework_name)
+            logger.info(f"API: Analyzing lyrics for '{artist} - {title}' (ID: {song_id}) with framework: '{frameworks_param or current_framework_name or 'default'}'.")
+            analysis_result = analyzer_service_instance.analyze_lyrics(
+                lyrics_result['lyrics'], current_framework_name, frameworks=frameworks_param, profile=profile,
+                lyrics_hash=lyrics_result.get('lyrics_hash')
+            )
             
             if not analysis_result:
                  logger.error(f"API: Analysis returned no result for '{artist} - {title}' (ID: {song_id}) with framework '{current_framework_name}'.")
@@ -539,12 +765,53 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         except Exception as e:
             logger.error(f"API: Unexpected error during analysis of '{artist} - {title}' (ID: {song_id}): {e}", exc_info=True)
             return jsonify({'error': 'An internal server error occurred during song analysis', 'details': str(e)}), 500
-        finally:
-            with analysis_lock:
-                if song_id in active_analyses:
-                    active_analyses.remove(song_id)
-                    logger.info(f"API: Removed '{artist} - {title}' (ID: {song_id}) from active analyses. Count: {len(active_analyses)}")
     
+    @app.route('/api/jobs/<job_id>', methods=['GET'])
+    @swag_from({
+        'tags': ['Analyzer'],
+        'summary': 'Get the status and result of an analysis job.',
+        'description': 'Returns the job record. With ?wait=N the request long-polls for up to N seconds (capped by jobs.max_wait_seconds) until the job completes or fails.',
+        'parameters': [
+            {'name': 'job_id', 'in': 'path', 'type': 'string', 'required': True, 'description': 'Job id returned by analyze-song in async mode.'},
+            {'name': 'wait', 'in': 'query', 'type': 'number', 'required': False, 'description': 'Seconds to wait for the job to finish.', 'default': 0}
+        ],
+        'responses': {
+            200: {
+                'description': 'The job. status is queued, running, completed or failed; result holds the analysis data once completed.',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'status': {'type': 'string', 'example': 'success'},
+                        'job': {'type': 'object'}
+                    }
+                }
+            },
+            400: {'description': 'Invalid wait parameter.'},
+            404: {'description': 'Job not found.'}
+        }
+    })
+    def get_job_route(job_id):
+        """Get an analysis job's status and result"""
+        try:
+            wait = float(request.args.get('wait', 0))
+        except ValueError:
+            return jsonify({'error': 'Invalid wait parameter, must be a number of seconds'}), 400
+        if wait < 0:
+            return jsonify({'error': 'Invalid wait parameter, must be a number of seconds'}), 400
+
+        try:
+            if wait:
+                job = job_queue_instance.wait(job_id, min(wait, app_config_instance.job_max_wait))
+            else:
+                job = job_queue_instance.get(job_id)
+        except Exception as e:
+            logger.error(f"Job status error for {job_id}: {e}", exc_info=True)
+            return jsonify({'error': 'An internal server error occurred', 'details': str(e)}), 500
+
+        if job is None:
+            return jsonify({'status': 'not_found', 'message': f'No job with id {job_id}'}), 404
+        return jsonify({'status': 'success', 'job': job})
+
     @app.route('/api/analyzer/frameworks', methods=['GET'])
     def get_frameworks_route(): # Renamed
         """List available analysis frameworks"""
@@ -572,6 +839,22 @@ def create_app(config_path: Optional[str] = None) -> Flask:
             logger.error(f"Cache clear error: {e}", exc_info=True)
             return jsonify({'error': 'An internal server error occurred', 'details': str(e)}), 500
     
+    @app.route('/api/cache/stats', methods=['GET'])
+    def cache_stats_route():
+        """Report cache sizes and cache tier statistics"""
+        try:
+            stats = db_instance.get_cache_stats()
+            stats['negative_lookups'].update(discovery_service_instance.get_negative_cache_stats())
+            stats['in_flight'] = {
+                'discovery': discovery_service_instance.inflight_stats(),
+                'analysis': analyzer_service_instance.inflight_stats(),
+            }
+            stats['llm_usage'] = analyzer_service_instance.get_usage_stats()
+            return jsonify({'status': 'success', 'stats': stats})
+        except Exception as e:
+            logger.error(f"Cache stats error: {e}", exc_info=True)
+            return jsonify({'error': 'An internal server error occurred', 'details': str(e)}), 500
+    
     @app.route('/api/health', methods=['GET'])
     def health_check_route(): # Renamed
         """Health check endpoint"""
@@ -589,6 +872,12 @@ def create_app(config_path: Optional[str] = None) -> Flask:
             health_status['issues'] = 'One or more core services not initialized.'
             return jsonify(health_status), 503
 
+        try:
+            health_status['database_pool'] = db_instance.get_pool_status()
+        except Exception as e:
+            logger.warning(f"Health check could not read database pool status: {e}")
+        health_status['analysis_jobs'] = job_queue_instance.stats()
+
         return jsonify(health_status)
     
     # --- Framework File Route ---
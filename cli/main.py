@@ -1,4 +1,5 @@
 import click
+import csv
 import json
 import sys
 import logging
@@ -96,7 +97,7 @@ def cli_entry(ctx, config_path, log_level):
 
     # Initialize Database after config and logging are set up
     try:
-        ctx.obj['database'] = Database(ctx.obj['config'].database_url)
+        ctx.obj['database'] = Database(ctx.obj['config'].database_url, ctx.obj['config'])
     except Exception as e:
         logger.error(f"Failed to initialize database with URL {ctx.obj['config'].database_url}: {e}", exc_info=True)
         click.echo(f"Error: Could not initialize database: {e}. Some commands may fail.", err=True)
@@ -115,6 +116,15 @@ def _get_services(ctx):
     analyzer = LyricsAnalyzer(config, database)
     return discovery, analyzer, database
 
+def _split_frameworks(frameworks_csv):
+    """Parse a --frameworks value ('vanilla,sage') into a list, or None if not given."""
+    if not frameworks_csv:
+        return None
+    return [name.strip() for name in frameworks_csv.split(',') if name.strip()] or None
+
+def _profile(scores_only):
+    return 'scores' if scores_only else 'full'
+
 @cli_entry.command()
 @click.argument('artist')
 @click.argument('title')
@@ -148,15 +158,90 @@ def search(ctx, artist, title, force_refresh, output_format):
         click.echo(f"Error during search: {e}", err=True)
         sys.exit(1)
 
+def _read_song_list(songs_file, input_format):
+    """Read (artist, title) pairs from a CSV file with a header row, or from JSONL."""
+    if input_format is None:
+        input_format = 'csv' if songs_file.lower().endswith('.csv') else 'jsonl'
+
+    songs = []
+    with open(songs_file, 'r', encoding='utf-8', newline='') as f:
+        if input_format == 'csv':
+            for row in csv.DictReader(f):
+                songs.append((row.get('artist') or '', row.get('title') or ''))
+        else:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise click.ClickException(f"Invalid JSON on line {line_number} of {songs_file}: {e}")
+                songs.append((entry.get('artist') or '', entry.get('title') or ''))
+    return songs
+
+@cli_entry.command("search-batch")
+@click.argument('songs_file', type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.option('--input-format', type=click.Choice(['csv', 'jsonl'], case_sensitive=False), default=None,
+              help='Input format. Detected from the file extension if not set.')
+@click.option('--output', 'output_file', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Write JSONL results to this file instead of stdout.')
+@click.option('--force-refresh', is_flag=True, help='Force refresh cache, fetch from providers.')
+@click.option('--workers', type=int, default=None, help='Songs searched in parallel (overrides config).')
+@click.option('--no-lyrics', is_flag=True, help='Omit lyrics text from the output (useful for cache warming).')
+@click.pass_context
+def search_batch(ctx, songs_file, input_format, output_file, force_refresh, workers, no_lyrics):
+    """Search lyrics for every song in SONGS_FILE (CSV with artist,title columns, or JSONL).
+
+    Results are written as JSONL, one line per input song, as soon as each is available.
+    """
+    logger.info(f"CLI: search-batch command - File: {songs_file}, Force: {force_refresh}, Workers: {workers}")
+    discovery, _, _ = _get_services(ctx)
+
+    songs = _read_song_list(songs_file, input_format)
+    if not songs:
+        click.echo(f"No songs found in '{songs_file}'.", err=True)
+        sys.exit(1)
+
+    counts = {}
+    out = open(output_file, 'w', encoding='utf-8') if output_file else sys.stdout
+    try:
+        for record in discovery.search_many(songs, force_refresh=force_refresh, max_workers=workers):
+            counts[record['status']] = counts.get(record['status'], 0) + 1
+            if no_lyrics and record.get('data'):
+                record['data'].pop('lyrics', None)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    except Exception as e:
+        logger.error(f"CLI search-batch error: {e}", exc_info=True)
+        click.echo(f"Error during batch search: {e}", err=True)
+        sys.exit(1)
+    finally:
+        if output_file:
+            out.close()
+
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    click.echo(f"Processed {len(songs)} songs ({summary}).", err=True)
+
 @cli_entry.command()
 @click.argument('lyrics_file', type=click.Path(exists=True, dir_okay=False, readable=True))
 @click.option('--framework', help='Analysis framework to use (e.g., vanilla). Uses default if not set.')
+@click.option('--frameworks', 'frameworks_csv',
+              help='Comma-separated frameworks to analyze with in a single LLM call (overrides --framework).')
+@click.option('--scores-only', is_flag=True,
+              help='Only produce filtering_scores (much faster; reuses cached full analyses).')
+@click.option('--stream', is_flag=True,
+              help='Print each top-level section as soon as the model finishes it (JSON: one line per section).')
 @click.option('--format', 'output_format', type=click.Choice(['text', 'json'], case_sensitive=False), default='json',
               help='Output format.')
 @click.pass_context
-def analyze(ctx, lyrics_file, framework, output_format):
+def analyze(ctx, lyrics_file, framework, frameworks_csv, scores_only, stream, output_format):
     """Analyze lyrics from LYRICS_FILE."""
     logger.info(f"CLI: analyze command - File: {lyrics_file}, Framework: {framework}, Format: {output_format}")
+    if stream and frameworks_csv:
+        raise click.UsageError("--stream analyzes with a single framework; use --framework.")
+    if scores_only and frameworks_csv:
+        raise click.UsageError("--frameworks runs one combined full analysis; drop --scores-only or use --framework.")
     _, analyzer, _ = _get_services(ctx)
     
     try:
@@ -167,12 +252,24 @@ def analyze(ctx, lyrics_file, framework, output_format):
             click.echo("No lyrics content found in the file.", err=True)
             sys.exit(1)
         
-        result = analyzer.analyze_lyrics(lyrics, framework)
+        if stream:
+            for event in analyzer.stream_analysis(lyrics, framework, _profile(scores_only)):
+                if event['event'] != 'section':
+                    continue
+                if output_format == 'json':
+                    click.echo(json.dumps({'section': event['name'], 'data': event['data']}))
+                else:
+                    click.echo(f"  {str(event['name']).replace('_', ' ').title()}: {event['data']}")
+            return
+        
+        result = analyzer.analyze_lyrics(
+            lyrics, framework, frameworks=_split_frameworks(frameworks_csv), profile=_profile(scores_only)
+        )
         if result:
             if output_format == 'json':
                 click.echo(json.dumps(result, indent=2))
             else: # text output
-                click.echo(f"Analysis Result (Framework: {framework or ctx.obj['config'].default_framework}):")
+                click.echo(f"Analysis Result (Framework: {frameworks_csv or framework or ctx.obj['config'].default_framework}):")
                 for key, value in result.items():
                     click.echo(f"  {str(key).replace('_', ' ').title()}: {value}")
         else:
@@ -196,13 +293,19 @@ def analyze(ctx, lyrics_file, framework, output_format):
 @click.argument('artist')
 @click.argument('title')
 @click.option('--framework', help='Analysis framework to use. Uses default if not set.')
+@click.option('--frameworks', 'frameworks_csv',
+              help='Comma-separated frameworks to analyze with in a single LLM call (overrides --framework).')
+@click.option('--scores-only', is_flag=True,
+              help='Only produce filtering_scores (much faster; reuses cached full analyses).')
 @click.option('--force-refresh', is_flag=True, help='Force refresh lyrics cache.')
 @click.option('--format', 'output_format', type=click.Choice(['text', 'json'], case_sensitive=False), default='json',
               help='Output format.')
 @click.pass_context
-def analyze_song(ctx, artist, title, framework, force_refresh, output_format):
+def analyze_song(ctx, artist, title, framework, frameworks_csv, scores_only, force_refresh, output_format):
     """Discover and then analyze lyrics for a SONG by ARTIST and TITLE."""
     logger.info(f"CLI: analyze-song - Artist: {artist}, Title: {title}, Framework: {framework}, Force: {force_refresh}")
+    if scores_only and frameworks_csv:
+        raise click.UsageError("--frameworks runs one combined full analysis; drop --scores-only or use --framework.")
     discovery, analyzer, _ = _get_services(ctx)
     
     try:
@@ -214,7 +317,10 @@ def analyze_song(ctx, artist, title, framework, force_refresh, output_format):
         
         click.echo(f"Found lyrics for '{artist} - {title}' from source: {lyrics_result['source']}. Analyzing...", err=True)
         # Analyze lyrics
-        analysis_result = analyzer.analyze_lyrics(lyrics_result['lyrics'], framework)
+        analysis_result = analyzer.analyze_lyrics(
+            lyrics_result['lyrics'], framework, frameworks=_split_frameworks(frameworks_csv),
+            profile=_profile(scores_only), lyrics_hash=lyrics_result.get('lyrics_hash')
+        )
         
         if not analysis_result:
             click.echo("Analysis failed to produce a result for the song.", err=True)
@@ -235,7 +341,7 @@ def analyze_song(ctx, artist, title, framework, force_refresh, output_format):
         else: # text output
             click.echo(f"\n--- Analysis for '{artist} - {title}' ---")
             click.echo(f"Lyrics Source: {output_data['metadata']['source']}")
-            click.echo(f"Framework Used: {framework or ctx.obj['config'].default_framework}")
+            click.echo(f"Framework Used: {frameworks_csv or framework or ctx.obj['config'].default_framework}")
             click.echo("--- Result ---")
             for key, value in analysis_result.items():
                 click.echo(f"  {str(key).replace('_', ' ').title()}: {value}")
@@ -253,6 +359,165 @@ def analyze_song(ctx, artist, title, framework, force_refresh, output_format):
         click.echo(f"An unexpected error occurred: {e}", err=True)
         sys.exit(1)
 
+# Songs discovered and analyzed per round in analyze-batch
+ANALYZE_BATCH_CHUNK_SIZE = 500
+
+def _chunked(items, size):
+    """Yield lists of up to size items from any iterable."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _batch_song_source(discovery, database, songs_file, input_format, all_cached):
+    """Yield (artist, title, lyrics or None, lyrics hash or None, search record) for the songs to analyze, in input order."""
+    if all_cached:
+        for entry in database.iter_cached_lyrics():
+            yield entry['artist'], entry['title'], entry['lyrics'], entry['lyrics_hash'], None
+        return
+    songs = _read_song_list(songs_file, input_format)
+    for chunk_start, chunk in enumerate(_chunked(songs, ANALYZE_BATCH_CHUNK_SIZE)):
+        records = sorted(discovery.search_many(chunk), key=lambda record: record['index'])
+        for record in records:
+            record['index'] += chunk_start * ANALYZE_BATCH_CHUNK_SIZE
+            data = record.get('data') or {}
+            yield record['artist'], record['title'], data.get('lyrics'), data.get('lyrics_hash'), record
+
+@cli_entry.command("analyze-batch")
+@click.argument('songs_file', required=False, type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.option('--all-cached', is_flag=True, help='Analyze every song in the lyrics cache instead of SONGS_FILE.')
+@click.option('--input-format', type=click.Choice(['csv', 'jsonl'], case_sensitive=False), default=None,
+              help='Input format. Detected from the file extension if not set.')
+@click.option('--framework', help='Analysis framework to use. Uses default if not set.')
+@click.option('--output', 'output_file', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Write JSONL results to this file instead of stdout.')
+@click.option('--concurrency', type=int, default=None, help='LLM calls in flight (overrides config).')
+@click.option('--scores-only', is_flag=True,
+              help='Only produce filtering_scores (much faster; reuses cached full analyses).')
+@click.pass_context
+def analyze_batch(ctx, songs_file, all_cached, input_format, framework, output_file, concurrency, scores_only):
+    """Analyze every song in SONGS_FILE (or the whole lyrics cache) with one framework.
+
+    Lyrics are looked up and analyzed in chunks; cached analyses are reused and only
+    misses are sent to the LLM. Results are written as JSONL in input order.
+    """
+    logger.info(f"CLI: analyze-batch command - File: {songs_file}, All cached: {all_cached}, Framework: {framework}")
+    if bool(songs_file) == bool(all_cached):
+        click.echo("Provide either SONGS_FILE or --all-cached.", err=True)
+        sys.exit(1)
+    discovery, analyzer, database = _get_services(ctx)
+
+    counts = {}
+    out = open(output_file, 'w', encoding='utf-8') if output_file else sys.stdout
+    try:
+        songs = _batch_song_source(discovery, database, songs_file, input_format, all_cached)
+        index = 0
+        for chunk in _chunked(songs, ANALYZE_BATCH_CHUNK_SIZE):
+            to_analyze = [(lyrics, lyrics_hash) for _, _, lyrics, lyrics_hash, _ in chunk if lyrics]
+            analyses = iter(analyzer.analyze_many(
+                [lyrics for lyrics, _ in to_analyze], framework, max_concurrency=concurrency,
+                profile=_profile(scores_only), lyrics_hashes=[lyrics_hash for _, lyrics_hash in to_analyze]
+            ))
+            for artist, title, lyrics, _, search_record in chunk:
+                record = {'index': search_record['index'] if search_record else index, 'artist': artist, 'title': title}
+                index += 1
+                if not lyrics and search_record is None:
+                    # --all-cached: a cache entry whose lyrics are empty or missing
+                    record.update({'status': 'not_found', 'error': 'Cached entry has no lyrics'})
+                elif not lyrics:
+                    record['status'] = search_record['status']
+                    if search_record.get('error'):
+                        record['error'] = search_record['error']
+                else:
+                    analysis = next(analyses)
+                    if isinstance(analysis, Exception):
+                        record.update({'status': 'failed', 'error': str(analysis)})
+                    else:
+                        record.update({'status': 'completed', 'analysis': analysis})
+                counts[record['status']] = counts.get(record['status'], 0) + 1
+                out.write(json.dumps(record) + "\n")
+            out.flush()
+    except ValueError as ve:
+        logger.warning(f"CLI analyze-batch validation error: {ve}")
+        click.echo(f"Error: {ve}", err=True)
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"CLI analyze-batch error: {e}", exc_info=True)
+        click.echo(f"Error during batch analysis: {e}", err=True)
+        sys.exit(1)
+    finally:
+        if output_file:
+            out.close()
+
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    click.echo(f"Processed {sum(counts.values())} songs ({summary}).", err=True)
+
+@cli_entry.command("batch-export")
+@click.argument('requests_file', type=click.Path(dir_okay=False, writable=True))
+@click.option('--songs-file', type=click.Path(exists=True, dir_okay=False, readable=True), default=None,
+              help='Songs to include (CSV or JSONL). Defaults to the whole lyrics cache.')
+@click.option('--input-format', type=click.Choice(['csv', 'jsonl'], case_sensitive=False), default=None,
+              help='Songs file format. Detected from the file extension if not set.')
+@click.option('--framework', help='Analysis framework to use. Uses default if not set.')
+@click.option('--backend', 'backend_name', default=None,
+              help='Name of the LLM backend (llm.backends) to write requests for. Defaults to the first one.')
+@click.pass_context
+def batch_export(ctx, requests_file, songs_file, input_format, framework, backend_name):
+    """Write an offline batch-API request file (OpenAI or Anthropic) to REQUESTS_FILE.
+
+    Only songs without a cached analysis are included. Submit the file to the
+    provider's batch API, then load the results with batch-ingest using the same
+    framework.
+    """
+    logger.info(f"CLI: batch-export command - Output: {requests_file}, Songs: {songs_file}, Framework: {framework}")
+    discovery, analyzer, database = _get_services(ctx)
+
+    try:
+        songs = _batch_song_source(discovery, database, songs_file, input_format, not songs_file)
+        with open(requests_file, 'w', encoding='utf-8') as out:
+            counts = analyzer.export_batch_requests(
+                ((lyrics, lyrics_hash) for _, _, lyrics, lyrics_hash, _ in songs if lyrics), framework, out,
+                backend_name=backend_name
+            )
+    except ValueError as ve:
+        logger.warning(f"CLI batch-export validation error: {ve}")
+        click.echo(f"Error: {ve}", err=True)
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"CLI batch-export error: {e}", exc_info=True)
+        click.echo(f"Error exporting batch requests: {e}", err=True)
+        sys.exit(1)
+
+    click.echo(f"Wrote {counts['written']} requests to {requests_file} "
+               f"({counts['cached']} already cached, {counts['duplicates']} duplicates skipped).", err=True)
+
+@cli_entry.command("batch-ingest")
+@click.argument('results_file', type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.option('--framework', help='Framework the requests were exported with. Uses default if not set.')
+@click.pass_context
+def batch_ingest(ctx, results_file, framework):
+    """Cache the analyses from a batch-API RESULTS_FILE (OpenAI or Anthropic JSONL)."""
+    logger.info(f"CLI: batch-ingest command - File: {results_file}, Framework: {framework}")
+    _, analyzer, _ = _get_services(ctx)
+
+    try:
+        with open(results_file, 'r', encoding='utf-8') as f:
+            counts = analyzer.ingest_batch_results(f, framework)
+    except ValueError as ve:
+        logger.warning(f"CLI batch-ingest validation error: {ve}")
+        click.echo(f"Error: {ve}", err=True)
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"CLI batch-ingest error: {e}", exc_info=True)
+        click.echo(f"Error ingesting batch results: {e}", err=True)
+        sys.exit(1)
+
+    click.echo(f"Stored {counts['stored']} analyses ({counts['failed']} failed).", err=True)
+
 @cli_entry.command()
 @click.pass_context
 def providers(ctx):
@@ -265,9 +530,22 @@ def providers(ctx):
         click.echo("Check your genius_token and musixmatch_api_key in the config file.")
         return
 
+    config = ctx.obj['config']
     click.echo("Configured and Active Lyrics Providers (in order of preference):")
-    for i, provider_instance in enumerate(discovery.providers):
-        click.echo(f"  {i+1}. {provider_instance.__class__.__name__}")
+    for position, provider in enumerate(discovery.providers, start=1):
+        click.echo(f"  {position}. {provider.__class__.__name__}")
+    if config.provider_ordering == 'adaptive':
+        click.echo(f"Adaptive ordering: after {config.provider_ordering_min_samples} lookups each, providers are "
+                   f"tried in order of expected time per song found.")
+    else:
+        click.echo("Static ordering: providers are tried in the order above.")
+    if config.provider_circuit_failure_threshold > 0:
+        click.echo(f"Circuits open after {config.provider_circuit_failure_threshold} consecutive errors "
+                   f"and are probed again after {config.provider_circuit_reset_timeout:.0f}s.")
+    else:
+        click.echo("Circuit breakers are disabled.")
+    # Breakers and health are kept in memory by each process, so this one has none to show
+    click.echo("Live circuit state, provider health and current order: GET /api/discovery/providers on the API server.")
 
 @cli_entry.command()
 @click.pass_context
@@ -306,6 +584,25 @@ def clear_cache_cmd(ctx, days):
         click.echo(f"Error clearing cache: {e}", err=True)
         sys.exit(1)
 
+@cli_entry.command("cache-stats")
+@click.pass_context
+def cache_stats_cmd(ctx):
+    """Show cache sizes and cache tier statistics."""
+    logger.info("CLI: cache-stats command")
+    discovery, analyzer, database = _get_services(ctx)
+
+    try:
+        stats = database.get_cache_stats()
+        stats['in_flight'] = {
+            'discovery': discovery.inflight_stats(),
+            'analysis': analyzer.inflight_stats(),
+        }
+        click.echo(json.dumps(stats, indent=2))
+    except Exception as e:
+        logger.error(f"CLI cache-stats error: {e}", exc_info=True)
+        click.echo(f"Error reading cache statistics: {e}", err=True)
+        sys.exit(1)
+
 @cli_entry.command("test-llm")
 @click.pass_context
 def test_llm_cmd(ctx):
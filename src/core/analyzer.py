@@ -1,58 +1,131 @@
+import asyncio
 import os
 import json
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+from itertools import islice
+from typing import Dict, Any, Optional, List, Iterable, Iterator, TextIO, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_community.llms import Ollama
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from pydantic.v1 import SecretStr # Updated for Pydantic v1 compatibility
 
 from src.core.config import Config
-from src.core.database import Database
+from src.core.database import BULK_QUERY_CHUNK_SIZE, Database
+from src.core.json_stream import IncrementalJSONObjectParser
+from src.core.llm_pool import LLMBackend, LLMPool
+from src.core.llm_scheduler import RateLimitScheduler, get_scheduler
+from src.core.output_schema import schema_from_template, subset_schema, template_from_prompt, validation_error
+from src.core.single_flight import AsyncSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "You are an AI assistant specialized in analyzing song lyrics. Provide your analysis in JSON format."
+LYRICS_PLACEHOLDER = '[PASTE LYRICS HERE]'
+ANALYSIS_PROFILES = ('full', 'scores')
+SCORES_ONLY_INSTRUCTIONS = """SCORES-ONLY OUTPUT: Assess the lyrics exactly as the framework above describes, but return ONLY the JSON object below, with no detailed_analysis and no other fields or text:
+{"framework_applied": "<framework name>", "filtering_scores": {"explicit_language": {"score": 0.0, "label": ""}, "sexual_content": {"score": 0.0, "label": ""}, "violence_graphicness": {"score": 0.0, "label": ""}, "substance_promotion": {"score": 0.0, "label": ""}, "negative_psychological_impact": {"score": 0.0, "label": ""}, "positive_psychological_impact": {"score": 0.0, "label": ""}, "min_age_rating": {"rating_label": "", "numeric_value": 0}}}"""
+REPAIR_SYSTEM_PROMPT = "You fix malformed JSON. Reply with only the corrected JSON object, with no prose or code fences. Keep every value that is already there; only fix the syntax and fill in missing required fields."
+
 class LyricsAnalyzer:
     def __init__(self, config: Config, database: Database):
         self.config = config
         self.db = database
-        self.llm = self._create_llm()
+        self._backend_settings: Dict[str, Dict[str, Any]] = {}
+        self.pool = self._create_pool()
+        self.llm = self.pool.primary.llm
         self.frameworks = self._load_frameworks()
+        self._inflight = SingleFlight()
+        self._ainflight = AsyncSingleFlight()
+        self._usage_lock = threading.Lock()
+        self._usage = {
+            'calls': 0,
+            'input_tokens': 0,
+            'cached_input_tokens': 0,
+            'cache_write_tokens': 0,
+            'output_tokens': 0,
+        }
+        self._output_stats = {
+            'responses': 0,
+            'parse_failures': 0,
+            'schema_failures': 0,
+            'repairs_attempted': 0,
+            'repairs_succeeded': 0,
+            'unrepaired': 0,
+        }
+    
+    def _create_pool(self) -> LLMPool:
+        """Create the LLM backend pool: llm.backends, or just llm.provider/llm.model"""
+        backend_settings = self.config.llm_backends or [{}]
+        backends = []
+        for settings in backend_settings:
+            provider = settings.get('provider', self.config.llm_provider).lower()
+            model = settings.get('model', self.config.llm_model)
+            scheduler = get_scheduler(self.config, provider, model)
+            try:
+                llm = self._create_llm(provider, model, settings, scheduler)
+            except ConnectionError:
+                if len(backend_settings) == 1:
+                    raise
+                logger.warning(f"Skipping LLM backend {provider}/{model}; it could not be initialized.")
+                continue
+            name = settings.get('name') or f"{provider}/{model}"
+            self._backend_settings[name] = settings
+            backends.append(LLMBackend(
+                name, provider, model, llm,
+                weight=settings.get('weight', 1.0),
+                scheduler=scheduler,
+                expected_output_tokens=self.config.llm_expected_output_tokens,
+            ))
+        if not backends:
+            raise ConnectionError("None of the configured LLM backends could be initialized.")
+        return LLMPool(backends, self.config.llm_backend_failure_threshold, self.config.llm_backend_cooldown)
     
-    def _create_llm(self):
+    def _create_llm(self, provider: str, model: str, settings: Dict[str, Any],
+                    scheduler: Optional[RateLimitScheduler] = None):
         """Create LangChain LLM based on configuration"""
-        provider = self.config.llm_provider.lower()
-        logger.info(f"Initializing LLM with provider: {provider}, model: {self.config.llm_model}")
+        logger.info(f"Initializing LLM with provider: {provider}, model: {model}")
+        temperature = settings.get('temperature', self.config.llm_temperature)
+        timeout = settings.get('timeout_seconds', self.config.llm_timeout)
+        # With rate limits set, the scheduler does the retrying so a 429 slows every caller down
+        max_retries = 0 if scheduler else self.config.llm_max_retries
+        # Native JSON mode where the provider has one; Anthropic output relies on validation and repair
+        json_mode = settings.get('json_mode', self.config.llm_json_mode)
         
         try:
             if provider == "openai":
-                if not self.config.openai_api_key:
+                api_key = settings.get('api_key') or self.config.openai_api_key
+                if not api_key:
                     raise ValueError("OpenAI API key is not configured.")
                 return ChatOpenAI(
-                    model=self.config.llm_model,
-                    temperature=self.config.llm_temperature,
-                    api_key=self.config.openai_api_key,
-                    request_timeout=self.config.llm_timeout,
-                    max_retries=self.config.llm_max_retries
+                    model=model,
+                    temperature=temperature,
+                    api_key=api_key,
+                    base_url=settings.get('base_url'),
+                    request_timeout=timeout,
+                    max_retries=max_retries,
+                    model_kwargs={'response_format': {'type': 'json_object'}} if json_mode else {}
                 )
             elif provider == "anthropic":
-                if not self.config.anthropic_api_key:
+                api_key = settings.get('api_key') or self.config.anthropic_api_key
+                if not api_key:
                     raise ValueError("Anthropic API key is not configured.")
                 return ChatAnthropic(
-                    model=self.config.llm_model,
-                    temperature=self.config.llm_temperature,
-                    api_key=SecretStr(self.config.anthropic_api_key),
-                    timeout=float(self.config.llm_timeout), # Ensure timeout is float for Anthropic
-                    max_retries=self.config.llm_max_retries
+                    model=model,
+                    temperature=temperature,
+                    api_key=SecretStr(api_key),
+                    timeout=float(timeout), # Ensure timeout is float for Anthropic
+                    max_retries=max_retries
                 )
             elif provider == "ollama":
                 return Ollama(
-                    model=self.config.llm_model,
-                    base_url=self.config.ollama_base_url,
-                    temperature=self.config.llm_temperature,
-                    # Ollama timeout can be set via headers if needed, or through specific client options
-                    # request_timeout=self.config.llm_timeout # Not a direct param for Ollama constructor
+                    model=model,
+                    base_url=settings.get('base_url') or self.config.ollama_base_url,
+                    temperature=temperature,
+                    timeout=int(timeout), # Lets the pool fail over from a stalled box
+                    format='json' if json_mode else None,
                 )
             else:
                 raise ValueError(f"Unsupported LLM provider: {provider}")
@@ -108,8 +181,18 @@ class LyricsAnalyzer:
 
                     frameworks[framework_name] = {
                         'prompt': prompt_content,
-                        'version': version
+                        'version': version,
                     }
+                    # Static parts of the prompt for layouts that send the lyrics in a separate message
+                    frameworks[framework_name]['static_prompt'] = prompt_content.replace(LYRICS_PLACEHOLDER, '[LYRICS IN THE NEXT MESSAGE]')
+                    frameworks[framework_name]['cache_prefix'] = f"{SYSTEM_PROMPT}\n\n{frameworks[framework_name]['static_prompt']}"
+                    # Output schemas derived from the framework's JSON template
+                    template = template_from_prompt(prompt_content)
+                    if template:
+                        frameworks[framework_name]['schema'] = schema_from_template(template)
+                        frameworks[framework_name]['scores_schema'] = subset_schema(template, ['filtering_scores'])
+                    else:
+                        logger.warning(f"Framework '{framework_name}' has no parseable JSON analysis template; its output will not be schema-checked.")
                     logger.debug(f"Loaded framework: {framework_name} v{version}")
                 except Exception as e:
                     logger.error(f"Failed to load framework {filename}: {e}", exc_info=True)
@@ -118,8 +201,529 @@ class LyricsAnalyzer:
             logger.warning(f"No frameworks loaded from {framework_dir}. Analysis may not work as expected.")
         return frameworks
     
-    def analyze_lyrics(self, lyrics: str, framework_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Analyze lyrics with specified framework. Returns None on critical failure."""
+    def analyze_lyrics(self, lyrics: str, framework_name: Optional[str] = None,
+                       frameworks: Optional[List[str]] = None, profile: str = 'full',
+                       lyrics_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Analyze lyrics with specified framework. Returns None on critical failure.
+        
+        Pass the 'lyrics_hash' that cached and discovered lyrics come with; the lyrics
+        are only hashed here when it is missing.
+        
+        With frameworks=[...], analyzes with all of them in a single LLM call and returns
+        a dict of results keyed by framework name. Each result is cached under its own
+        framework/version, so later single-framework calls hit the cache.
+        
+        profile='scores' asks the model for the filtering_scores block only. It is cached
+        separately, and the filtering_scores of an already cached full analysis serve it.
+        The combined frameworks request is a full analysis, so it can't be used with it.
+        """
+        self._check_profile(profile)
+        self._check_frameworks(frameworks, profile)
+        lyrics_hash = lyrics_hash or self.db.hash_lyrics(lyrics)
+        if frameworks:
+            return self._analyze_multi(lyrics, lyrics_hash, frameworks)
+        
+        framework_name = self._resolve_framework(framework_name)
+        cache_framework = self._cache_framework(framework_name, profile)
+        framework_version = self._cache_version(framework_name)
+        
+        # Check cache
+        cached_result = self._get_cached(lyrics_hash, framework_name, profile)
+        if cached_result:
+            logger.info(f"Found cached analysis result for framework '{cache_framework}' v{framework_version}")
+            return cached_result
+        
+        # Concurrent requests for the same lyrics and framework share one LLM call
+        flight_key = (lyrics_hash, cache_framework, framework_version)
+        return self._inflight.do(flight_key, self._run_analysis, lyrics, lyrics_hash, framework_name, profile)
+    
+    async def aanalyze_lyrics(self, lyrics: str, framework_name: Optional[str] = None,
+                              frameworks: Optional[List[str]] = None, profile: str = 'full',
+                              lyrics_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Async version of analyze_lyrics(), calling the LLM with ainvoke.
+        
+        Cache reads and writes are blocking SQL calls, so they run in worker threads.
+        """
+        self._check_profile(profile)
+        self._check_frameworks(frameworks, profile)
+        if frameworks:
+            return await self._aanalyze_multi(lyrics, lyrics_hash or self.db.hash_lyrics(lyrics), frameworks)
+        
+        framework_name = self._resolve_framework(framework_name)
+        cache_framework = self._cache_framework(framework_name, profile)
+        framework_version = self._cache_version(framework_name)
+        lyrics_hash = lyrics_hash or self.db.hash_lyrics(lyrics)
+        
+        cached_result = await asyncio.to_thread(self._get_cached, lyrics_hash, framework_name, profile)
+        if cached_result:
+            logger.info(f"Found cached analysis result for framework '{cache_framework}' v{framework_version}")
+            return cached_result
+        
+        flight_key = (lyrics_hash, cache_framework, framework_version)
+        return await self._ainflight.do(flight_key, self._arun_analysis, lyrics, lyrics_hash, framework_name, profile)
+    
+    def stream_analysis(self, lyrics: str, framework_name: Optional[str] = None,
+                        profile: str = 'full', lyrics_hash: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Analyze lyrics with a streamed LLM response, yielding events as the JSON arrives.
+        
+        Yields {'event': 'section', 'name': ..., 'data': ...} for each top-level field of
+        the analysis as soon as it is complete, then {'event': 'result', 'data': ...,
+        'cached': ...} with the whole result once it has been parsed and cached. A cache
+        hit yields the same events straight away.
+        
+        Streams one framework at a time; use analyze_lyrics(frameworks=[...]) for a combined
+        analysis.
+        """
+        self._check_profile(profile)
+        framework_name = self._resolve_framework(framework_name)
+        cache_framework = self._cache_framework(framework_name, profile)
+        framework_version = self._cache_version(framework_name)
+        lyrics_hash = lyrics_hash or self.db.hash_lyrics(lyrics)
+        
+        cached_result = self._get_cached(lyrics_hash, framework_name, profile)
+        if cached_result:
+            logger.info(f"Found cached analysis result for framework '{cache_framework}' v{framework_version}")
+            for name, data in cached_result.items():
+                yield {'event': 'section', 'name': name, 'data': data}
+            yield {'event': 'result', 'data': cached_result, 'cached': True}
+            return
+        
+        logger.info(f"Streaming analysis with framework: {cache_framework} v{framework_version}")
+        parser: Optional[IncrementalJSONObjectParser] = IncrementalJSONObjectParser()
+        emitted = set()
+        pieces: List[str] = []
+        response = None
+        try:
+            for chunk in self.pool.stream(self._build_messages(lyrics, framework_name, profile)):
+                if not isinstance(chunk, str):
+                    response = chunk if response is None else response + chunk
+                text = self._chunk_text(chunk)
+                pieces.append(text)
+                if parser is None:
+                    continue
+                try:
+                    for name, data in parser.feed(text):
+                        emitted.add(name)
+                        yield {'event': 'section', 'name': name, 'data': data}
+                except json.JSONDecodeError as je:
+                    # Keep streaming; the full response is parsed at the end either way
+                    logger.warning(f"Could not parse the streamed analysis incrementally: {je}")
+                    parser = None
+            
+            self._record_usage(response, cache_framework)
+            result = self._parse_profile_response(AIMessage(content=''.join(pieces)), framework_name, profile)
+        except Exception as e:
+            raise self._analysis_error(e, framework_name, AIMessage(content=''.join(pieces)))
+        
+        self.db.store_analysis_by_hash(lyrics_hash, cache_framework, framework_version, result)
+        logger.info(f"Successfully analyzed and cached result for framework '{cache_framework}' v{framework_version}")
+        for name, data in result.items():
+            if name not in emitted:
+                yield {'event': 'section', 'name': name, 'data': data}
+        yield {'event': 'result', 'data': result, 'cached': False}
+    
+    def analyze_many(self, lyrics_list: List[str], framework_name: Optional[str] = None,
+                     max_concurrency: Optional[int] = None, profile: str = 'full',
+                     lyrics_hashes: Optional[List[Optional[str]]] = None) -> List[Any]:
+        """Analyze many lyrics with one framework. Returns one entry per input, in input order.
+        
+        lyrics_hashes, if given, holds each input's 'lyrics_hash' (or None) in the same
+        order, so cached and discovered lyrics don't need hashing again. Cached results
+        are looked up in bulk and identical lyrics are analyzed once. The misses go
+        through llm.batch with up to max_concurrency (default llm.batch_max_concurrency)
+        calls in flight, and each result is parsed and cached as it completes. A failed
+        item's entry is the exception instead of a result dict.
+        """
+        self._check_profile(profile)
+        framework_name = self._resolve_framework(framework_name)
+        cache_framework = self._cache_framework(framework_name, profile)
+        framework_version = self._cache_version(framework_name)
+        results, misses = self._prepare_batch(lyrics_list, lyrics_hashes, framework_name, profile)
+        if not misses:
+            return results
+        
+        logger.info(f"Batch analysis: {len(misses)} unique lyrics to analyze with '{cache_framework}' v{framework_version}")
+        inputs = [self._build_messages(lyrics, framework_name, profile) for lyrics, _, _ in misses]
+        for i, output in self._llm_runnable().batch_as_completed(
+            inputs, config={'max_concurrency': self._batch_concurrency(max_concurrency)}, return_exceptions=True
+        ):
+            _, lyrics_hash, positions = misses[i]
+            self._record_usage(output, cache_framework)
+            result = self._parse_batch_output(framework_name, output, profile)
+            if not isinstance(result, Exception):
+                self.db.store_analysis_by_hash(lyrics_hash, cache_framework, framework_version, result)
+            for position in positions:
+                results[position] = result
+        return results
+    
+    async def aanalyze_many(self, lyrics_list: List[str], framework_name: Optional[str] = None,
+                            max_concurrency: Optional[int] = None, profile: str = 'full',
+                            lyrics_hashes: Optional[List[Optional[str]]] = None) -> List[Any]:
+        """Async version of analyze_many(), using llm.abatch."""
+        self._check_profile(profile)
+        framework_name = self._resolve_framework(framework_name)
+        cache_framework = self._cache_framework(framework_name, profile)
+        framework_version = self._cache_version(framework_name)
+        results, misses = await asyncio.to_thread(
+            self._prepare_batch, lyrics_list, lyrics_hashes, framework_name, profile
+        )
+        if not misses:
+            return results
+        
+        logger.info(f"Batch analysis: {len(misses)} unique lyrics to analyze with '{cache_framework}' v{framework_version}")
+        inputs = [self._build_messages(lyrics, framework_name, profile) for lyrics, _, _ in misses]
+        async for i, output in self._llm_runnable().abatch_as_completed(
+            inputs, config={'max_concurrency': self._batch_concurrency(max_concurrency)}, return_exceptions=True
+        ):
+            _, lyrics_hash, positions = misses[i]
+            self._record_usage(output, cache_framework)
+            # In a thread, as a repair call may be needed
+            result = await asyncio.to_thread(self._parse_batch_output, framework_name, output, profile)
+            if not isinstance(result, Exception):
+                await asyncio.to_thread(
+                    self.db.store_analysis_by_hash, lyrics_hash, cache_framework, framework_version, result
+                )
+            for position in positions:
+                results[position] = result
+        return results
+    
+    def export_batch_requests(self, lyrics_iter: Iterable[Tuple[str, Optional[str]]], framework_name: Optional[str],
+                              output: TextIO, backend_name: Optional[str] = None) -> Dict[str, int]:
+        """Write a provider batch-API request file (JSONL) for lyrics without a cached analysis.
+        
+        lyrics_iter yields (lyrics, lyrics_hash or None) pairs. Requests use the
+        provider, model and settings of the named LLM backend, by default the primary
+        (first) one; OpenAI Batch API and Anthropic Message Batches are supported.
+        Each request's custom_id is the lyrics hash, which ingest_batch_results()
+        uses to cache the result, so the framework must not change between export
+        and ingest.
+        """
+        backend = self._batch_backend(backend_name)
+        if backend.provider not in ('openai', 'anthropic'):
+            raise ValueError(f"Batch request files are not supported for provider: {backend.provider}")
+        framework_name = self._resolve_framework(framework_name)
+        
+        counts = {'written': 0, 'cached': 0, 'duplicates': 0}
+        seen = set()
+        lyrics_iter = iter(lyrics_iter)
+        while True:
+            chunk = list(islice(lyrics_iter, BULK_QUERY_CHUNK_SIZE))
+            if not chunk:
+                break
+            _, misses = self._prepare_batch(
+                [lyrics for lyrics, _ in chunk], [lyrics_hash for _, lyrics_hash in chunk], framework_name
+            )
+            counts['cached'] += len(chunk) - sum(len(positions) for _, _, positions in misses)
+            for lyrics, content_hash, positions in misses:
+                if content_hash in seen:
+                    counts['duplicates'] += len(positions)
+                    continue
+                seen.add(content_hash)
+                counts['duplicates'] += len(positions) - 1
+                output.write(json.dumps(self._batch_request_line(backend, content_hash, lyrics, framework_name)) + "\n")
+                counts['written'] += 1
+        logger.info(f"Exported {counts['written']} batch requests for framework '{framework_name}' ({counts['cached']} already cached)")
+        return counts
+    
+    def ingest_batch_results(self, results: TextIO, framework_name: Optional[str] = None) -> Dict[str, int]:
+        """Parse a provider batch-API result file (JSONL) and cache the analyses.
+        
+        Accepts OpenAI Batch API and Anthropic Message Batches result lines. Each
+        result is parsed and schema-checked like a live response, including the
+        repair attempts and output stats; results that still fail are not stored.
+        Returns counts of stored and failed results.
+        """
+        framework_name = self._resolve_framework(framework_name)
+        framework_version = self._cache_version(framework_name)
+        schema = self._output_schema(framework_name)
+        counts = {'stored': 0, 'failed': 0}
+        pending: List[Tuple[str, str, str, Dict[str, Any]]] = []
+        for line_number, line in enumerate(results, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+                content_hash = entry['custom_id']
+                result = self._parse_validated(
+                    AIMessage(content=self._batch_result_text(entry)), schema, framework_name
+                )
+            except Exception as e:
+                logger.warning(f"Skipping batch result on line {line_number}: {e}")
+                counts['failed'] += 1
+                continue
+            pending.append((content_hash, framework_name, framework_version, result))
+            if len(pending) >= BULK_QUERY_CHUNK_SIZE:
+                self.db.store_analysis_by_hash_many(pending)
+                counts['stored'] += len(pending)
+                pending = []
+        if pending:
+            self.db.store_analysis_by_hash_many(pending)
+            counts['stored'] += len(pending)
+        logger.info(f"Ingested {counts['stored']} batch results for framework '{framework_name}' ({counts['failed']} failed)")
+        return counts
+    
+    def _prepare_batch(self, lyrics_list: List[str], lyrics_hashes: Optional[List[Optional[str]]], framework_name: str,
+                       profile: str = 'full') -> Tuple[List[Any], List[Tuple[str, str, List[int]]]]:
+        """Fill cached results and group the misses as (lyrics, lyrics hash, input positions) per lyrics hash.
+        
+        Only lyrics that came without a hash are hashed here.
+        """
+        results: List[Any] = [None] * len(lyrics_list)
+        hashes = [
+            (lyrics_hashes[position] if lyrics_hashes else None) or self.db.hash_lyrics(lyrics)
+            for position, lyrics in enumerate(lyrics_list)
+        ]
+        cached = self._get_cached_many(set(hashes), framework_name, profile)
+        misses: Dict[str, Tuple[str, str, List[int]]] = {}
+        for position, (lyrics, content_hash) in enumerate(zip(lyrics_list, hashes)):
+            result = cached.get(content_hash)
+            if result is not None:
+                results[position] = result
+                continue
+            misses.setdefault(content_hash, (lyrics, content_hash, []))[2].append(position)
+        logger.info(f"Batch analysis: {len(lyrics_list) - sum(len(p) for _, _, p in misses.values())} of {len(lyrics_list)} cached")
+        return results, list(misses.values())
+    
+    def _batch_concurrency(self, max_concurrency: Optional[int]) -> int:
+        return max(1, max_concurrency or self.config.llm_batch_max_concurrency)
+    
+    def _parse_batch_output(self, framework_name: str, output: Any, profile: str = 'full') -> Any:
+        """Parse one llm.batch output; returns the result dict or the error to report."""
+        try:
+            if isinstance(output, Exception):
+                raise output
+            return self._parse_profile_response(output, framework_name, profile)
+        except Exception as e:
+            return self._analysis_error(e, framework_name, None if isinstance(output, Exception) else output)
+    
+    def _batch_backend(self, backend_name: Optional[str]) -> LLMBackend:
+        """The backend batch requests are written for: the named one, or the primary backend."""
+        if backend_name is None:
+            return self.pool.primary
+        for backend in self.pool.backends:
+            if backend.name == backend_name:
+                return backend
+        available = ', '.join(backend.name for backend in self.pool.backends)
+        raise ValueError(f"LLM backend not found: {backend_name}. Available: {available}")
+    
+    def _batch_request_line(self, backend: LLMBackend, content_hash: str, lyrics: str, framework_name: str) -> Dict[str, Any]:
+        """One request line in the backend provider's batch API input format."""
+        settings = self._backend_settings.get(backend.name, {})
+        temperature = settings.get('temperature', self.config.llm_temperature)
+        # Same provider-specific message shape as live calls, e.g. no cache_control outside Anthropic
+        system_message, human_message = backend.prepare_messages(self._build_messages(lyrics, framework_name))
+        if backend.provider == 'anthropic':
+            return {
+                'custom_id': content_hash,
+                'params': {
+                    'model': backend.model,
+                    'max_tokens': getattr(backend.llm, 'max_tokens', None) or 4096,
+                    'temperature': temperature,
+                    'system': system_message.content,
+                    'messages': [{'role': 'user', 'content': human_message.content}],
+                },
+            }
+        return {
+            'custom_id': content_hash,
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': {
+                'model': backend.model,
+                'temperature': temperature,
+                'messages': [
+                    {'role': 'system', 'content': system_message.content},
+                    {'role': 'user', 'content': human_message.content},
+                ],
+                # Same native JSON mode as live calls
+                **({'response_format': {'type': 'json_object'}} if settings.get('json_mode', self.config.llm_json_mode) else {}),
+            },
+        }
+    
+    @staticmethod
+    def _batch_result_text(entry: Dict[str, Any]) -> str:
+        """Extract the model's reply from an OpenAI or Anthropic batch result line."""
+        if 'result' in entry:  # Anthropic Message Batches
+            result = entry['result'] or {}
+            if result.get('type') != 'succeeded':
+                raise ValueError(f"request {result.get('type')}: {result.get('error')}")
+            return ''.join(
+                block.get('text', '') for block in result['message']['content'] if block.get('type') == 'text'
+            )
+        response = entry.get('response') or {}  # OpenAI Batch API
+        if entry.get('error') or response.get('status_code') != 200:
+            raise ValueError(f"request failed: {entry.get('error') or response.get('status_code')}")
+        return response['body']['choices'][0]['message']['content']
+    
+    def _analyze_multi(self, lyrics: str, lyrics_hash: str, frameworks: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Analyze with several frameworks, sending the uncached ones in one combined request."""
+        names = list(dict.fromkeys(self._resolve_framework(name) for name in frameworks))
+        keys = {name: (lyrics_hash, name, self._cache_version(name)) for name in names}
+        cached = self.db.get_cached_analysis_by_hash_many(list(keys.values()))
+        results = {name: cached[key] for name, key in keys.items() if key in cached}
+        missing = sorted(name for name in names if name not in results)  # Sorted so the combined prompt is stable
+        
+        if len(missing) == 1:
+            results[missing[0]] = self.analyze_lyrics(lyrics, missing[0], lyrics_hash=lyrics_hash)
+        elif missing:
+            logger.info(f"Running combined analysis with frameworks: {', '.join(missing)}")
+            flight_key = (lyrics_hash,) + tuple(keys[name][1:] for name in missing)
+            results.update(self._inflight.do(flight_key, self._run_multi_analysis, lyrics, lyrics_hash, missing))
+        return {name: results[name] for name in names}
+    
+    def _run_multi_analysis(self, lyrics: str, lyrics_hash: str, framework_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """One LLM call for several frameworks; the response is split and cached per framework."""
+        label = ','.join(framework_names)
+        response = None
+        try:
+            response = self._invoke_llm(self._build_multi_messages(lyrics, framework_names))
+            self._record_usage(response, label)
+            combined = self._parse_validated(response, {'type': 'object'}, label)
+        except Exception as e:
+            raise self._analysis_error(e, label, response)
+        
+        results = self._split_multi_result(combined, framework_names)
+        if results:
+            self.db.store_analysis_by_hash_many(self._multi_cache_rows(lyrics_hash, results))
+        
+        for name in framework_names:
+            if name not in results:
+                # Don't fail the whole request for one missing section; analyze it on its own
+                logger.warning(f"Combined analysis response had no usable '{name}' section. Analyzing it separately.")
+                results[name] = self._run_analysis(lyrics, lyrics_hash, name)
+        return results
+    
+    async def _aanalyze_multi(self, lyrics: str, lyrics_hash: str, frameworks: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Async version of _analyze_multi()."""
+        names = list(dict.fromkeys(self._resolve_framework(name) for name in frameworks))
+        keys = {name: (lyrics_hash, name, self._cache_version(name)) for name in names}
+        cached = await asyncio.to_thread(self.db.get_cached_analysis_by_hash_many, list(keys.values()))
+        results = {name: cached[key] for name, key in keys.items() if key in cached}
+        missing = sorted(name for name in names if name not in results)
+        
+        if len(missing) == 1:
+            results[missing[0]] = await self.aanalyze_lyrics(lyrics, missing[0], lyrics_hash=lyrics_hash)
+        elif missing:
+            logger.info(f"Running combined analysis with frameworks: {', '.join(missing)}")
+            flight_key = (lyrics_hash,) + tuple(keys[name][1:] for name in missing)
+            results.update(await self._ainflight.do(flight_key, self._arun_multi_analysis, lyrics, lyrics_hash, missing))
+        return {name: results[name] for name in names}
+    
+    async def _arun_multi_analysis(self, lyrics: str, lyrics_hash: str, framework_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Async version of _run_multi_analysis()."""
+        label = ','.join(framework_names)
+        response = None
+        try:
+            response = await self._ainvoke_llm(self._build_multi_messages(lyrics, framework_names))
+            self._record_usage(response, label)
+            combined = await self._aparse_validated(response, {'type': 'object'}, label)
+        except Exception as e:
+            raise self._analysis_error(e, label, response)
+        
+        results = self._split_multi_result(combined, framework_names)
+        if results:
+            await asyncio.to_thread(self.db.store_analysis_by_hash_many, self._multi_cache_rows(lyrics_hash, results))
+        
+        for name in framework_names:
+            if name not in results:
+                logger.warning(f"Combined analysis response had no usable '{name}' section. Analyzing it separately.")
+                results[name] = await self._arun_analysis(lyrics, lyrics_hash, name)
+        return results
+    
+    def _split_multi_result(self, combined: Dict[str, Any], framework_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """The sections of a combined response that are valid analyses for their framework."""
+        results = {}
+        for name in framework_names:
+            part = combined.get(name)
+            if isinstance(part, dict) and part and not validation_error(part, self._output_schema(name)):
+                results[name] = part
+        return results
+    
+    def _multi_cache_rows(self, lyrics_hash: str, results: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str, str, Dict[str, Any]]]:
+        return [(lyrics_hash, name, self._cache_version(name), result) for name, result in results.items()]
+    
+    def _cache_version(self, framework_name: str) -> str:
+        """Framework version used in analysis cache keys; includes the backend set when llm.cache_by_backend is on."""
+        version = self.frameworks[framework_name]['version']
+        if self.config.llm_cache_by_backend:
+            return f"{version}@{self.pool.cache_tag()}"
+        return version
+    
+    @staticmethod
+    def _check_profile(profile: str):
+        if profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"Unknown analysis profile: {profile}. Expected one of: {', '.join(ANALYSIS_PROFILES)}")
+    
+    @staticmethod
+    def _check_frameworks(frameworks: Optional[List[str]], profile: str):
+        if frameworks and profile != 'full':
+            raise ValueError(f"frameworks runs one combined full analysis and can't be used with profile '{profile}'. "
+                             "Analyze with each framework on its own instead.")
+    
+    @staticmethod
+    def _cache_framework(framework_name: str, profile: str) -> str:
+        """Framework name in cache keys; scores-only results are cached as '<framework>/scores'."""
+        return framework_name if profile == 'full' else f"{framework_name}/{profile}"
+    
+    def _get_cached(self, lyrics_hash: str, framework_name: str, profile: str = 'full') -> Optional[Dict[str, Any]]:
+        framework_version = self._cache_version(framework_name)
+        cached_result = self.db.get_cached_analysis_by_hash(
+            lyrics_hash, self._cache_framework(framework_name, profile), framework_version
+        )
+        if cached_result or profile == 'full':
+            return cached_result
+        # A full analysis already holds the scores
+        return self._scores_only(
+            self.db.get_cached_analysis_by_hash(lyrics_hash, framework_name, framework_version), framework_name
+        )
+    
+    def _get_cached_many(self, lyrics_hashes: Iterable[str], framework_name: str, profile: str = 'full') -> Dict[str, Dict[str, Any]]:
+        """Bulk version of _get_cached(), keyed by lyrics hash."""
+        framework_version = self._cache_version(framework_name)
+        lyrics_hashes = set(lyrics_hashes)
+        cache_framework = self._cache_framework(framework_name, profile)
+        cached = {
+            lyrics_hash: result for (lyrics_hash, _, _), result in self.db.get_cached_analysis_by_hash_many(
+                [(lyrics_hash, cache_framework, framework_version) for lyrics_hash in lyrics_hashes]
+            ).items()
+        }
+        if profile == 'full':
+            return cached
+        remaining = lyrics_hashes - cached.keys()
+        if remaining:
+            full_results = self.db.get_cached_analysis_by_hash_many(
+                [(lyrics_hash, framework_name, framework_version) for lyrics_hash in remaining]
+            )
+            for (lyrics_hash, _, _), result in full_results.items():
+                scores = self._scores_only(result, framework_name)
+                if scores:
+                    cached[lyrics_hash] = scores
+        return cached
+    
+    @staticmethod
+    def _scores_only(result: Optional[Dict[str, Any]], framework_name: str) -> Optional[Dict[str, Any]]:
+        """The scores-only view of an analysis, or None if it has no filtering_scores."""
+        if not isinstance(result, dict) or not isinstance(result.get('filtering_scores'), dict):
+            return None
+        return {
+            'framework_applied': result.get('framework_applied', framework_name),
+            'filtering_scores': result['filtering_scores'],
+        }
+    
+    def _invoke_llm(self, messages: List[Any]) -> Any:
+        """Call the LLM through the backend pool (rate limits, load spreading, failover)."""
+        return self.pool.invoke(messages)
+    
+    async def _ainvoke_llm(self, messages: List[Any]) -> Any:
+        """Async version of _invoke_llm()."""
+        return await self.pool.ainvoke(messages)
+    
+    def _llm_runnable(self) -> Any:
+        """The backend pool as a Runnable for batch calls."""
+        return RunnableLambda(self._invoke_llm, afunc=self._ainvoke_llm)
+    
+    def _resolve_framework(self, framework_name: Optional[str]) -> str:
+        """Check the LLM and framework are usable and return the framework name to run."""
         if not self.llm:
             logger.error("LLM not initialized. Cannot perform analysis.")
             raise RuntimeError("LLM is not available for analysis.")
@@ -136,69 +740,318 @@ class LyricsAnalyzer:
             logger.error(f"Framework not found: {framework_name}. Available: {list(self.frameworks.keys())}")
             raise ValueError(f"Framework not found: {framework_name}")
         
-        framework = self.frameworks[framework_name]
-        framework_version = framework['version']
+        return framework_name
+    
+    def _run_analysis(self, lyrics: str, lyrics_hash: str, framework_name: str, profile: str = 'full') -> Dict[str, Any]:
+        """Run the LLM analysis for one framework and cache the result."""
+        cache_framework = self._cache_framework(framework_name, profile)
+        framework_version = self._cache_version(framework_name)
         
-        # Check cache
-        cached_result = self.db.get_cached_analysis(lyrics, framework_name, framework_version)
+        # An identical analysis may have finished between our cache check and now
+        cached_result = self._get_cached(lyrics_hash, framework_name, profile)
         if cached_result:
-            logger.info(f"Found cached analysis result for framework '{framework_name}' v{framework_version}")
             return cached_result
         
         # Run analysis
-        logger.info(f"Running analysis with framework: {framework_name} v{framework_version}")
+        logger.info(f"Running analysis with framework: {cache_framework} v{framework_version}")
+        response = None
         try:
-            # Ensure lyrics placeholder is present in prompt, otherwise append lyrics.
-            prompt_template = framework['prompt']
-            if '[PASTE LYRICS HERE]' in prompt_template:
-                filled_prompt = prompt_template.replace('[PASTE LYRICS HERE]', lyrics)
-            else:
-                logger.warning(f"Placeholder '[PASTE LYRICS HERE]' not found in framework '{framework_name}'. Appending lyrics to the end of the prompt.")
-                filled_prompt = f"{prompt_template}\n\nLyrics to analyze:\n{lyrics}"
-
-            messages = [
-                SystemMessage(content="You are an AI assistant specialized in analyzing song lyrics. Provide your analysis in JSON format."),
-                HumanMessage(content=filled_prompt)
-            ]
-            
-            response = self.llm.invoke(messages)
-            
-            if not response or not hasattr(response, 'content') or not response.content:
-                logger.error("LLM returned an empty or invalid response.")
-                raise ValueError("AI model returned an empty response.")
-
-            # Attempt to parse response content as JSON
-            # The response.content might already be a dict if the LLM is configured for JSON output mode
-            if isinstance(response.content, dict):
-                result = response.content
-            elif isinstance(response.content, str):
-                # Clean the string: find the first '{' and last '}' to extract JSON part
-                try:
-                    json_start = response.content.index('{')
-                    json_end = response.content.rindex('}') + 1
-                    json_str = response.content[json_start:json_end]
-                    result = json.loads(json_str)
-                except (ValueError, json.JSONDecodeError) as je:
-                    logger.error(f"Failed to parse LLM response string as JSON. String was: '{response.content}'. Error: {je}")
-                    raise ValueError(f"Invalid JSON response from AI model: {je}")
-            else:
-                logger.error(f"LLM response content is not a string or dict: {type(response.content)}")
-                raise ValueError("AI model returned an unexpected response format.")
+            response = self._invoke_llm(self._build_messages(lyrics, framework_name, profile))
+            self._record_usage(response, cache_framework)
+            result = self._parse_profile_response(response, framework_name, profile)
             
             # Store in cache
-            self.db.store_analysis(lyrics, framework_name, framework_version, result)
-            logger.info(f"Successfully analyzed and cached result for framework '{framework_name}' v{framework_version}")
+            self.db.store_analysis_by_hash(lyrics_hash, cache_framework, framework_version, result)
+            logger.info(f"Successfully analyzed and cached result for framework '{cache_framework}' v{framework_version}")
             return result
             
-        except json.JSONDecodeError as e:
+        except Exception as e:
+            raise self._analysis_error(e, framework_name, response)
+    
+    async def _arun_analysis(self, lyrics: str, lyrics_hash: str, framework_name: str, profile: str = 'full') -> Dict[str, Any]:
+        """Async version of _run_analysis()."""
+        cache_framework = self._cache_framework(framework_name, profile)
+        framework_version = self._cache_version(framework_name)
+        
+        cached_result = await asyncio.to_thread(self._get_cached, lyrics_hash, framework_name, profile)
+        if cached_result:
+            return cached_result
+        
+        logger.info(f"Running analysis with framework: {cache_framework} v{framework_version}")
+        response = None
+        try:
+            response = await self._ainvoke_llm(self._build_messages(lyrics, framework_name, profile))
+            self._record_usage(response, cache_framework)
+            result = await self._aparse_profile_response(response, framework_name, profile)
+            
+            await asyncio.to_thread(self.db.store_analysis_by_hash, lyrics_hash, cache_framework, framework_version, result)
+            logger.info(f"Successfully analyzed and cached result for framework '{cache_framework}' v{framework_version}")
+            return result
+        
+        except Exception as e:
+            raise self._analysis_error(e, framework_name, response)
+    
+    def _build_messages(self, lyrics: str, framework_name: str, profile: str = 'full') -> List[Any]:
+        """Fill the framework prompt with the lyrics."""
+        if self.config.llm_prompt_caching:
+            return self._build_prefix_cached_messages(lyrics, framework_name, profile)
+        
+        # Ensure lyrics placeholder is present in prompt, otherwise append lyrics.
+        prompt_template = self.frameworks[framework_name]['prompt']
+        if LYRICS_PLACEHOLDER in prompt_template:
+            filled_prompt = prompt_template.replace(LYRICS_PLACEHOLDER, lyrics)
+        else:
+            logger.warning(f"Placeholder '{LYRICS_PLACEHOLDER}' not found in framework '{framework_name}'. Appending lyrics to the end of the prompt.")
+            filled_prompt = f"{prompt_template}\n\nLyrics to analyze:\n{lyrics}"
+        if profile == 'scores':
+            filled_prompt = f"{filled_prompt}\n\n{SCORES_ONLY_INSTRUCTIONS}"
+        
+        return [
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content=filled_prompt)
+        ]
+    
+    def _build_prefix_cached_messages(self, lyrics: str, framework_name: str, profile: str = 'full') -> List[Any]:
+        """Prompt-caching layout: the whole framework as a static system prefix, lyrics last.
+        
+        The prefix is byte-identical for every song analyzed with a framework, so
+        providers can serve it from their prompt cache. OpenAI does this automatically
+        for long prefixes; Anthropic needs the explicit cache_control marker.
+        """
+        prefix = self.frameworks[framework_name]['cache_prefix']
+        if profile == 'scores':
+            prefix = f"{prefix}\n\n{SCORES_ONLY_INSTRUCTIONS}"
+        return self._prefix_messages(prefix, lyrics)
+    
+    def _build_multi_messages(self, lyrics: str, framework_names: List[str]) -> List[Any]:
+        """Combined prompt: every framework's instructions in one static prefix, lyrics last."""
+        instructions = (
+            f"Analyze the lyrics with each of the {len(framework_names)} frameworks below. "
+            f"Return a single JSON object with exactly these keys: {', '.join(json.dumps(name) for name in framework_names)}. "
+            "Each value must be the complete JSON analysis that framework asks for."
+        )
+        sections = [
+            f"=== Framework: {name} ===\n{self.frameworks[name]['static_prompt']}" for name in framework_names
+        ]
+        prefix = f"{SYSTEM_PROMPT}\n\n{instructions}\n\n" + "\n\n".join(sections)
+        return self._prefix_messages(prefix, lyrics)
+    
+    def _prefix_messages(self, prefix: str, lyrics: str) -> List[Any]:
+        """A static system prefix followed by a short message holding the lyrics."""
+        # Other backends in the pool get the cache_control marker stripped
+        if self.config.llm_prompt_caching and self.pool.has_provider('anthropic'):
+            system_content: Any = [{'type': 'text', 'text': prefix, 'cache_control': {'type': 'ephemeral'}}]
+        else:
+            system_content = prefix
+        return [
+            SystemMessage(content=system_content),
+            HumanMessage(content=f"Lyrics to analyze:\n{lyrics}")
+        ]
+    
+    def _record_usage(self, response: Any, framework_name: str):
+        """Log and accumulate token usage, including prompt-cache reads and writes."""
+        usage = getattr(response, 'usage_metadata', None)
+        if not usage:
+            return
+        details = usage.get('input_token_details') or {}
+        input_tokens = usage.get('input_tokens') or 0
+        cached_tokens = details.get('cache_read') or 0
+        cache_write_tokens = details.get('cache_creation') or 0
+        output_tokens = usage.get('output_tokens') or 0
+        logger.info(
+            f"LLM usage for '{framework_name}': {input_tokens} input tokens "
+            f"({cached_tokens} cached, {input_tokens - cached_tokens} uncached, {cache_write_tokens} written to cache), "
+            f"{output_tokens} output tokens"
+        )
+        with self._usage_lock:
+            self._usage['calls'] += 1
+            self._usage['input_tokens'] += input_tokens
+            self._usage['cached_input_tokens'] += cached_tokens
+            self._usage['cache_write_tokens'] += cache_write_tokens
+            self._usage['output_tokens'] += output_tokens
+    
+    def inflight_stats(self) -> Dict[str, Any]:
+        """Analyses running now, callers waiting on them, and requests coalesced into them since startup.
+        
+        Async analyses (aanalyze_lyrics) are counted separately under 'async'.
+        """
+        stats: Dict[str, Any] = self._inflight.stats()
+        stats['async'] = self._ainflight.stats()
+        return stats
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Token usage of LLM calls made by this analyzer since it was created."""
+        with self._usage_lock:
+            stats: Dict[str, Any] = dict(self._usage)
+        stats['uncached_input_tokens'] = stats['input_tokens'] - stats['cached_input_tokens']
+        stats['cached_input_ratio'] = (
+            round(stats['cached_input_tokens'] / stats['input_tokens'], 4) if stats['input_tokens'] else 0.0
+        )
+        stats['prompt_caching'] = self.config.llm_prompt_caching
+        stats['backends'] = self.pool.stats()
+        stats['structured_output'] = self.get_output_stats()
+        return stats
+    
+    def get_output_stats(self) -> Dict[str, Any]:
+        """How often LLM output failed to parse or validate, and how often the cheap repair fixed it."""
+        with self._usage_lock:
+            stats: Dict[str, Any] = dict(self._output_stats)
+        failures = stats['parse_failures'] + stats['schema_failures']
+        stats['failure_rate'] = round(failures / stats['responses'], 4) if stats['responses'] else 0.0
+        stats['repair_success_rate'] = (
+            round(stats['repairs_succeeded'] / stats['repairs_attempted'], 4) if stats['repairs_attempted'] else 0.0
+        )
+        stats['json_mode'] = self.config.llm_json_mode
+        return stats
+    
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        """Text of one streamed chunk: a plain string (completion LLMs) or a message chunk."""
+        if isinstance(chunk, str):
+            return chunk
+        content = getattr(chunk, 'content', '')
+        if isinstance(content, list):  # Content blocks, e.g. Anthropic
+            return ''.join(
+                block.get('text', '') if isinstance(block, dict) else str(block) for block in content
+            )
+        return content or ''
+    
+    def _parse_response(self, response: Any) -> Dict[str, Any]:
+        """Extract the JSON analysis from an LLM response."""
+        content = response if isinstance(response, str) else getattr(response, 'content', None)
+        if not content:
+            logger.error("LLM returned an empty or invalid response.")
+            raise ValueError("AI model returned an empty response.")
+        
+        # Attempt to parse response content as JSON
+        # The response.content might already be a dict if the LLM is configured for JSON output mode
+        if isinstance(content, dict):
+            return content
+        elif isinstance(content, str):
+            # Decode the first JSON object; prose, code fences or stray braces around it are ignored
+            try:
+                json_start = content.index('{')
+                result, _ = json.JSONDecoder().raw_decode(content, json_start)
+                return result
+            except (ValueError, json.JSONDecodeError) as je:
+                logger.warning(f"Failed to parse LLM response string as JSON: {je}")
+                raise ValueError(f"Invalid JSON response from AI model: {je}")
+        else:
+            logger.error(f"LLM response content is not a string or dict: {type(content)}")
+            raise ValueError("AI model returned an unexpected response format.")
+    
+    def _output_schema(self, framework_name: str, profile: str = 'full') -> Optional[Dict[str, Any]]:
+        """JSON schema a framework's output must match, or None if the framework has no template."""
+        return self.frameworks[framework_name].get('scores_schema' if profile == 'scores' else 'schema')
+    
+    def _check_output(self, response: Any, schema: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[str], str]:
+        """Parse and validate a response without raising: (result, failure counter or None, error)."""
+        try:
+            result = self._parse_response(response)
+        except ValueError as e:
+            return None, 'parse_failures', str(e)
+        error = validation_error(result, schema)
+        if error:
+            return None, 'schema_failures', f"AI model response does not match the expected structure: {error}"
+        return result, None, ''
+    
+    def _parse_validated(self, response: Any, schema: Optional[Dict[str, Any]], label: str) -> Dict[str, Any]:
+        """Parse a response and check it against schema.
+        
+        Malformed or off-schema output is sent back on its own, without the framework
+        prompt, for up to llm.json_repair_attempts cheap fix-up calls before giving up.
+        """
+        result, failure, error = self._check_output(response, schema)
+        self._count_output('responses', failure)
+        attempts = 0
+        while failure and attempts < self.config.llm_json_repair_attempts:
+            attempts += 1
+            logger.warning(f"Repairing LLM output for '{label}' (attempt {attempts}): {error}")
+            try:
+                response = self._invoke_llm(self._build_repair_messages(response, error, schema))
+            except Exception as e:
+                logger.warning(f"JSON repair call for '{label}' failed: {e}")
+                break
+            self._record_usage(response, f"{label} repair")
+            result, failure, error = self._check_output(response, schema)
+            self._count_output('repairs_attempted', None if failure else 'repairs_succeeded')
+        if failure:
+            self._count_output('unrepaired')
+            raise ValueError(error)
+        return result
+    
+    async def _aparse_validated(self, response: Any, schema: Optional[Dict[str, Any]], label: str) -> Dict[str, Any]:
+        """Async version of _parse_validated()."""
+        result, failure, error = self._check_output(response, schema)
+        self._count_output('responses', failure)
+        attempts = 0
+        while failure and attempts < self.config.llm_json_repair_attempts:
+            attempts += 1
+            logger.warning(f"Repairing LLM output for '{label}' (attempt {attempts}): {error}")
+            try:
+                response = await self._ainvoke_llm(self._build_repair_messages(response, error, schema))
+            except Exception as e:
+                logger.warning(f"JSON repair call for '{label}' failed: {e}")
+                break
+            self._record_usage(response, f"{label} repair")
+            result, failure, error = self._check_output(response, schema)
+            self._count_output('repairs_attempted', None if failure else 'repairs_succeeded')
+        if failure:
+            self._count_output('unrepaired')
+            raise ValueError(error)
+        return result
+    
+    def _build_repair_messages(self, response: Any, error: str, schema: Optional[Dict[str, Any]]) -> List[Any]:
+        """A short fix-up request holding only the bad output, the error and the expected structure."""
+        content = getattr(response, 'content', None)
+        text = json.dumps(content) if isinstance(content, dict) else self._chunk_text(response)
+        parts = [f"Problem: {error}"]
+        if schema:
+            parts.append(f"The JSON must match this JSON schema:\n{json.dumps(schema)}")
+        parts.append(f"JSON to fix:\n{text}")
+        return [
+            SystemMessage(content=REPAIR_SYSTEM_PROMPT),
+            HumanMessage(content="\n\n".join(parts))
+        ]
+    
+    def _count_output(self, *counters: Optional[str]):
+        with self._usage_lock:
+            for counter in counters:
+                if counter:
+                    self._output_stats[counter] += 1
+    
+    def _parse_profile_response(self, response: Any, framework_name: str, profile: str) -> Dict[str, Any]:
+        """Parse and validate an LLM response for the given analysis profile."""
+        result = self._parse_validated(
+            response, self._output_schema(framework_name, profile), self._cache_framework(framework_name, profile)
+        )
+        return self._profile_result(result, framework_name, profile)
+    
+    async def _aparse_profile_response(self, response: Any, framework_name: str, profile: str) -> Dict[str, Any]:
+        """Async version of _parse_profile_response()."""
+        result = await self._aparse_validated(
+            response, self._output_schema(framework_name, profile), self._cache_framework(framework_name, profile)
+        )
+        return self._profile_result(result, framework_name, profile)
+    
+    def _profile_result(self, result: Dict[str, Any], framework_name: str, profile: str) -> Dict[str, Any]:
+        if profile != 'scores':
+            return result
+        scores = self._scores_only(result, framework_name)
+        if scores is None:
+            raise ValueError("Scores-only response has no filtering_scores object.")
+        return scores
+    
+    def _analysis_error(self, e: Exception, framework_name: str, response: Any) -> Exception:
+        """Map a failure during analysis to the error raised to callers."""
+        if isinstance(e, json.JSONDecodeError):
             logger.error(f"Failed to parse LLM response as JSON: {e}. Response content: {getattr(response, 'content', 'N/A')}", exc_info=True)
             # Depending on policy, you might return a specific error structure or None
             # For now, re-raising a clear error for the caller to handle.
-            raise ValueError(f"Invalid response format from AI model, not valid JSON: {e}")
-        except Exception as e:
-            logger.error(f"Analysis error with framework '{framework_name}': {e}", exc_info=True)
-            # Re-raise as a runtime error to indicate a failure in the analysis process itself.
-            raise RuntimeError(f"Analysis failed for framework '{framework_name}': {str(e)}")
+            return ValueError(f"Invalid response format from AI model, not valid JSON: {e}")
+        logger.error(f"Analysis error with framework '{framework_name}': {e}", exc_info=True)
+        # Re-raise as a runtime error to indicate a failure in the analysis process itself.
+        return RuntimeError(f"Analysis failed for framework '{framework_name}': {str(e)}")
     
     def get_available_frameworks(self) -> List[Dict[str, str]]:
         """Get list of available frameworks with their names and versions."""
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+from typing import Optional, Dict, Any, List, Iterable, AsyncIterator, Tuple
+
+import httpx
+
+from src.core.config import Config
+from src.core.database import Database
+from src.core.discovery import LyricsDiscovery
+from src.core.single_flight import AsyncSingleFlight
+from src.providers.http import ProviderError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLyricsDiscovery(LyricsDiscovery):
+    """asyncio version of LyricsDiscovery.
+
+    Provider requests go through one pooled httpx.AsyncClient, so a single event
+    loop can keep hundreds of searches in flight. Cache reads and writes are
+    blocking SQL calls and run in worker threads. Use as an async context manager,
+    or call aclose() when done.
+    """
+
+    def __init__(self, config: Config, database: Database):
+        super().__init__(config, database)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._ainflight = AsyncSingleFlight()
+        self._provider_async_semaphores = {
+            name: asyncio.Semaphore(limit)
+            for name, limit in self.config.provider_concurrency.items()
+            if limit and limit > 0
+        }
+
+    async def __aenter__(self) -> "AsyncLyricsDiscovery":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def inflight_stats(self) -> Dict[str, Any]:
+        """In-flight stats of the blocking searches, with those of the async ones under 'async'."""
+        stats = super().inflight_stats()
+        stats['async'] = self._ainflight.stats()
+        return stats
+
+    async def asearch_lyrics(self, artist: str, title: str, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Async version of search_lyrics()."""
+        if not force_refresh:
+            cached_result = await asyncio.to_thread(self.db.get_cached_lyrics, artist, title)
+            if cached_result:
+                logger.info(f"Found cached lyrics for '{artist} - {title}' from source: {cached_result.get('source')}")
+                return cached_result
+
+        return await self._adiscover_coalesced(artist, title, force_refresh)
+
+    async def asearch_many(self, songs: Iterable[Tuple[str, str]], force_refresh: bool = False,
+                           max_concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Async version of search_many(), yielding the same records as songs complete.
+
+        Up to max_concurrency (default providers.async_batch_concurrency) distinct
+        songs are searched at once.
+        """
+        pending: Dict[str, List[Tuple[int, str, str]]] = {}
+        for index, (artist, title) in enumerate(songs):
+            artist = (artist or '').strip()
+            title = (title or '').strip()
+            if not artist or not title:
+                yield {'index': index, 'artist': artist, 'title': title, 'status': 'invalid',
+                       'error': 'Artist and title are required'}
+                continue
+            search_key = self.db._generate_search_key(artist, title)
+            pending.setdefault(search_key, []).append((index, artist, title))
+
+        if not pending:
+            return
+
+        logger.info(f"Async batch search: {sum(len(v) for v in pending.values())} songs, {len(pending)} unique")
+
+        if not force_refresh:
+            cached = await asyncio.to_thread(
+                self.db.get_cached_lyrics_many, [entries[0][1:] for entries in pending.values()]
+            )
+            for search_key in list(pending):
+                entries = pending[search_key]
+                result = cached.get(entries[0][1:])
+                if result:
+                    del pending[search_key]
+                    for record in self._batch_records(entries, result):
+                        yield record
+            logger.info(f"Async batch search: {len(cached)} cache hits, {len(pending)} to discover")
+
+        if not pending:
+            return
+
+        limit = asyncio.Semaphore(max(1, max_concurrency or self.config.async_batch_concurrency))
+
+        async def discover(entries: List[Tuple[int, str, str]]):
+            async with limit:
+                try:
+                    return entries, await self._adiscover_coalesced(entries[0][1], entries[0][2], force_refresh), None
+                except Exception as e:
+                    return entries, None, e
+
+        tasks = [asyncio.ensure_future(discover(entries)) for entries in pending.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                entries, result, error = await next_done
+                if error is not None:
+                    logger.error(f"Async batch search failed for '{entries[0][1]} - {entries[0][2]}': {error}")
+                    for index, artist, title in entries:
+                        yield {'index': index, 'artist': artist, 'title': title, 'status': 'error', 'error': str(error)}
+                    continue
+                for record in self._batch_records(entries, result):
+                    yield record
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _adiscover_coalesced(self, artist: str, title: str, force_refresh: bool) -> Optional[Dict[str, Any]]:
+        search_key = self.db._generate_search_key(artist, title)
+
+        async def discover():
+            if not force_refresh:
+                cached_result = await asyncio.to_thread(self.db.get_cached_lyrics, artist, title)
+                if cached_result:
+                    return cached_result
+            return await self._adiscover_and_store(artist, title, force_refresh)
+
+        return await self._ainflight.do(search_key, discover)
+
+    async def _adiscover_and_store(self, artist: str, title: str, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+        skipped = [] if force_refresh else await asyncio.to_thread(
+            self.db.get_negative_lookups, artist, title, self._provider_names()
+        )
+        providers = self._providers_to_query(artist, title, skipped)
+        if not providers:
+            return None
+        track_ids = await asyncio.to_thread(self.db.get_provider_track_ids, artist, title)
+        misses: List[str] = []
+        if self.config.discovery_mode == 'concurrent' and len(providers) > 1:
+            result = await self._asearch_providers_concurrently(artist, title, track_ids, providers, misses)
+        else:
+            result = await self._asearch_providers_sequentially(artist, title, track_ids, providers, misses)
+
+        if not result:
+            logger.warning(f"No valid lyrics found for '{artist} - {title}' after trying all providers.")
+            await asyncio.to_thread(self.db.store_negative_lookups, artist, title, misses)
+            return None
+
+        lyrics_text = result.pop('lyrics')
+        source = result.pop('source')
+        lyrics_hash = await asyncio.to_thread(self.db.store_lyrics, artist, title, lyrics_text, source, **result)
+
+        return {
+            'artist': artist,
+            'title': title,
+            'lyrics': lyrics_text,
+            'lyrics_hash': lyrics_hash,
+            'source': source,
+            **result
+        }
+
+    async def _asearch_providers_sequentially(self, artist: str, title: str,
+                                              track_ids: Optional[Dict[str, str]] = None,
+                                              providers: Optional[List[Any]] = None,
+                                              misses: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        track_ids = track_ids or {}
+        for provider in self._ordered_providers() if providers is None else providers:
+            result = await self._aquery_provider(
+                provider, artist, title, track_ids.get(self._provider_name(provider)), misses
+            )
+            if result:
+                return result
+        return None
+
+    async def _asearch_providers_concurrently(self, artist: str, title: str,
+                                              track_ids: Optional[Dict[str, str]] = None,
+                                              providers: Optional[List[Any]] = None,
+                                              misses: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Query all providers at once; like the sync version, preference order picks the winner."""
+        track_ids = track_ids or {}
+        tasks = [
+            asyncio.ensure_future(
+                self._aquery_provider(provider, artist, title, track_ids.get(self._provider_name(provider)), misses)
+            )
+            for provider in (self._ordered_providers() if providers is None else providers)
+        ]
+        try:
+            for task in tasks:
+                result = await task
+                if result:
+                    return result
+        finally:
+            for task in tasks:
+                task.cancel()
+        return None
+
+    async def _aquery_provider(self, provider: Any, artist: str, title: str, track_id: Optional[str] = None,
+                               misses: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        provider_name = provider.__class__.__name__
+        semaphore = self._provider_async_semaphores.get(self._provider_name(provider))
+        breaker, health = self._provider_guards(provider)
+        if not breaker.allow_request():
+            logger.info(f"Skipping {provider_name} for '{artist} - {title}': circuit open")
+            return None
+        started = None
+        try:
+            logger.info(f"Searching with provider: {provider_name} for '{artist} - {title}'")
+            async with semaphore or nullcontext():
+                started = time.perf_counter()
+                if track_id:
+                    result = await provider.asearch(artist, title, self._get_client(), track_id=track_id)
+                else:
+                    result = await provider.asearch(artist, title, self._get_client())
+
+            valid = bool(result and result.get('lyrics') and self._is_valid_lyrics(result['lyrics']))
+            breaker.record_success()
+            health.record(valid, time.perf_counter() - started)
+            if valid:
+                logger.info(f"Found lyrics for '{artist} - {title}' from {result.get('source')} via {provider_name}.")
+                return result
+            elif result:
+                logger.info(f"Lyrics found by {provider_name} for '{artist} - {title}' but deemed invalid or empty.")
+            if misses is not None:
+                misses.append(self._provider_name(provider))
+
+        except ProviderError as e:
+            logger.warning(f"Provider {provider_name} unavailable for '{artist} - {title}': {e}")
+            self._record_provider_error(breaker, health, started)
+        except asyncio.CancelledError:
+            # Lost the race to a preferred provider; a half-open probe slot must not leak
+            breaker.release()
+            raise
+        except Exception as e:
+            logger.warning(f"Provider {provider_name} failed for '{artist} - {title}': {e}", exc_info=True)
+            self._record_provider_error(breaker, health, started)
+
+        return None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create the HTTP client shared by all async provider requests."""
+        if self._client is None:
+            max_connections = max(1, self.config.async_max_connections)
+            self._client = httpx.AsyncClient(
+                timeout=self.config.provider_http_timeout,
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            )
+        return self._client
@@ -0,0 +1,290 @@
+import hashlib
+import logging
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Shared key/value store that sits between the in-process tier and SQL.
+
+    Values are serialized JSON strings. Implementations must be safe to use from
+    several threads and several processes at once. Database treats every backend
+    as best-effort: errors are logged and the lookup falls through to SQL.
+    """
+
+    name = "base"
+
+    def __init__(self, key_prefix: str = "lyricmind:", ttl_seconds: Optional[float] = None):
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Return the stored values for the given keys; missing keys are left out."""
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, str]):
+        """Store the given values, replacing any under the same keys."""
+
+    @abstractmethod
+    def clear(self):
+        """Remove every entry under this backend's key prefix."""
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, value: str):
+        self.set_many({key: value})
+
+    def record(self, hits: int = 0, misses: int = 0, errors: int = 0):
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+            self.errors += errors
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': self.name,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'errors': self.errors,
+            }
+
+    def close(self):
+        pass
+
+
+class DiskCacheBackend(CacheBackend):
+    """Cache shared through a directory, e.g. a volume mounted into every worker.
+
+    Each entry is one file named after the hash of its key, written to a temp file
+    and renamed into place so readers never see partial writes. Expiry uses the
+    file's modification time.
+    """
+
+    name = "disk"
+
+    def __init__(self, directory: str, key_prefix: str = "lyricmind:", ttl_seconds: Optional[float] = None):
+        super().__init__(key_prefix, ttl_seconds)
+        self.directory = os.path.join(directory, hashlib.sha256(key_prefix.encode('utf-8')).hexdigest()[:12])
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        results = {}
+        now = time.time()
+        for key in keys:
+            path = self._path(key)
+            try:
+                if self.ttl_seconds and os.path.getmtime(path) + self.ttl_seconds < now:
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    results[key] = f.read()
+            except FileNotFoundError:
+                continue
+        return results
+
+    def set_many(self, items: Dict[str, str]):
+        for key, value in items.items():
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(value)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+    def clear(self):
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                try:
+                    os.unlink(os.path.join(root, filename))
+                except FileNotFoundError:
+                    pass
+
+
+class RedisProtocolError(Exception):
+    pass
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache stored in any server speaking the Redis protocol (Redis, Valkey, KeyDB...).
+
+    Uses a small built-in RESP client over a pool of plain sockets, so no extra
+    client library is needed. The URL format is redis://[:password@]host[:port][/db].
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, key_prefix: str = "lyricmind:", ttl_seconds: Optional[float] = None,
+                 pool_size: int = 8, socket_timeout: float = 2.0):
+        super().__init__(key_prefix, ttl_seconds)
+        parsed = urlparse(url)
+        if parsed.scheme not in ('redis', ''):
+            raise ValueError(f"Unsupported cache backend URL scheme: {parsed.scheme}")
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.socket_timeout = socket_timeout
+        self._pool: "queue.LifoQueue[_RespConnection]" = queue.LifoQueue(maxsize=pool_size)
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        if not keys:
+            return {}
+        values = self._execute([['MGET', *[self.key_prefix + key for key in keys]]])[0]
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, items: Dict[str, str]):
+        if not items:
+            return
+        commands = []
+        for key, value in items.items():
+            command = ['SET', self.key_prefix + key, value]
+            if self.ttl_seconds:
+                command += ['EX', str(int(self.ttl_seconds))]
+            commands.append(command)
+        self._execute(commands)
+
+    def clear(self):
+        cursor = '0'
+        while True:
+            cursor, keys = self._execute([['SCAN', cursor, 'MATCH', self.key_prefix + '*', 'COUNT', '500']])[0]
+            if keys:
+                self._execute([['DEL', *keys]])
+            if cursor in ('0', b'0'):
+                break
+
+    def ping(self) -> bool:
+        return self._execute([['PING']])[0] == 'PONG'
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _execute(self, commands: List[List[str]]) -> List[Any]:
+        """Send commands as one pipeline and return their replies in order."""
+        connection = self._acquire()
+        try:
+            replies = connection.execute(commands)
+        except Exception:
+            connection.close()
+            raise
+        self._release(connection)
+        for reply in replies:
+            if isinstance(reply, RedisProtocolError):
+                raise reply
+        return replies
+
+    def _acquire(self) -> "_RespConnection":
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            connection = _RespConnection(self.host, self.port, self.socket_timeout)
+            setup = []
+            if self.password:
+                setup.append(['AUTH', self.password])
+            if self.db:
+                setup.append(['SELECT', str(self.db)])
+            for reply in connection.execute(setup) if setup else []:
+                if isinstance(reply, RedisProtocolError):
+                    connection.close()
+                    raise reply
+            return connection
+
+    def _release(self, connection: "_RespConnection"):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+
+class _RespConnection:
+    """A single socket speaking RESP2."""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.sock.makefile('rb')
+
+    def execute(self, commands: Iterable[List[str]]) -> List[Any]:
+        commands = list(commands)
+        payload = bytearray()
+        for command in commands:
+            payload += b'*%d\r\n' % len(command)
+            for arg in command:
+                data = arg.encode('utf-8') if isinstance(arg, str) else arg
+                payload += b'$%d\r\n%s\r\n' % (len(data), data)
+        self.sock.sendall(payload)
+        return [self._read_reply() for _ in commands]
+
+    def _read_reply(self) -> Any:
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Cache server closed the connection")
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode('utf-8')
+        if kind == b'-':
+            return RedisProtocolError(body.decode('utf-8'))
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length == -1:
+                return None
+            data = self.reader.read(length + 2)[:-2]
+            return data.decode('utf-8')
+        if kind == b'*':
+            length = int(body)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisProtocolError(f"Unexpected reply from cache server: {line!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def create_cache_backend(backend_type: Optional[str], url: Optional[str], key_prefix: str,
+                         ttl_seconds: Optional[float]) -> Optional[CacheBackend]:
+    """Build the configured shared cache backend, or None if it is disabled."""
+    backend_type = (backend_type or 'none').lower()
+    if backend_type == 'none':
+        return None
+    if backend_type == 'disk':
+        if not url:
+            raise ValueError("The disk cache backend needs a directory in database.cache_backend.url")
+        return DiskCacheBackend(url, key_prefix=key_prefix, ttl_seconds=ttl_seconds)
+    if backend_type == 'redis':
+        return RedisCacheBackend(url or 'redis://localhost:6379/0', key_prefix=key_prefix, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unsupported cache backend: {backend_type}")
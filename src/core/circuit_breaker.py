@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+HEALTH_EWMA_ALPHA = 0.1  # Weight of the newest lookup in the rolling hit rate and latency
+PRIOR_HIT_RATE = 0.5  # Assumed hit rate before a provider has answered anything
+MIN_HIT_RATE = 0.01  # Floor so a provider that never hits still gets a finite cost
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency until it has had time to recover.
+
+    Closed: calls go through, and failure_threshold consecutive failures open the
+    circuit. Open: calls are refused until reset_timeout seconds have passed, then
+    the circuit turns half-open. Half-open: up to half_open_max_calls probe calls go
+    through; a successful probe closes the circuit, a failed one opens it again.
+    A failure_threshold of 0 disables the breaker. clock is the monotonic time
+    source; tests pass a fake one.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = max(0, failure_threshold)
+        self.reset_timeout = max(0.0, reset_timeout)
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._times_opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(self._clock())
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through now. A granted half-open probe must be followed by a record_* call."""
+        with self._lock:
+            state = self._current_state(self._clock())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed after a successful probe")
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probes_in_flight = 0
+
+    def record_failure(self):
+        with self._lock:
+            now = self._clock()
+            state = self._current_state(now)
+            self._consecutive_failures += 1
+            if state == HALF_OPEN:
+                self._open(now)
+                logger.warning(f"Circuit for {self.name} re-opened: probe failed")
+            elif state == CLOSED and self.failure_threshold and self._consecutive_failures >= self.failure_threshold:
+                self._open(now)
+                logger.warning(f"Circuit for {self.name} opened after {self._consecutive_failures} consecutive "
+                               f"failures; retrying in {self.reset_timeout:g}s")
+
+    def release(self):
+        """Give back a half-open probe whose call ended without an outcome (e.g. it was cancelled)."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            state = self._current_state(now)
+            return {
+                'state': state,
+                'consecutive_failures': self._consecutive_failures,
+                'times_opened': self._times_opened,
+                'rejected_calls': self._rejected,
+                'retry_in_seconds': round(max(0.0, self._opened_at + self.reset_timeout - now), 3)
+                if state == OPEN else 0.0,
+            }
+
+    def _current_state(self, now: float) -> str:
+        """State at time now, moving open to half-open once the reset timeout has passed. Lock must be held."""
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    def _open(self, now: float):
+        self._state = OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self._times_opened += 1
+
+
+class ProviderHealth:
+    """Rolling hit rate and latency of one lyrics provider, for adaptive ordering.
+
+    Both are exponentially weighted averages, so the ordering follows a provider
+    that slows down or stops finding songs within a few dozen lookups.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._hits = 0
+        self._errors = 0
+        self._hit_rate = PRIOR_HIT_RATE
+        self._latency: Optional[float] = None
+
+    @property
+    def calls(self) -> int:
+        with self._lock:
+            return self._calls
+
+    def record(self, hit: bool, latency: float):
+        """Record an answered lookup: whether it produced usable lyrics, and how long it took."""
+        with self._lock:
+            self._calls += 1
+            self._hits += int(hit)
+            self._hit_rate = HEALTH_EWMA_ALPHA * float(hit) + (1 - HEALTH_EWMA_ALPHA) * self._hit_rate
+            self._record_latency(latency)
+
+    def record_error(self, latency: float):
+        """Record a failed lookup. It counts as a miss and its time (often a timeout) as latency."""
+        with self._lock:
+            self._calls += 1
+            self._errors += 1
+            self._hit_rate = (1 - HEALTH_EWMA_ALPHA) * self._hit_rate
+            self._record_latency(latency)
+
+    def expected_cost(self) -> Optional[float]:
+        """Expected seconds spent per song found: latency / hit rate. None until a lookup is recorded.
+
+        Trying providers in increasing order of this cost minimizes the expected
+        time to the first hit in a sequential search.
+        """
+        with self._lock:
+            if self._latency is None:
+                return None
+            return self._latency / max(MIN_HIT_RATE, self._hit_rate)
+
+    def stats(self) -> Dict[str, Any]:
+        cost = self.expected_cost()
+        with self._lock:
+            return {
+                'calls': self._calls,
+                'hits': self._hits,
+                'errors': self._errors,
+                'hit_rate': round(self._hit_rate, 4),
+                'avg_latency_seconds': round(self._latency, 3) if self._latency is not None else None,
+                'expected_cost_seconds': round(cost, 3) if cost is not None else None,
+            }
+
+    def _record_latency(self, latency: float):
+        self._latency = latency if self._latency is None else (
+            HEALTH_EWMA_ALPHA * latency + (1 - HEALTH_EWMA_ALPHA) * self._latency
+        )
@@ -1,7 +1,7 @@
 import yaml
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Optional, Dict, List
 
 @dataclass
 class Config:
@@ -11,16 +11,67 @@ class Config:
     llm_temperature: float = 0.2
     llm_timeout: int = 120
     llm_max_retries: int = 2
+    llm_batch_max_concurrency: int = 8  # LLM calls in flight during analyze_many
+    llm_prompt_caching: bool = False  # Send the framework as a cacheable prefix, lyrics last
+    llm_requests_per_minute: int = 0  # 0 = unlimited
+    llm_tokens_per_minute: int = 0  # 0 = unlimited
+    llm_rate_limits: Dict[str, Dict[str, int]] = field(default_factory=dict)  # Per "provider" or "provider/model"
+    llm_rate_limit_max_retries: int = 5  # Retries after a 429 when rate limits are set
+    llm_rate_limit_max_backoff: float = 60.0
+    llm_expected_output_tokens: int = 1000  # Added to the prompt estimate when budgeting tokens
+    llm_backends: List[Dict[str, Any]] = field(default_factory=list)  # Empty = the single provider/model above
+    llm_backend_failure_threshold: int = 3  # Consecutive failures before a backend cools down
+    llm_backend_cooldown: float = 30.0
+    llm_cache_by_backend: bool = False  # Key cached analyses by the backend set as well as the framework
+    llm_json_mode: bool = True  # Ask providers that support it for JSON-only output
+    llm_json_repair_attempts: int = 1  # Cheap calls to fix malformed or off-schema output; 0 = fail right away
     openai_api_key: Optional[str] = None
     anthropic_api_key: Optional[str] = None
     ollama_base_url: str = "http://localhost:11434"
     
     # Database
     database_url: str = "sqlite:///data/lyrics_system.db"
+    db_write_behind_enabled: bool = False
+    db_write_behind_max_rows: int = 500
+    db_write_behind_interval: float = 5.0
+    db_memory_cache_enabled: bool = False
+    db_memory_cache_max_bytes: int = 67108864
+    db_memory_cache_ttl: float = 3600.0
+    db_cache_backend: str = "none"  # none, disk or redis
+    db_cache_backend_url: Optional[str] = None
+    db_cache_backend_prefix: str = "lyricmind:"
+    db_cache_backend_ttl: Optional[float] = None
+    db_fuzzy_match_enabled: bool = False  # Match misspelled songs to cached ones with an in-memory trigram index
+    db_fuzzy_match_threshold: float = 0.8  # Minimum trigram similarity (0-1) of the canonical artist:title
+    db_performance_profile: bool = False
+    db_journal_mode: str = "WAL"
+    db_synchronous: str = "NORMAL"
+    db_mmap_size: int = 268435456  # bytes
+    db_cache_size: int = -65536  # negative = KiB, per SQLite's cache_size pragma
+    db_busy_timeout_ms: int = 5000
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
     
     # Providers
     genius_token: Optional[str] = None
     musixmatch_api_key: Optional[str] = None
+    discovery_mode: str = "sequential"  # sequential or concurrent
+    discovery_max_workers: int = 4
+    batch_max_workers: int = 8
+    provider_concurrency: Dict[str, int] = field(default_factory=dict)  # e.g. {"musixmatch": 2}
+    provider_http_pool_connections: int = 10  # Hosts with a kept-alive connection pool
+    provider_http_pool_maxsize: int = 10  # Connections kept per host
+    provider_http_timeout: float = 10.0
+    provider_http_max_retries: int = 0  # Retries on connection errors only
+    async_max_connections: int = 100  # HTTP connection pool size for AsyncLyricsDiscovery
+    async_batch_concurrency: int = 100  # Songs searched at once by AsyncLyricsDiscovery.asearch_many
+    provider_negative_cache_ttl: float = 86400.0  # How long a provider's "not found" is trusted; 0 = off
+    provider_circuit_failure_threshold: int = 5  # Consecutive provider errors that open its circuit; 0 = off
+    provider_circuit_reset_timeout: float = 30.0  # Seconds an open circuit waits before a half-open probe
+    provider_circuit_half_open_max_calls: int = 1  # Probe calls let through while half-open
+    provider_ordering: str = "static"  # static (configured preference) or adaptive (rolling hit rate and latency)
+    provider_ordering_min_samples: int = 20  # Lookups per provider before adaptive ordering re-ranks it
     
     # Framework
     framework_directory: str = "frameworks"
@@ -30,6 +81,13 @@ class Config:
     api_host: str = "0.0.0.0"
     api_port: int = 5001
     api_debug: bool = False
+    api_max_batch_size: int = 1000
+    
+    # Background analysis jobs
+    job_max_workers: int = 4
+    job_max_pending: int = 100  # Queued + running jobs in the database, across all processes
+    job_max_wait: float = 30.0  # Longest long-poll on GET /api/jobs/<id>
+    job_stale_after: float = 600.0  # Running jobs older than this are re-queued on startup
     
     # Logging
     log_level: str = "INFO"
@@ -61,12 +119,27 @@ class Config:
         
         # LLM settings
         llm = data.get('llm', {})
+        rate_limit_config = llm.get('rate_limit') or {}
         config_dict.update({
             'llm_provider': llm.get('provider', cls.llm_provider),
             'llm_model': llm.get('model', cls.llm_model),
             'llm_temperature': llm.get('temperature', cls.llm_temperature),
             'llm_timeout': llm.get('timeout_seconds', cls.llm_timeout),
             'llm_max_retries': llm.get('max_retries', cls.llm_max_retries),
+            'llm_batch_max_concurrency': llm.get('batch_max_concurrency', cls.llm_batch_max_concurrency),
+            'llm_prompt_caching': llm.get('prompt_caching', cls.llm_prompt_caching),
+            'llm_requests_per_minute': rate_limit_config.get('requests_per_minute', cls.llm_requests_per_minute),
+            'llm_tokens_per_minute': rate_limit_config.get('tokens_per_minute', cls.llm_tokens_per_minute),
+            'llm_rate_limits': rate_limit_config.get('models') or {},
+            'llm_rate_limit_max_retries': rate_limit_config.get('max_retries', cls.llm_rate_limit_max_retries),
+            'llm_rate_limit_max_backoff': rate_limit_config.get('max_backoff_seconds', cls.llm_rate_limit_max_backoff),
+            'llm_expected_output_tokens': rate_limit_config.get('expected_output_tokens', cls.llm_expected_output_tokens),
+            'llm_backends': llm.get('backends') or [],
+            'llm_backend_failure_threshold': llm.get('backend_failure_threshold', cls.llm_backend_failure_threshold),
+            'llm_backend_cooldown': llm.get('backend_cooldown_seconds', cls.llm_backend_cooldown),
+            'llm_cache_by_backend': llm.get('cache_by_backend', cls.llm_cache_by_backend),
+            'llm_json_mode': llm.get('json_mode', cls.llm_json_mode),
+            'llm_json_repair_attempts': llm.get('json_repair_attempts', cls.llm_json_repair_attempts),
             'openai_api_key': llm.get('openai_api_key', cls.openai_api_key),
             'anthropic_api_key': llm.get('anthropic_api_key', cls.anthropic_api_key),
             'ollama_base_url': llm.get('ollama_base_url', cls.ollama_base_url),
@@ -78,16 +151,66 @@ class Config:
         framework_config = data.get('framework', {})
         api_config = data.get('api', {})
         logging_config = data.get('logging', {})
+        jobs_config = data.get('jobs') or {}
+        write_behind_config = db_config.get('write_behind') or {}
+        performance_config = db_config.get('performance_profile') or {}
+        memory_cache_config = db_config.get('memory_cache') or {}
+        cache_backend_config = db_config.get('cache_backend') or {}
+        fuzzy_match_config = db_config.get('fuzzy_match') or {}
+        provider_http_config = providers_config.get('http') or {}
+        circuit_breaker_config = providers_config.get('circuit_breaker') or {}
 
         config_dict.update({
             'database_url': db_config.get('url', cls.database_url),
+            'db_write_behind_enabled': write_behind_config.get('enabled', cls.db_write_behind_enabled),
+            'db_write_behind_max_rows': write_behind_config.get('max_rows', cls.db_write_behind_max_rows),
+            'db_write_behind_interval': write_behind_config.get('flush_interval_seconds', cls.db_write_behind_interval),
+            'db_memory_cache_enabled': memory_cache_config.get('enabled', cls.db_memory_cache_enabled),
+            'db_memory_cache_max_bytes': memory_cache_config.get('max_bytes', cls.db_memory_cache_max_bytes),
+            'db_memory_cache_ttl': memory_cache_config.get('ttl_seconds', cls.db_memory_cache_ttl),
+            'db_cache_backend': cache_backend_config.get('type', cls.db_cache_backend),
+            'db_cache_backend_url': cache_backend_config.get('url', cls.db_cache_backend_url),
+            'db_cache_backend_prefix': cache_backend_config.get('key_prefix', cls.db_cache_backend_prefix),
+            'db_cache_backend_ttl': cache_backend_config.get('ttl_seconds', cls.db_cache_backend_ttl),
+            'db_fuzzy_match_enabled': fuzzy_match_config.get('enabled', cls.db_fuzzy_match_enabled),
+            'db_fuzzy_match_threshold': fuzzy_match_config.get('threshold', cls.db_fuzzy_match_threshold),
+            'db_performance_profile': performance_config.get('enabled', cls.db_performance_profile),
+            'db_journal_mode': performance_config.get('journal_mode', cls.db_journal_mode),
+            'db_synchronous': performance_config.get('synchronous', cls.db_synchronous),
+            'db_mmap_size': performance_config.get('mmap_size', cls.db_mmap_size),
+            'db_cache_size': performance_config.get('cache_size', cls.db_cache_size),
+            'db_busy_timeout_ms': performance_config.get('busy_timeout_ms', cls.db_busy_timeout_ms),
+            'db_pool_size': performance_config.get('pool_size', cls.db_pool_size),
+            'db_max_overflow': performance_config.get('max_overflow', cls.db_max_overflow),
+            'db_pool_timeout': performance_config.get('pool_timeout_seconds', cls.db_pool_timeout),
             'genius_token': providers_config.get('genius_token', cls.genius_token),
             'musixmatch_api_key': providers_config.get('musixmatch_api_key', cls.musixmatch_api_key),
+            'discovery_mode': providers_config.get('search_mode', cls.discovery_mode),
+            'discovery_max_workers': providers_config.get('max_workers', cls.discovery_max_workers),
+            'batch_max_workers': providers_config.get('batch_max_workers', cls.batch_max_workers),
+            'provider_concurrency': providers_config.get('concurrency_limits') or {},
+            'provider_http_pool_connections': provider_http_config.get('pool_connections', cls.provider_http_pool_connections),
+            'provider_http_pool_maxsize': provider_http_config.get('pool_maxsize', cls.provider_http_pool_maxsize),
+            'provider_http_timeout': provider_http_config.get('timeout_seconds', cls.provider_http_timeout),
+            'provider_http_max_retries': provider_http_config.get('max_retries', cls.provider_http_max_retries),
+            'async_max_connections': providers_config.get('async_max_connections', cls.async_max_connections),
+            'async_batch_concurrency': providers_config.get('async_batch_concurrency', cls.async_batch_concurrency),
+            'provider_negative_cache_ttl': providers_config.get('negative_cache_ttl_seconds', cls.provider_negative_cache_ttl),
+            'provider_circuit_failure_threshold': circuit_breaker_config.get('failure_threshold', cls.provider_circuit_failure_threshold),
+            'provider_circuit_reset_timeout': circuit_breaker_config.get('reset_timeout_seconds', cls.provider_circuit_reset_timeout),
+            'provider_circuit_half_open_max_calls': circuit_breaker_config.get('half_open_max_calls', cls.provider_circuit_half_open_max_calls),
+            'provider_ordering': providers_config.get('ordering', cls.provider_ordering),
+            'provider_ordering_min_samples': providers_config.get('ordering_min_samples', cls.provider_ordering_min_samples),
             'framework_directory': framework_config.get('directory', cls.framework_directory),
             'default_framework': framework_config.get('default', cls.default_framework),
             'api_host': api_config.get('host', cls.api_host),
             'api_port': api_config.get('port', cls.api_port),
             'api_debug': api_config.get('debug', cls.api_debug),
+            'api_max_batch_size': api_config.get('max_batch_size', cls.api_max_batch_size),
+            'job_max_workers': jobs_config.get('max_workers', cls.job_max_workers),
+            'job_max_pending': jobs_config.get('max_pending', cls.job_max_pending),
+            'job_max_wait': jobs_config.get('max_wait_seconds', cls.job_max_wait),
+            'job_stale_after': jobs_config.get('stale_after_seconds', cls.job_stale_after),
             'log_level': logging_config.get('level', cls.log_level),
             'log_file': logging_config.get('log_file', cls.log_file),
         })
@@ -1,14 +1,27 @@
 from sqlalchemy import (
-    Column, String, Text, DateTime, Integer, create_engine
+    Boolean, Column, String, Text, DateTime, Integer, Index, create_engine,
+    event, func, inspect, text
 )
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+import atexit
+import copy
 import hashlib
 import json
 import logging
 import os
+import threading
+import uuid
+
+from src.core.cache_backends import CacheBackend, create_cache_backend
+from src.core.config import Config
+from src.core.memory_cache import MemoryCache
+from src.core.normalization import TrigramIndex, canonical_song_key
+from src.core.write_buffer import WriteBehindBuffer
 
 
 logger = logging.getLogger(__name__)
@@ -16,6 +29,22 @@ logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Max number of keys per IN (...) clause in bulk lookups. Keeps queries well
+# under SQLite's bound-parameter limit.
+BULK_QUERY_CHUNK_SIZE = 500
+
+# Lyrics metadata field holding each provider's own track ID
+PROVIDER_ID_FIELDS = {'musixmatch': 'musixmatch_id', 'genius': 'genius_id'}
+
+
+class LyricsBlob(Base):
+    """Lyrics text, stored once per distinct content and keyed by the hash of its normalized form."""
+    __tablename__ = 'lyrics_blobs'
+
+    lyrics_hash = Column(String(64), primary_key=True)
+    lyrics = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 
 class CachedLyrics(Base):
     __tablename__ = 'cached_lyrics'
@@ -24,7 +53,7 @@ class CachedLyrics(Base):
     search_key = Column(String(64), unique=True, nullable=False, index=True)
     artist = Column(String(255), nullable=False)
     title = Column(String(255), nullable=False)
-    lyrics = Column(Text, nullable=False)
+    lyrics_hash = Column(String(64), nullable=False, index=True)  # lyrics_blobs key; also cached_analysis.content_hash
     source = Column(String(50), nullable=False)
     lyric_metadata = Column(Text)  # JSON string for flexible metadata
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -32,17 +61,86 @@ class CachedLyrics(Base):
 
 class CachedAnalysis(Base):
     __tablename__ = 'cached_analysis'
+    __table_args__ = (
+        # One row per lookup key; also serves every cache lookup with a single probe
+        Index(
+            'uq_cached_analysis_lookup',
+            'content_hash', 'framework', 'framework_version', unique=True
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
-    content_hash = Column(String(64), nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False)  # Hash of the normalized lyrics
     framework = Column(String(50), nullable=False)
     framework_version = Column(String(20), nullable=False)
     result = Column(Text, nullable=False)  # JSON string
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class AnalysisJob(Base):
+    __tablename__ = 'analysis_jobs'
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String(20), nullable=False, index=True)  # queued, running, completed, failed
+    artist = Column(String(255), nullable=False)
+    title = Column(String(255), nullable=False)
+    framework = Column(String(50))
+    frameworks = Column(Text)  # JSON list, for combined multi-framework jobs
+    profile = Column(String(20), nullable=False, default='full', server_default='full')  # full or scores
+    force_refresh = Column(Boolean, nullable=False, default=False)
+    result = Column(Text)  # JSON string
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+
+class ProviderTrackId(Base):
+    """A provider's track ID for a song, so refreshes can fetch lyrics without searching."""
+    __tablename__ = 'provider_track_ids'
+    __table_args__ = (
+        Index('uq_provider_track_ids_lookup', 'search_key', 'provider', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    search_key = Column(String(64), nullable=False)
+    provider = Column(String(50), nullable=False)
+    track_id = Column(String(64), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class NegativeLookup(Base):
+    """A provider answered that it has no usable lyrics for a song."""
+    __tablename__ = 'negative_lookups'
+    __table_args__ = (
+        Index('uq_negative_lookups_lookup', 'search_key', 'provider', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    search_key = Column(String(64), nullable=False)
+    provider = Column(String(50), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class SongAlias(Base):
+    """Points the search key of a song variant (e.g. a misspelling) at the cached song it means."""
+    __tablename__ = 'song_aliases'
+
+    id = Column(Integer, primary_key=True)
+    alias_key = Column(String(64), unique=True, nullable=False, index=True)
+    search_key = Column(String(64), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SchemaMigration(Base):
+    __tablename__ = 'schema_migrations'
+
+    name = Column(String(100), primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Database:
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, config: Optional[Config] = None):
         # Ensure the database URL is correctly resolved if it's relative
         if database_url.startswith('sqlite:///'):
             db_path_part = database_url[len('sqlite:///'):]
@@ -59,145 +157,1002 @@ class Database:
                 database_url = f'sqlite:///{absolute_db_path}'
                 logger.info(f"Resolved database URL to: {database_url}")
 
-        self.engine = create_engine(database_url)
+        config = config or Config()
+        self.negative_cache_ttl = config.provider_negative_cache_ttl
+        self.fuzzy_match_enabled = config.db_fuzzy_match_enabled
+        self.fuzzy_match_threshold = config.db_fuzzy_match_threshold
+        # Built from cached_lyrics on the first fuzzy lookup
+        self._fuzzy_index: Optional[TrigramIndex] = None
+        self._fuzzy_index_lock = threading.Lock()
+        self._fuzzy_stats = {'lookups': 0, 'hits': 0}
+        self.engine = self._create_engine(database_url, config)
         self.SessionLocal = sessionmaker(
             autocommit=False, autoflush=False, bind=self.engine
         )
         Base.metadata.create_all(self.engine)
+        self._run_migrations()
+
+        self.memory_cache: Optional[MemoryCache] = None
+        if config.db_memory_cache_enabled:
+            self.memory_cache = MemoryCache(
+                max_bytes=config.db_memory_cache_max_bytes,
+                ttl_seconds=config.db_memory_cache_ttl,
+            )
+            logger.info(
+                f"In-memory cache tier enabled (max_bytes="
+                f"{config.db_memory_cache_max_bytes}, ttl="
+                f"{config.db_memory_cache_ttl}s)"
+            )
+
+        self.shared_cache: Optional[CacheBackend] = create_cache_backend(
+            config.db_cache_backend,
+            self._resolve_cache_backend_url(config),
+            key_prefix=config.db_cache_backend_prefix,
+            ttl_seconds=config.db_cache_backend_ttl,
+        )
+        if self.shared_cache:
+            logger.info(f"Shared cache backend enabled: {self.shared_cache.name}")
+
+        self.write_buffer: Optional[WriteBehindBuffer] = None
+        if config.db_write_behind_enabled:
+            self.write_buffer = WriteBehindBuffer(
+                self._write_rows,
+                max_rows=config.db_write_behind_max_rows,
+                flush_interval=config.db_write_behind_interval,
+            )
+            # Don't lose buffered rows when the process exits normally
+            atexit.register(self.flush)
+            logger.info(
+                f"Write-behind cache buffer enabled (max_rows="
+                f"{config.db_write_behind_max_rows}, interval="
+                f"{config.db_write_behind_interval}s)"
+            )
+
+    def _create_engine(self, database_url: str, config: Config) -> Engine:
+        """Create the engine, applying the performance profile if enabled."""
+        if not config.db_performance_profile:
+            return create_engine(database_url)
+
+        url = make_url(database_url)
+        is_sqlite = url.get_backend_name() == 'sqlite'
+        engine_kwargs: Dict[str, Any] = {'pool_pre_ping': True}
+        # In-memory SQLite uses a single shared connection, so pool sizing doesn't apply
+        if not (is_sqlite and url.database in (None, '', ':memory:')):
+            engine_kwargs.update(
+                pool_size=config.db_pool_size,
+                max_overflow=config.db_max_overflow,
+                pool_timeout=config.db_pool_timeout,
+            )
+        if is_sqlite:
+            engine_kwargs['connect_args'] = {
+                'timeout': config.db_busy_timeout_ms / 1000.0
+            }
+
+        engine = create_engine(database_url, **engine_kwargs)
+
+        if is_sqlite:
+            pragmas = [
+                f"PRAGMA journal_mode={config.db_journal_mode}",
+                f"PRAGMA synchronous={config.db_synchronous}",
+                f"PRAGMA mmap_size={int(config.db_mmap_size)}",
+                f"PRAGMA cache_size={int(config.db_cache_size)}",
+                f"PRAGMA busy_timeout={int(config.db_busy_timeout_ms)}",
+                "PRAGMA temp_store=MEMORY",
+            ]
+
+            @event.listens_for(engine, "connect")
+            def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                try:
+                    for pragma in pragmas:
+                        cursor.execute(pragma)
+                finally:
+                    cursor.close()
+
+        logger.info(
+            f"Database performance profile enabled (pool_size="
+            f"{config.db_pool_size}, max_overflow={config.db_max_overflow}"
+            + (f", journal_mode={config.db_journal_mode}, synchronous="
+               f"{config.db_synchronous}" if is_sqlite else "") + ")"
+        )
+        return engine
 
     def get_session(self) -> Session:
         return self.SessionLocal()
 
+    @staticmethod
+    def _resolve_cache_backend_url(config: Config) -> Optional[str]:
+        """Resolve a relative disk cache directory against the project root."""
+        url = config.db_cache_backend_url
+        if (config.db_cache_backend or '').lower() == 'disk' and url and not os.path.isabs(url):
+            project_root = os.path.abspath(
+                os.path.join(os.path.dirname(__file__), '..', '..')
+            )
+            url = os.path.join(project_root, url)
+        return url
+
+    def get_pool_status(self) -> Dict[str, Any]:
+        """Report connection pool usage, for health checks."""
+        pool = self.engine.pool
+        status: Dict[str, Any] = {'pool_class': type(pool).__name__}
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(pool, name, None)
+            if callable(method):
+                status[name] = method()
+        return status
+
+    def _run_migrations(self):
+        """Apply schema changes to existing databases that create_all can't make.
+
+        Each migration runs once, in its own transaction, and is recorded in
+        schema_migrations. Fresh databases already have the final schema, so
+        migrations must be safe to run against it too.
+        """
+        migrations = [
+            ('0001_cached_analysis_unique_lookup', self._migrate_cached_analysis_unique_lookup),
+            ('0002_analysis_jobs_frameworks', self._migrate_analysis_jobs_frameworks),
+            ('0003_analysis_jobs_profile', self._migrate_analysis_jobs_profile),
+            ('0004_provider_track_ids_backfill', self._migrate_provider_track_ids_backfill),
+            ('0005_canonical_search_keys', self._migrate_canonical_search_keys),
+            ('0006_lyrics_blobs', self._migrate_lyrics_blobs),
+        ]
+        session = self.get_session()
+        try:
+            applied = {row.name for row in session.query(SchemaMigration.name)}
+        finally:
+            session.close()
+
+        for name, migrate in migrations:
+            if name in applied:
+                continue
+            logger.info(f"Applying database migration {name}")
+            try:
+                with self.engine.begin() as conn:
+                    migrate(conn)
+                    conn.execute(
+                        SchemaMigration.__table__.insert().values(
+                            name=name, applied_at=datetime.utcnow()
+                        )
+                    )
+            except IntegrityError:
+                # Another process applied it at the same time
+                logger.info(f"Database migration {name} was already applied")
+
+    def _migrate_cached_analysis_unique_lookup(self, conn):
+        """De-duplicate cached_analysis and enforce one row per lookup key."""
+        # Keep the most recently written row of each duplicate group
+        deleted = conn.execute(text("""
+            DELETE FROM cached_analysis WHERE id IN (
+                SELECT older.id FROM cached_analysis older
+                JOIN cached_analysis newer
+                  ON older.content_hash = newer.content_hash
+                 AND older.framework = newer.framework
+                 AND older.framework_version = newer.framework_version
+                 AND (COALESCE(older.created_at, '1970-01-01') < COALESCE(newer.created_at, '1970-01-01')
+                      OR (COALESCE(older.created_at, '1970-01-01') = COALESCE(newer.created_at, '1970-01-01')
+                          AND older.id < newer.id))
+            )
+        """)).rowcount
+        if deleted:
+            logger.info(f"Removed {deleted} duplicate cached_analysis rows")
+        for index in CachedAnalysis.__table__.indexes:
+            index.create(conn, checkfirst=True)
+        # Superseded by the composite index, which leads with content_hash
+        conn.execute(text("DROP INDEX IF EXISTS ix_cached_analysis_content_hash"))
+
+    def _migrate_analysis_jobs_frameworks(self, conn):
+        """Add the frameworks column to analysis_jobs tables created before it existed."""
+        columns = {column['name'] for column in inspect(conn).get_columns('analysis_jobs')}
+        if 'frameworks' not in columns:
+            conn.execute(text("ALTER TABLE analysis_jobs ADD COLUMN frameworks TEXT"))
+
+    def _migrate_analysis_jobs_profile(self, conn):
+        """Add the analysis profile column to analysis_jobs tables created before it existed."""
+        columns = {column['name'] for column in inspect(conn).get_columns('analysis_jobs')}
+        if 'profile' not in columns:
+            conn.execute(text("ALTER TABLE analysis_jobs ADD COLUMN profile VARCHAR(20) NOT NULL DEFAULT 'full'"))
+
+    def _migrate_provider_track_ids_backfill(self, conn):
+        """Seed provider_track_ids from the provider IDs already kept in cached lyrics metadata."""
+        existing = {
+            (row.search_key, row.provider)
+            for row in conn.execute(text("SELECT search_key, provider FROM provider_track_ids"))
+        }
+        rows = {}
+        for row in conn.execute(text(
+            "SELECT search_key, lyric_metadata FROM cached_lyrics WHERE lyric_metadata IS NOT NULL"
+        )):
+            try:
+                metadata = json.loads(row.lyric_metadata)
+            except (TypeError, ValueError):
+                continue
+            if not isinstance(metadata, dict):
+                continue
+            for track_row in self._track_id_rows(row.search_key, metadata):
+                key = (track_row['search_key'], track_row['provider'])
+                if key not in existing:
+                    rows[key] = track_row
+        for chunk in self._chunked(list(rows.values())):
+            conn.execute(ProviderTrackId.__table__.insert(), chunk)
+        if rows:
+            logger.info(f"Backfilled {len(rows)} provider track IDs from cached lyrics")
+
+    def _migrate_canonical_search_keys(self, conn):
+        """Re-key cached songs from lowercased artist/title keys to canonical ones.
+
+        Lyrics rows whose variants now share a key are merged, keeping the newest.
+        Track IDs follow their song. Negative lookups store no artist/title to
+        re-key from, so those without a cached song are dropped and re-learned.
+        """
+        new_keys = {
+            row.search_key: self._generate_search_key(row.artist, row.title)
+            for row in conn.execute(text("SELECT search_key, artist, title FROM cached_lyrics"))
+        }
+        for table, columns in (
+            ('cached_lyrics', ()),
+            ('provider_track_ids', ('provider',)),
+            ('negative_lookups', ('provider',)),
+        ):
+            dropped, moved = self._rekey_table(conn, table, new_keys, columns)
+            if dropped or moved:
+                logger.info(f"Re-keyed {moved} {table} rows to canonical search keys, dropped {dropped}")
+
+    def _rekey_table(self, conn, table: str, new_keys: Dict[str, str], columns: Tuple[str, ...]) -> Tuple[int, int]:
+        """Move a table's rows to new search keys, keeping the newest row per (search_key, *columns).
+
+        Rows whose key has no new key are dropped. Returns (dropped, moved).
+        """
+        extra = ''.join(f", {column}" for column in columns)
+        keep: Dict[Tuple[Any, ...], Any] = {}
+        dropped: List[int] = []
+        for row in conn.execute(text(f"SELECT id, search_key, created_at{extra} FROM {table}")):
+            new_key = new_keys.get(row.search_key)
+            if new_key is None:
+                dropped.append(row.id)
+                continue
+            unique = (new_key,) + tuple(getattr(row, column) for column in columns)
+            current = keep.get(unique)
+            if current is None or (str(row.created_at or ''), row.id) > (str(current.created_at or ''), current.id):
+                if current is not None:
+                    dropped.append(current.id)
+                keep[unique] = row
+            else:
+                dropped.append(row.id)
+        for chunk in self._chunked(dropped):
+            conn.execute(text(f"DELETE FROM {table} WHERE id IN ({', '.join(str(int(i)) for i in chunk)})"))
+
+        moved = [
+            {'id': row.id, 'search_key': unique[0]}
+            for unique, row in keep.items() if row.search_key != unique[0]
+        ]
+        if moved:
+            # Park moved rows on unique placeholder keys first, so no update collides with a key still in use
+            conn.execute(
+                text(f"UPDATE {table} SET search_key = :placeholder WHERE id = :id"),
+                [{'id': row['id'], 'placeholder': f"rekey:{row['id']}"} for row in moved]
+            )
+            conn.execute(text(f"UPDATE {table} SET search_key = :search_key WHERE id = :id"), moved)
+        return len(dropped), len(moved)
+
+    def _migrate_lyrics_blobs(self, conn):
+        """Move cached lyrics text into lyrics_blobs and key cached analyses by lyrics hash.
+
+        Analyses used to be keyed by a hash of lyrics, framework and version. Those
+        of lyrics in the cache are re-keyed; the rest can't be looked up any more
+        and are moved to cached_analysis_legacy rather than deleted.
+        """
+        columns = {column['name'] for column in inspect(conn).get_columns('cached_lyrics')}
+        if 'lyrics' not in columns:
+            return
+        if 'lyrics_hash' not in columns:
+            conn.execute(text("ALTER TABLE cached_lyrics ADD COLUMN lyrics_hash VARCHAR(64)"))
+
+        blobs: Dict[str, Dict[str, Any]] = {}
+        updates = []
+        for row in conn.execute(text("SELECT id, lyrics, created_at FROM cached_lyrics")):
+            normalized = self._normalize_lyrics(row.lyrics)
+            lyrics_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+            blobs.setdefault(lyrics_hash, {
+                'lyrics_hash': lyrics_hash, 'lyrics': row.lyrics,
+                'created_at': row.created_at, 'normalized': normalized,
+            })
+            updates.append({'id': row.id, 'lyrics_hash': lyrics_hash})
+        existing = {row.lyrics_hash for row in conn.execute(text("SELECT lyrics_hash FROM lyrics_blobs"))}
+        for chunk in self._chunked([blob for blob in blobs.values() if blob['lyrics_hash'] not in existing]):
+            conn.execute(text(
+                "INSERT INTO lyrics_blobs (lyrics_hash, lyrics, created_at) VALUES (:lyrics_hash, :lyrics, :created_at)"
+            ), [{key: blob[key] for key in ('lyrics_hash', 'lyrics', 'created_at')} for blob in chunk])
+        for chunk in self._chunked(updates):
+            conn.execute(text("UPDATE cached_lyrics SET lyrics_hash = :lyrics_hash WHERE id = :id"), chunk)
+        if self._can_drop_column(conn):
+            conn.execute(text("ALTER TABLE cached_lyrics DROP COLUMN lyrics"))
+        else:
+            self._rebuild_cached_lyrics(conn)
+        for index in CachedLyrics.__table__.indexes:
+            index.create(conn, checkfirst=True)
+        logger.info(f"Moved {len(updates)} cached lyrics into {len(blobs)} lyrics blobs")
+
+        lookups = conn.execute(text("SELECT DISTINCT framework, framework_version FROM cached_analysis")).fetchall()
+        old_hashes = {
+            hashlib.sha256(f"{blob['normalized']}:{framework}:{version}".encode('utf-8')).hexdigest(): lyrics_hash
+            for lyrics_hash, blob in blobs.items()
+            for framework, version in lookups
+        }
+        moved, orphaned = [], []
+        for row in conn.execute(text("SELECT id, content_hash FROM cached_analysis")):
+            if row.content_hash in old_hashes:
+                moved.append({'id': row.id, 'content_hash': old_hashes[row.content_hash]})
+            else:
+                orphaned.append(row.id)
+        for chunk in self._chunked(moved):
+            conn.execute(text("UPDATE cached_analysis SET content_hash = :content_hash WHERE id = :id"), chunk)
+        if orphaned:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS cached_analysis_legacy AS SELECT * FROM cached_analysis WHERE 1 = 0"
+            ))
+        for chunk in self._chunked(orphaned):
+            ids = ', '.join(str(int(i)) for i in chunk)
+            conn.execute(text(f"INSERT INTO cached_analysis_legacy SELECT * FROM cached_analysis WHERE id IN ({ids})"))
+            conn.execute(text(f"DELETE FROM cached_analysis WHERE id IN ({ids})"))
+        if moved or orphaned:
+            logger.info(
+                f"Re-keyed {len(moved)} cached analyses by lyrics hash; moved {len(orphaned)} "
+                f"of uncached lyrics to cached_analysis_legacy"
+            )
+
+    @staticmethod
+    def _can_drop_column(conn) -> bool:
+        """ALTER TABLE ... DROP COLUMN needs SQLite 3.35 or later."""
+        return conn.dialect.name != 'sqlite' or conn.dialect.server_version_info >= (3, 35)
+
+    def _rebuild_cached_lyrics(self, conn):
+        """Recreate cached_lyrics with the model's columns, for databases that can't drop a column."""
+        # Free the index names for the new table; nothing references cached_lyrics by foreign key
+        for index in inspect(conn).get_indexes('cached_lyrics'):
+            conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+        conn.execute(text("ALTER TABLE cached_lyrics RENAME TO cached_lyrics_old"))
+        CachedLyrics.__table__.create(conn)
+        columns = ', '.join(column.name for column in CachedLyrics.__table__.columns)
+        conn.execute(text(f"INSERT INTO cached_lyrics ({columns}) SELECT {columns} FROM cached_lyrics_old"))
+        conn.execute(text("DROP TABLE cached_lyrics_old"))
+
     def get_cached_lyrics(
         self, artist: str, title: str
     ) -> Optional[Dict[str, Any]]:
         """Get cached lyrics by artist and title."""
         search_key = self._generate_search_key(artist, title)
+        recalled = self._recall('lyrics', [search_key])
+        if recalled:
+            return dict(recalled[search_key])
 
         session = self.get_session()
         try:
-            cached = session.query(CachedLyrics).filter_by(
-                search_key=search_key
+            cached = self._lyrics_query(session).filter(
+                CachedLyrics.search_key == search_key
             ).first()
             if cached:
-                lyric_metadata_dict = json.loads(cached.lyric_metadata) if cached.lyric_metadata else {}
-                return {
-                    'artist': cached.artist,
-                    'title': cached.title,
-                    'lyrics': cached.lyrics,
-                    'source': cached.source,
-                    **lyric_metadata_dict
-                }
-            return None
+                row = dict(cached._mapping)
+                entry = self._lyrics_row_to_dict(row)
+                self._remember('lyrics', [self._lyrics_tier_item(row, entry)])
+                return dict(entry)
+        finally:
+            session.close()
+        return self._get_variant_lyrics({search_key: [(artist, title)]}).get((artist, title))
+
+    def get_cached_lyrics_many(
+        self, songs: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Get cached lyrics for many (artist, title) pairs.
+
+        Keys are resolved with chunked IN queries on search_key in a single
+        session. Returns a dict keyed by the input pair; songs without a
+        cache entry are left out.
+        """
+        songs_by_key: Dict[str, List[Tuple[str, str]]] = {}
+        for artist, title in songs:
+            search_key = self._generate_search_key(artist, title)
+            songs_by_key.setdefault(search_key, []).append((artist, title))
+        if not songs_by_key:
+            return {}
+
+        results = {}
+        for search_key, entry in self._get_lyrics_by_keys(list(songs_by_key)).items():
+            for song in songs_by_key.pop(search_key):
+                results[song] = dict(entry)
+        if songs_by_key:
+            results.update(self._get_variant_lyrics(songs_by_key))
+        return results
+
+    def _get_lyrics_by_keys(self, search_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Cached lyrics entries by search key, from the cache tiers and then chunked SQL queries."""
+        found = self._recall('lyrics', search_keys)
+        remaining = [search_key for search_key in search_keys if search_key not in found]
+        if not remaining:
+            return found
+
+        session = self.get_session()
+        try:
+            for chunk in self._chunked(remaining):
+                rows = self._lyrics_query(session).filter(
+                    CachedLyrics.search_key.in_(chunk)
+                ).all()
+                tier_items = []
+                for cached in rows:
+                    row = dict(cached._mapping)
+                    entry = self._lyrics_row_to_dict(row)
+                    tier_items.append(self._lyrics_tier_item(row, entry))
+                    found[row['search_key']] = entry
+                self._remember('lyrics', tier_items)
+            return found
         finally:
             session.close()
 
+    def _get_variant_lyrics(
+        self, songs_by_key: Dict[str, List[Tuple[str, str]]]
+    ) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Resolve cache misses through the alias table, then the fuzzy index if enabled.
+
+        songs_by_key maps each missed search key to the (artist, title) pairs
+        that asked for it. Fuzzy matches are stored as aliases, so the next
+        lookup of the same variant needs no fuzzy search.
+        """
+        targets = self._get_aliases(list(songs_by_key))
+        new_aliases = []
+        if self.fuzzy_match_enabled:
+            for search_key, songs in songs_by_key.items():
+                if search_key in targets:
+                    continue
+                match = self._fuzzy_match(*songs[0])
+                if match and match != search_key:
+                    targets[search_key] = match
+                    new_aliases.append({
+                        'alias_key': search_key, 'search_key': match, 'created_at': datetime.utcnow()
+                    })
+        if not targets:
+            return {}
+
+        entries = self._get_lyrics_by_keys(list(set(targets.values())))
+        results = {}
+        for alias_key, search_key in targets.items():
+            entry = entries.get(search_key)
+            if entry is None:
+                continue
+            for song in songs_by_key[alias_key]:
+                results[song] = dict(entry)
+        alias_rows = [row for row in new_aliases if row['search_key'] in entries]
+        if alias_rows:
+            self._persist_rows({'aliases': alias_rows})
+        return results
+
+    def _get_aliases(self, alias_keys: List[str]) -> Dict[str, str]:
+        """The search keys that these alias keys point to, for those that are aliases."""
+        targets = {}
+        session = self.get_session()
+        try:
+            for chunk in self._chunked(alias_keys):
+                for row in session.query(SongAlias.alias_key, SongAlias.search_key).filter(
+                    SongAlias.alias_key.in_(chunk)
+                ):
+                    targets[row.alias_key] = row.search_key
+        finally:
+            session.close()
+        if self.write_buffer:
+            for alias_key in alias_keys:
+                pending = self.write_buffer.get('aliases', alias_key)
+                if pending:
+                    targets[alias_key] = pending['search_key']
+        return targets
+
+    def store_alias(self, artist: str, title: str, canonical_artist: str, canonical_title: str):
+        """Make lookups of one song name resolve to the cache entry of another, e.g. a known misspelling."""
+        alias_key = self._generate_search_key(artist, title)
+        search_key = self._generate_search_key(canonical_artist, canonical_title)
+        if alias_key == search_key:
+            return
+        self._persist_rows({'aliases': [
+            {'alias_key': alias_key, 'search_key': search_key, 'created_at': datetime.utcnow()}
+        ]})
+
+    def _fuzzy_match(self, artist: str, title: str) -> Optional[str]:
+        """Search key of the cached song most similar to artist/title, if any clears the threshold."""
+        match = self._get_fuzzy_index().best_match(
+            canonical_song_key(artist, title), self.fuzzy_match_threshold
+        )
+        with self._fuzzy_index_lock:
+            self._fuzzy_stats['lookups'] += 1
+            self._fuzzy_stats['hits'] += int(match is not None)
+        if match:
+            logger.info(f"Fuzzy cache match for '{artist} - {title}' (similarity {match[1]:.2f})")
+            return match[0]
+        return None
+
+    def _get_fuzzy_index(self) -> TrigramIndex:
+        """The trigram index over cached songs, built from cached_lyrics on first use."""
+        with self._fuzzy_index_lock:
+            if self._fuzzy_index is not None:
+                return self._fuzzy_index
+            index = TrigramIndex()
+            last_id = 0
+            while True:
+                session = self.get_session()
+                try:
+                    rows = session.query(
+                        CachedLyrics.id, CachedLyrics.search_key, CachedLyrics.artist, CachedLyrics.title
+                    ).filter(CachedLyrics.id > last_id).order_by(CachedLyrics.id).limit(BULK_QUERY_CHUNK_SIZE).all()
+                finally:
+                    session.close()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                for row in rows:
+                    index.add(row.search_key, canonical_song_key(row.artist, row.title))
+            if self.write_buffer:
+                for row in self.write_buffer.pending_rows('lyrics'):
+                    index.add(row['search_key'], canonical_song_key(row['artist'], row['title']))
+            logger.info(f"Built fuzzy match index over {len(index)} cached songs")
+            self._fuzzy_index = index
+            return index
+
     def store_lyrics(
         self, artist: str, title: str, lyrics: str, source: str, **metadata
-    ):
-        """Store lyrics with metadata."""
+    ) -> str:
+        """Store lyrics with metadata. Returns the lyrics hash."""
+        lyrics_hash, = self.store_lyrics_many([{
+            'artist': artist, 'title': title, 'lyrics': lyrics,
+            'source': source, **metadata
+        }])
+        logger.debug(f"Stored/Updated lyrics for {artist} - {title}")
+        return lyrics_hash
+
+    def store_lyrics_many(self, entries: List[Dict[str, Any]]) -> List[str]:
+        """Store many lyrics results in one transaction. Returns their lyrics hashes, in order.
+
+        Each entry has 'artist', 'title', 'lyrics' and 'source'; any other
+        keys are kept as metadata, matching the dicts search_lyrics returns.
+        """
+        rows = []
+        track_id_rows = []
+        for entry in entries:
+            entry = dict(entry)
+            artist = entry.pop('artist')
+            title = entry.pop('title')
+            lyrics = entry.pop('lyrics')
+            entry.pop('lyrics_hash', None)  # Always derived from the text being stored
+            search_key = self._generate_search_key(artist, title)
+            rows.append({
+                'search_key': search_key,
+                'artist': artist,
+                'title': title,
+                # Kept with the row until it is written, then stored once in lyrics_blobs
+                'lyrics': lyrics,
+                'lyrics_hash': self.hash_lyrics(lyrics),
+                'source': entry.pop('source'),
+                'lyric_metadata': json.dumps(entry) if entry else None,
+                'created_at': datetime.utcnow(),
+            })
+            track_id_rows.extend(self._track_id_rows(search_key, entry))
+        self._persist_rows({'lyrics': rows, 'track_ids': track_id_rows})
+        if self._fuzzy_index is not None:
+            for row in rows:
+                self._fuzzy_index.add(row['search_key'], canonical_song_key(row['artist'], row['title']))
+        return [row['lyrics_hash'] for row in rows]
+
+    def get_provider_track_ids(self, artist: str, title: str) -> Dict[str, str]:
+        """Return the known provider track IDs for a song, keyed by provider name."""
         search_key = self._generate_search_key(artist, title)
+        session = self.get_session()
+        try:
+            track_ids = {
+                row.provider: row.track_id
+                for row in session.query(
+                    ProviderTrackId.provider, ProviderTrackId.track_id
+                ).filter_by(search_key=search_key)
+            }
+        finally:
+            session.close()
+        if self.write_buffer:
+            for provider in PROVIDER_ID_FIELDS:
+                pending = self.write_buffer.get('track_ids', (search_key, provider))
+                if pending:
+                    track_ids[provider] = pending['track_id']
+        return track_ids
 
+    def get_negative_lookups(self, artist: str, title: str, providers: List[str]) -> List[str]:
+        """Return which of these providers reported no lyrics for a song within the negative cache TTL."""
+        if self.negative_cache_ttl <= 0 or not providers:
+            return []
+        search_key = self._generate_search_key(artist, title)
+        cutoff = datetime.utcnow() - timedelta(seconds=self.negative_cache_ttl)
         session = self.get_session()
         try:
-            existing_entry = session.query(CachedLyrics).filter_by(
-                search_key=search_key
-            ).first()
-            if existing_entry:
-                existing_entry.artist = artist
-                existing_entry.title = title
-                existing_entry.lyrics = lyrics
-                existing_entry.source = source
-                existing_entry.lyric_metadata = (
-                    json.dumps(metadata) if metadata else None
+            found = {
+                row.provider
+                for row in session.query(NegativeLookup.provider).filter(
+                    NegativeLookup.search_key == search_key,
+                    NegativeLookup.provider.in_(providers),
+                    NegativeLookup.created_at >= cutoff
                 )
-                existing_entry.created_at = datetime.utcnow()
-                session.merge(existing_entry)
-            else:
-                cached_lyrics = CachedLyrics(
-                    search_key=search_key,
-                    artist=artist,
-                    title=title,
-                    lyrics=lyrics,
-                    source=source,
-                    lyric_metadata=json.dumps(metadata) if metadata else None
-                )
-                session.add(cached_lyrics)
-            session.commit()
-            logger.debug(f"Stored/Updated lyrics for {artist} - {title}")
-        except Exception as e:
-            session.rollback()
-            logger.error(f"Error storing lyrics for {artist} - {title}: {e}")
-            raise
+            }
         finally:
             session.close()
+        if self.write_buffer:
+            for provider in providers:
+                if self.write_buffer.get('negative_lookups', (search_key, provider)):
+                    found.add(provider)
+        return sorted(found)
+
+    def store_negative_lookups(self, artist: str, title: str, providers: List[str]):
+        """Record that these providers have no lyrics for a song, restarting its TTL."""
+        if self.negative_cache_ttl <= 0 or not providers:
+            return
+        search_key = self._generate_search_key(artist, title)
+        self._persist_rows({'negative_lookups': [
+            {'search_key': search_key, 'provider': provider, 'created_at': datetime.utcnow()}
+            for provider in dict.fromkeys(providers)
+        ]})
 
     def get_cached_analysis(
         self, lyrics: str, framework: str, framework_version: str
     ) -> Optional[Dict[str, Any]]:
         """Get cached analysis result."""
-        content_hash = self._generate_content_hash(
-            lyrics, framework, framework_version
-        )
+        return self.get_cached_analysis_by_hash(self.hash_lyrics(lyrics), framework, framework_version)
+
+    def get_cached_analysis_by_hash(
+        self, lyrics_hash: str, framework: str, framework_version: str
+    ) -> Optional[Dict[str, Any]]:
+        """Get a cached analysis result by the 'lyrics_hash' of cached or discovered lyrics.
+
+        The result is a copy, so callers may modify it without changing the cache tiers.
+        """
+        key = (lyrics_hash, framework, framework_version)
+        recalled = self._recall('analysis', [key])
+        if recalled:
+            return copy.deepcopy(recalled[key])
 
         session = self.get_session()
         try:
-            cached = session.query(CachedAnalysis).filter_by(
-                content_hash=content_hash,
+            cached = session.query(
+                CachedAnalysis.result, CachedAnalysis.created_at
+            ).filter_by(
+                content_hash=lyrics_hash,
                 framework=framework,
                 framework_version=framework_version
             ).first()
             if cached:
-                return json.loads(cached.result)
+                result = json.loads(cached.result)
+                self._remember('analysis', [
+                    (key, result, len(cached.result), cached.created_at)
+                ])
+                return copy.deepcopy(result)
             return None
         finally:
             session.close()
 
+    def get_cached_analysis_many(
+        self, keys: List[Tuple[str, str, str]]
+    ) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        """Get cached analysis results for many (lyrics, framework, version) keys.
+
+        Returns a dict keyed by the input tuple; keys without a cached result
+        are left out.
+        """
+        keys_by_lookup: Dict[Tuple[str, str, str], List[Tuple[str, str, str]]] = {}
+        for lyrics, framework, framework_version in keys:
+            lookup = (self.hash_lyrics(lyrics), framework, framework_version)
+            keys_by_lookup.setdefault(lookup, []).append(
+                (lyrics, framework, framework_version)
+            )
+        results = {}
+        for lookup, result in self.get_cached_analysis_by_hash_many(list(keys_by_lookup)).items():
+            for key in keys_by_lookup[lookup]:
+                results[key] = copy.deepcopy(result)
+        return results
+
+    def get_cached_analysis_by_hash_many(
+        self, keys: List[Tuple[str, str, str]]
+    ) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        """Get cached analysis results for many (lyrics_hash, framework, version) keys.
+
+        Keys are resolved with chunked IN queries on content_hash in a single
+        session. Keys without a cached result are left out. Results are copies,
+        like get_cached_analysis_by_hash() returns.
+        """
+        remaining = set(keys)
+        if not remaining:
+            return {}
+
+        results = self._recall('analysis', list(remaining))
+        remaining -= results.keys()
+        if not remaining:
+            return {key: copy.deepcopy(result) for key, result in results.items()}
+
+        session = self.get_session()
+        try:
+            for chunk in self._chunked(list({key[0] for key in remaining})):
+                rows = session.query(
+                    CachedAnalysis.content_hash, CachedAnalysis.framework,
+                    CachedAnalysis.framework_version, CachedAnalysis.result,
+                    CachedAnalysis.created_at
+                ).filter(CachedAnalysis.content_hash.in_(chunk)).all()
+                tier_items = []
+                for cached in rows:
+                    key = self._analysis_key(cached)
+                    if key not in remaining:
+                        continue
+                    result = json.loads(cached.result)
+                    tier_items.append((key, result, len(cached.result), cached.created_at))
+                    results[key] = result
+                self._remember('analysis', tier_items)
+            return {key: copy.deepcopy(result) for key, result in results.items()}
+        finally:
+            session.close()
+
     def store_analysis(
         self, lyrics: str, framework: str, framework_version: str,
         result: Dict[str, Any]
     ):
         """Store analysis result."""
-        content_hash = self._generate_content_hash(
-            lyrics, framework, framework_version
+        self.store_analysis_by_hash(self.hash_lyrics(lyrics), framework, framework_version, result)
+
+    def store_analysis_by_hash(
+        self, lyrics_hash: str, framework: str, framework_version: str,
+        result: Dict[str, Any]
+    ):
+        """Store an analysis result under the 'lyrics_hash' of the analyzed lyrics."""
+        self.store_analysis_by_hash_many([(lyrics_hash, framework, framework_version, result)])
+        logger.debug(
+            f"Stored/Updated analysis for framework {framework} "
+            f"v{framework_version}"
         )
 
+    def store_analysis_many(
+        self, entries: List[Tuple[str, str, str, Dict[str, Any]]]
+    ):
+        """Store many (lyrics, framework, version, result) analyses in one transaction."""
+        self.store_analysis_by_hash_many([
+            (self.hash_lyrics(lyrics), framework, framework_version, result)
+            for lyrics, framework, framework_version, result in entries
+        ])
+
+    def store_analysis_by_hash_many(
+        self, entries: List[Tuple[str, str, str, Dict[str, Any]]]
+    ):
+        """Store many (lyrics_hash, framework, version, result) analyses in one transaction."""
+        rows = [
+            {
+                'content_hash': content_hash,
+                'framework': framework,
+                'framework_version': framework_version,
+                'result': json.dumps(result),
+                'created_at': datetime.utcnow(),
+            }
+            for content_hash, framework, framework_version, result in entries
+        ]
+        self._persist_rows({'analysis': rows})
+
+    def iter_cached_lyrics(self, batch_size: int = BULK_QUERY_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+        """Yield every cached lyrics entry, reading batch_size rows at a time."""
+        self.flush()
+        last_id = 0
+        while True:
+            session = self.get_session()
+            try:
+                rows = self._lyrics_query(session).filter(
+                    CachedLyrics.id > last_id
+                ).order_by(CachedLyrics.id).limit(batch_size).all()
+                entries = [self._lyrics_row_to_dict(dict(row._mapping)) for row in rows]
+            finally:
+                session.close()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield from entries
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Report cache sizes and, when enabled, memory tier and write buffer state."""
+        session = self.get_session()
+        try:
+            stats: Dict[str, Any] = {
+                'lyrics_entries': session.query(CachedLyrics).count(),
+                'lyrics_blobs': session.query(LyricsBlob).count(),
+                'analysis_entries': session.query(CachedAnalysis).count(),
+                'provider_track_ids': session.query(ProviderTrackId).count(),
+                'negative_lookups': self._negative_lookup_stats(session),
+                'song_aliases': session.query(SongAlias).count(),
+            }
+        finally:
+            session.close()
+        if self.fuzzy_match_enabled:
+            with self._fuzzy_index_lock:
+                stats['fuzzy_match'] = {
+                    **self._fuzzy_stats,
+                    'indexed_songs': len(self._fuzzy_index) if self._fuzzy_index is not None else 0,
+                    'threshold': self.fuzzy_match_threshold,
+                }
+        if self.memory_cache:
+            stats['memory_cache'] = self.memory_cache.stats()
+        if self.shared_cache:
+            stats['shared_cache'] = self.shared_cache.stats()
+        if self.write_buffer:
+            stats['write_buffer_pending'] = self.write_buffer.pending_count()
+        return stats
+
+    def _negative_lookup_stats(self, session: Session) -> Dict[str, Any]:
+        """Negative cache size, with the entries still within the TTL broken down by provider."""
+        cutoff = datetime.utcnow() - timedelta(seconds=max(0.0, self.negative_cache_ttl))
+        active_by_provider = dict(
+            session.query(NegativeLookup.provider, func.count(NegativeLookup.id)).filter(
+                NegativeLookup.created_at >= cutoff
+            ).group_by(NegativeLookup.provider).all()
+        ) if self.negative_cache_ttl > 0 else {}
+        return {
+            'entries': session.query(NegativeLookup).count(),
+            'active': sum(active_by_provider.values()),
+            'active_by_provider': active_by_provider,
+            'ttl_seconds': self.negative_cache_ttl,
+        }
+
+    def create_job(
+        self, artist: str, title: str, framework: Optional[str] = None,
+        force_refresh: bool = False, frameworks: Optional[List[str]] = None, profile: str = 'full'
+    ) -> Dict[str, Any]:
+        """Record a new queued analysis job and return it."""
         session = self.get_session()
         try:
-            existing_entry = session.query(CachedAnalysis).filter_by(
-                content_hash=content_hash,
+            job = AnalysisJob(
+                id=uuid.uuid4().hex,
+                status='queued',
+                artist=artist,
+                title=title,
                 framework=framework,
-                framework_version=framework_version
-            ).first()
-            if existing_entry:
-                existing_entry.result = json.dumps(result)
-                existing_entry.created_at = datetime.utcnow()
-                session.merge(existing_entry)
-            else:
-                cached_analysis = CachedAnalysis(
-                    content_hash=content_hash,
-                    framework=framework,
-                    framework_version=framework_version,
-                    result=json.dumps(result)
-                )
-                session.add(cached_analysis)
-            session.commit()
-            logger.debug(
-                f"Stored/Updated analysis for framework {framework} "
-                f"v{framework_version}"
+                frameworks=json.dumps(frameworks) if frameworks else None,
+                profile=profile,
+                force_refresh=bool(force_refresh),
+                created_at=datetime.utcnow(),
             )
+            session.add(job)
+            session.commit()
+            return self._job_to_dict(job)
         except Exception as e:
             session.rollback()
-            logger.error(
-                f"Error storing analysis for framework {framework}: {e}"
+            logger.error(f"Error creating analysis job: {e}")
+            raise
+        finally:
+            session.close()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        session = self.get_session()
+        try:
+            job = session.get(AnalysisJob, job_id)
+            return self._job_to_dict(job) if job else None
+        finally:
+            session.close()
+
+    def count_unfinished_jobs(self) -> int:
+        """Number of queued or running jobs, across every process sharing the database."""
+        session = self.get_session()
+        try:
+            return session.query(func.count(AnalysisJob.id)).filter(
+                AnalysisJob.status.in_(('queued', 'running'))
+            ).scalar()
+        finally:
+            session.close()
+
+    def claim_job(self, job_id: str) -> bool:
+        """Mark a queued job as running. Returns False if someone else claimed it."""
+        session = self.get_session()
+        try:
+            claimed = session.query(AnalysisJob).filter(
+                AnalysisJob.id == job_id, AnalysisJob.status == 'queued'
+            ).update(
+                {'status': 'running', 'started_at': datetime.utcnow()},
+                synchronize_session=False
             )
+            session.commit()
+            return claimed == 1
+        except Exception:
+            session.rollback()
             raise
         finally:
             session.close()
 
+    def finish_job(
+        self, job_id: str, result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ):
+        """Store a job's outcome: completed with a result, or failed with an error."""
+        session = self.get_session()
+        try:
+            session.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(
+                {
+                    'status': 'failed' if error else 'completed',
+                    'result': json.dumps(result) if result is not None else None,
+                    'error': error,
+                    'finished_at': datetime.utcnow(),
+                },
+                synchronize_session=False
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def get_resumable_jobs(self, stale_before: datetime) -> List[Dict[str, Any]]:
+        """Re-queue running jobs started before stale_before and return all queued jobs.
+
+        Used on startup to pick up work interrupted by a restart.
+        """
+        session = self.get_session()
+        try:
+            requeued = session.query(AnalysisJob).filter(
+                AnalysisJob.status == 'running',
+                AnalysisJob.started_at < stale_before
+            ).update(
+                {'status': 'queued', 'started_at': None},
+                synchronize_session=False
+            )
+            session.commit()
+            if requeued:
+                logger.info(f"Re-queued {requeued} interrupted analysis jobs")
+            jobs = session.query(AnalysisJob).filter(
+                AnalysisJob.status == 'queued'
+            ).order_by(AnalysisJob.created_at).all()
+            return [self._job_to_dict(job) for job in jobs]
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _job_to_dict(job: AnalysisJob) -> Dict[str, Any]:
+        return {
+            'id': job.id,
+            'status': job.status,
+            'artist': job.artist,
+            'title': job.title,
+            'framework': job.framework,
+            'frameworks': json.loads(job.frameworks) if job.frameworks else None,
+            'profile': job.profile or 'full',
+            'force_refresh': bool(job.force_refresh),
+            'result': json.loads(job.result) if job.result else None,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        }
+
+    def flush(self):
+        """Write out any rows held by the write-behind buffer."""
+        if self.write_buffer:
+            self.write_buffer.flush()
+
+    def close(self):
+        """Flush pending writes and release database connections."""
+        if self.write_buffer:
+            self.write_buffer.close()
+            self.write_buffer = None
+        if self.shared_cache:
+            self.shared_cache.close()
+        self.engine.dispose()
+
     def clear_old_cache(self, days: int = 30):
         """Clear cache entries older than specified days."""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
+        self.flush()
+        if self.memory_cache:
+            evicted = self.memory_cache.evict_where(
+                lambda key, created_at: created_at < cutoff_date
+            )
+            logger.debug(f"Evicted {evicted} memory cache entries older than {days} days")
+        if self.shared_cache:
+            # Entries aren't indexed by age, so drop them all; they refill from SQL on demand
+            try:
+                self.shared_cache.clear()
+            except Exception as e:
+                logger.warning(f"Could not clear shared cache: {e}")
 
         session = self.get_session()
         try:
@@ -207,10 +1162,29 @@ class Database:
             analysis_deleted = session.query(CachedAnalysis).filter(
                 CachedAnalysis.created_at < cutoff_date
             ).delete(synchronize_session=False)
+            # Negative lookups go once expired or older than the cutoff, whichever is sooner
+            negative_cutoff = max(
+                cutoff_date, datetime.utcnow() - timedelta(seconds=max(0.0, self.negative_cache_ttl))
+            )
+            negative_deleted = session.query(NegativeLookup).filter(
+                NegativeLookup.created_at < negative_cutoff
+            ).delete(synchronize_session=False)
+            # Aliases whose song is gone would only lead to misses
+            session.query(SongAlias).filter(
+                ~SongAlias.search_key.in_(session.query(CachedLyrics.search_key))
+            ).delete(synchronize_session=False)
+            # Lyrics no cached song refers to any more, after deletes and refreshes
+            session.query(LyricsBlob).filter(
+                ~LyricsBlob.lyrics_hash.in_(session.query(CachedLyrics.lyrics_hash))
+            ).delete(synchronize_session=False)
             session.commit()
+            with self._fuzzy_index_lock:
+                # Rebuilt without the deleted songs on the next fuzzy lookup
+                self._fuzzy_index = None
             logger.info(
                 f"Cleared {lyrics_deleted} lyrics and {analysis_deleted} "
-                f"analysis entries older than {days} days"
+                f"analysis entries older than {days} days, and "
+                f"{negative_deleted} expired negative lookups"
             )
         except Exception as e:
             session.rollback()
@@ -219,19 +1193,406 @@ class Database:
         finally:
             session.close()
 
+    def _persist_rows(self, rows_by_kind: Dict[str, List[Dict[str, Any]]]):
+        """Queue rows in the write-behind buffer if enabled, else write them now."""
+        if self.write_buffer:
+            for row in rows_by_kind.get('lyrics', []):
+                self.write_buffer.add('lyrics', row['search_key'], row)
+            for row in rows_by_kind.get('analysis', []):
+                self.write_buffer.add('analysis', self._analysis_key(row), row)
+            for row in rows_by_kind.get('track_ids', []):
+                self.write_buffer.add('track_ids', (row['search_key'], row['provider']), row)
+            for row in rows_by_kind.get('negative_lookups', []):
+                self.write_buffer.add('negative_lookups', (row['search_key'], row['provider']), row)
+            for row in rows_by_kind.get('aliases', []):
+                self.write_buffer.add('aliases', row['alias_key'], row)
+        else:
+            self._write_rows(rows_by_kind)
+
+        if self.memory_cache or self.shared_cache:
+            # Write-through, so the next read is served without touching SQL
+            self._remember('lyrics', [
+                self._lyrics_tier_item(row, self._lyrics_row_to_dict(row))
+                for row in rows_by_kind.get('lyrics', [])
+            ])
+            self._remember('analysis', [
+                (self._analysis_key(row), json.loads(row['result']),
+                 len(row['result']), row['created_at'])
+                for row in rows_by_kind.get('analysis', [])
+            ])
+
+    def _recall(self, kind: str, keys: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Look up cache entries without SQL: memory tier, shared backend, then unflushed writes.
+
+        kind is 'lyrics' (keys are search keys) or 'analysis' (keys are
+        (content_hash, framework, version) tuples). Returns the entries found.
+        """
+        found: Dict[Any, Dict[str, Any]] = {}
+        remaining = list(keys)
+
+        if self.memory_cache:
+            missing = []
+            for key in remaining:
+                value = self.memory_cache.get((kind, key))
+                if value is not None:
+                    found[key] = value
+                else:
+                    missing.append(key)
+            remaining = missing
+
+        if remaining and self.shared_cache:
+            shared_keys = {self._shared_cache_key(kind, key): key for key in remaining}
+            try:
+                stored = self.shared_cache.get_many(list(shared_keys))
+                self.shared_cache.record(
+                    hits=len(stored), misses=len(shared_keys) - len(stored)
+                )
+            except Exception as e:
+                self.shared_cache.record(errors=1)
+                logger.warning(f"Shared cache read failed, falling back to database: {e}")
+                stored = {}
+            for shared_key, raw in stored.items():
+                key = shared_keys[shared_key]
+                envelope = json.loads(raw)
+                found[key] = envelope['value']
+                if self.memory_cache:
+                    self.memory_cache.set(
+                        (kind, key), envelope['value'], len(raw),
+                        datetime.fromisoformat(envelope['created_at'])
+                    )
+            remaining = [key for key in remaining if key not in found]
+
+        if remaining and self.write_buffer:
+            for key in remaining:
+                pending = self.write_buffer.get(kind, key)
+                if pending:
+                    found[key] = (
+                        self._lyrics_row_to_dict(pending)
+                        if kind == 'lyrics' else json.loads(pending['result'])
+                    )
+        return found
+
+    def _remember(self, kind: str, items: List[Tuple[Any, Dict[str, Any], int, Optional[datetime]]]):
+        """Keep (key, value, size, created_at) entries in the memory tier and shared backend."""
+        if not items:
+            return
+        if self.memory_cache:
+            for key, value, size, created_at in items:
+                self.memory_cache.set((kind, key), value, size + 256, created_at)
+        if self.shared_cache:
+            try:
+                self.shared_cache.set_many({
+                    self._shared_cache_key(kind, key): json.dumps({
+                        'created_at': (created_at or datetime.utcnow()).isoformat(),
+                        'value': value,
+                    })
+                    for key, value, _, created_at in items
+                })
+            except Exception as e:
+                self.shared_cache.record(errors=1)
+                logger.warning(f"Shared cache write failed: {e}")
+
+    @staticmethod
+    def _lyrics_tier_item(row: Dict[str, Any], entry: Dict[str, Any]):
+        size = len(row['lyrics'] or '') + len(row['lyric_metadata'] or '')
+        return row['search_key'], entry, size, row['created_at']
+
+    @staticmethod
+    def _shared_cache_key(kind: str, key: Any) -> str:
+        if kind == 'analysis':
+            return 'analysis:' + ':'.join(key)
+        return f'{kind}:{key}'
+
+    def _write_rows(self, rows_by_kind: Dict[str, List[Dict[str, Any]]]):
+        """Upsert lyrics, analysis, track ID, negative lookup and alias rows, committing them in a single transaction."""
+        lyrics_rows = list({row['search_key']: row for row in rows_by_kind.get('lyrics', [])}.values())
+        analysis_rows = list({self._analysis_key(row): row for row in rows_by_kind.get('analysis', [])}.values())
+        track_id_rows = list({
+            (row['search_key'], row['provider']): row for row in rows_by_kind.get('track_ids', [])
+        }.values())
+        negative_rows = list({
+            (row['search_key'], row['provider']): row for row in rows_by_kind.get('negative_lookups', [])
+        }.values())
+        alias_rows = list({row['alias_key']: row for row in rows_by_kind.get('aliases', [])}.values())
+        if not lyrics_rows and not analysis_rows and not track_id_rows and not negative_rows and not alias_rows:
+            return
+
+        session = self.get_session()
+        try:
+            if lyrics_rows:
+                self._upsert_lyrics(session, lyrics_rows)
+            if analysis_rows:
+                self._upsert_analysis(session, analysis_rows)
+            if track_id_rows:
+                self._upsert_track_ids(session, track_id_rows)
+            if negative_rows:
+                self._upsert_negative_lookups(session, negative_rows)
+            if alias_rows:
+                self._upsert_aliases(session, alias_rows)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(
+                f"Error storing {len(lyrics_rows)} lyrics and "
+                f"{len(analysis_rows)} analysis rows: {e}"
+            )
+            raise
+        finally:
+            session.close()
+
+    def _upsert_lyrics(self, session: Session, rows: List[Dict[str, Any]]):
+        """Insert lyrics rows, updating any existing row with the same search_key.
+
+        The text goes to lyrics_blobs, once per lyrics hash; cached_lyrics keeps the hash.
+        """
+        self._insert_blobs(session, list({
+            row['lyrics_hash']: {
+                'lyrics_hash': row['lyrics_hash'], 'lyrics': row['lyrics'], 'created_at': row['created_at']
+            }
+            for row in rows
+        }.values()))
+        rows = [{column: value for column, value in row.items() if column != 'lyrics'} for row in rows]
+
+        insert = self._dialect_insert()
+        if insert is not None:
+            stmt = insert(CachedLyrics)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['search_key'],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in ('artist', 'title', 'lyrics_hash', 'source',
+                                   'lyric_metadata', 'created_at')
+                }
+            )
+            session.execute(stmt, rows)
+            return
+
+        # Generic fallback: select existing rows, then update or insert
+        existing = {}
+        for chunk in self._chunked([row['search_key'] for row in rows]):
+            for entry in session.query(CachedLyrics).filter(
+                CachedLyrics.search_key.in_(chunk)
+            ):
+                existing[entry.search_key] = entry
+        for row in rows:
+            entry = existing.get(row['search_key'])
+            if entry:
+                for column, value in row.items():
+                    setattr(entry, column, value)
+            else:
+                session.add(CachedLyrics(**row))
+
+    def _insert_blobs(self, session: Session, rows: List[Dict[str, Any]]):
+        """Insert lyrics blobs that aren't stored yet. Same hash, same lyrics, so existing ones are kept."""
+        insert = self._dialect_insert()
+        if insert is not None:
+            session.execute(
+                insert(LyricsBlob).on_conflict_do_nothing(index_elements=['lyrics_hash']), rows
+            )
+            return
+
+        existing = set()
+        for chunk in self._chunked([row['lyrics_hash'] for row in rows]):
+            existing.update(
+                lyrics_hash for (lyrics_hash,) in session.query(LyricsBlob.lyrics_hash).filter(
+                    LyricsBlob.lyrics_hash.in_(chunk)
+                )
+            )
+        session.add_all(LyricsBlob(**row) for row in rows if row['lyrics_hash'] not in existing)
+
+    def _upsert_analysis(self, session: Session, rows: List[Dict[str, Any]]):
+        """Insert analysis rows, updating existing rows for the same hash, framework and version."""
+        insert = self._dialect_insert()
+        if insert is not None:
+            stmt = insert(CachedAnalysis)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['content_hash', 'framework', 'framework_version'],
+                set_={
+                    'result': stmt.excluded.result,
+                    'created_at': stmt.excluded.created_at,
+                }
+            )
+            session.execute(stmt, rows)
+            return
+
+        # Generic fallback: select existing rows, then update or insert
+        existing = {}
+        for chunk in self._chunked([row['content_hash'] for row in rows]):
+            for entry in session.query(CachedAnalysis).filter(
+                CachedAnalysis.content_hash.in_(chunk)
+            ):
+                existing[self._analysis_key(entry)] = entry
+        for row in rows:
+            entry = existing.get(self._analysis_key(row))
+            if entry:
+                entry.result = row['result']
+                entry.created_at = row['created_at']
+            else:
+                session.add(CachedAnalysis(**row))
+
+    def _upsert_track_ids(self, session: Session, rows: List[Dict[str, Any]]):
+        """Insert provider track ID rows, replacing the ID of an existing song/provider pair."""
+        insert = self._dialect_insert()
+        if insert is not None:
+            stmt = insert(ProviderTrackId)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['search_key', 'provider'],
+                set_={
+                    'track_id': stmt.excluded.track_id,
+                    'created_at': stmt.excluded.created_at,
+                }
+            )
+            session.execute(stmt, rows)
+            return
+
+        # Generic fallback: select existing rows, then update or insert
+        existing = {}
+        for chunk in self._chunked([row['search_key'] for row in rows]):
+            for entry in session.query(ProviderTrackId).filter(
+                ProviderTrackId.search_key.in_(chunk)
+            ):
+                existing[(entry.search_key, entry.provider)] = entry
+        for row in rows:
+            entry = existing.get((row['search_key'], row['provider']))
+            if entry:
+                entry.track_id = row['track_id']
+                entry.created_at = row['created_at']
+            else:
+                session.add(ProviderTrackId(**row))
+
+    def _upsert_negative_lookups(self, session: Session, rows: List[Dict[str, Any]]):
+        """Insert negative lookup rows, restarting the TTL of existing ones."""
+        insert = self._dialect_insert()
+        if insert is not None:
+            stmt = insert(NegativeLookup)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['search_key', 'provider'],
+                set_={'created_at': stmt.excluded.created_at}
+            )
+            session.execute(stmt, rows)
+            return
+
+        # Generic fallback: select existing rows, then update or insert
+        existing = {}
+        for chunk in self._chunked([row['search_key'] for row in rows]):
+            for entry in session.query(NegativeLookup).filter(
+                NegativeLookup.search_key.in_(chunk)
+            ):
+                existing[(entry.search_key, entry.provider)] = entry
+        for row in rows:
+            entry = existing.get((row['search_key'], row['provider']))
+            if entry:
+                entry.created_at = row['created_at']
+            else:
+                session.add(NegativeLookup(**row))
+
+    def _upsert_aliases(self, session: Session, rows: List[Dict[str, Any]]):
+        """Insert alias rows, repointing existing aliases."""
+        insert = self._dialect_insert()
+        if insert is not None:
+            stmt = insert(SongAlias)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['alias_key'],
+                set_={
+                    'search_key': stmt.excluded.search_key,
+                    'created_at': stmt.excluded.created_at,
+                }
+            )
+            session.execute(stmt, rows)
+            return
+
+        # Generic fallback: select existing rows, then update or insert
+        existing = {}
+        for chunk in self._chunked([row['alias_key'] for row in rows]):
+            for entry in session.query(SongAlias).filter(
+                SongAlias.alias_key.in_(chunk)
+            ):
+                existing[entry.alias_key] = entry
+        for row in rows:
+            entry = existing.get(row['alias_key'])
+            if entry:
+                entry.search_key = row['search_key']
+                entry.created_at = row['created_at']
+            else:
+                session.add(SongAlias(**row))
+
+    def _dialect_insert(self):
+        """Return the dialect's INSERT construct if it supports ON CONFLICT DO UPDATE."""
+        dialect = self.engine.dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+            return insert
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            return insert
+        return None
+
+    @staticmethod
+    def _analysis_key(row) -> Tuple[str, str, str]:
+        if isinstance(row, dict):
+            return row['content_hash'], row['framework'], row['framework_version']
+        return row.content_hash, row.framework, row.framework_version
+
+    @staticmethod
+    def _track_id_rows(search_key: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """provider_track_ids rows for the provider IDs found in a lyrics metadata dict."""
+        rows = []
+        for provider, field in PROVIDER_ID_FIELDS.items():
+            track_id = metadata.get(field)
+            if track_id is not None and str(track_id):
+                rows.append({
+                    'search_key': search_key,
+                    'provider': provider,
+                    'track_id': str(track_id),
+                    'created_at': datetime.utcnow(),
+                })
+        return rows
+
+    @staticmethod
+    def _lyrics_query(session: Session):
+        """Query cached_lyrics rows together with their lyrics text."""
+        return session.query(
+            CachedLyrics.id, CachedLyrics.search_key, CachedLyrics.artist, CachedLyrics.title,
+            LyricsBlob.lyrics, CachedLyrics.lyrics_hash, CachedLyrics.source,
+            CachedLyrics.lyric_metadata, CachedLyrics.created_at
+        ).join(LyricsBlob, LyricsBlob.lyrics_hash == CachedLyrics.lyrics_hash)
+
+    @staticmethod
+    def _lyrics_row_to_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten a lyrics row and its JSON metadata into a result dict."""
+        lyric_metadata_dict = json.loads(row['lyric_metadata']) if row.get('lyric_metadata') else {}
+        return {
+            'artist': row['artist'],
+            'title': row['title'],
+            'lyrics': row['lyrics'],
+            'lyrics_hash': row['lyrics_hash'],
+            'source': row['source'],
+            **lyric_metadata_dict
+        }
+
+    @staticmethod
+    def _chunked(values: List[Any], size: int = BULK_QUERY_CHUNK_SIZE):
+        """Split values into lists of at most size items, for IN (...) queries."""
+        for start in range(0, len(values), size):
+            yield values[start:start + size]
+
     def _generate_search_key(self, artist: str, title: str) -> str:
-        """Generate normalized search key for lyrics."""
-        norm_artist = artist.lower().strip()
-        norm_title = title.lower().strip()
-        key_string = f"{norm_artist}:{norm_title}"
+        """Generate the search key for lyrics, shared by spellings of a song that canonicalize alike."""
+        key_string = canonical_song_key(artist, title)
         return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
 
-    def _generate_content_hash(
-        self, lyrics: str, framework: str, version: str
-    ) -> str:
-        """Generate content hash for analysis caching."""
-        normalized_lyrics = '\n'.join(
+    @staticmethod
+    def _normalize_lyrics(lyrics: str) -> str:
+        """Lyrics without surrounding whitespace or blank lines, the form that is hashed."""
+        return '\n'.join(
             line.strip() for line in lyrics.split('\n') if line.strip()
         )
-        hash_input = f"{normalized_lyrics}:{framework}:{version}"
-        return hashlib.sha256(hash_input.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def hash_lyrics(cls, lyrics: str) -> str:
+        """The content hash of lyrics, the key of lyrics_blobs and of cached analyses.
+
+        Cached and discovered lyrics come with it as 'lyrics_hash'; this is only
+        needed for lyrics from elsewhere.
+        """
+        return hashlib.sha256(cls._normalize_lyrics(lyrics).encode('utf-8')).hexdigest()
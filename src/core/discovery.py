@@ -1,10 +1,17 @@
 import logging
-from typing import Optional, Dict, Any, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
 from src.providers.genius import GeniusProvider
 from src.providers.lyrics_ovh import LyricsOVHProvider
 from src.providers.musixmatch import MusixmatchProvider # Ensure this is imported
+from src.providers.http import ProviderError, create_provider_session
+from src.core.circuit_breaker import OPEN, CircuitBreaker, ProviderHealth
 from src.core.config import Config
 from src.core.database import Database
+from src.core.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +19,25 @@ class LyricsDiscovery:
     def __init__(self, config: Config, database: Database):
         self.config = config
         self.db = database
+        # One keep-alive session with per-host connection pools, shared by the HTTP providers
+        self.http_session = create_provider_session(config)
         self.providers = self._create_providers()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Concurrent lookups of the same song share one provider search
+        self._inflight = SingleFlight()
+        # Caps on in-flight requests per provider, shared by single and batch searches
+        self._provider_semaphores = {
+            name: threading.BoundedSemaphore(limit)
+            for name, limit in self.config.provider_concurrency.items()
+            if limit and limit > 0
+        }
+        self._negative_stats_lock = threading.Lock()
+        self._negative_stats = {'searches_skipped': 0, 'provider_queries_skipped': 0}
+        # Per-provider circuit breakers and rolling health, created on first use
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._health: Dict[str, ProviderHealth] = {}
+        self._guards_lock = threading.Lock()
     
     def _create_providers(self) -> List[Any]: # Changed to List[Any] for provider instances
         """Create available providers based on configuration, ordered by preference"""
@@ -20,7 +45,7 @@ class LyricsDiscovery:
         
         # Highest preference (paid, potentially better quality)
         if self.config.musixmatch_api_key:
-            providers.append(MusixmatchProvider(self.config.musixmatch_api_key))
+            providers.append(MusixmatchProvider(self.config.musixmatch_api_key, self.http_session))
             logger.info("Musixmatch provider initialized.")
         
         if self.config.genius_token:
@@ -28,7 +53,7 @@ class LyricsDiscovery:
             logger.info("Genius provider initialized.")
         
         # Free provider (lowest priority)
-        providers.append(LyricsOVHProvider())
+        providers.append(LyricsOVHProvider(self.http_session))
         logger.info("LyricsOVH provider initialized.")
         
         if not providers:
@@ -45,39 +70,298 @@ class LyricsDiscovery:
                 logger.info(f"Found cached lyrics for '{artist} - {title}' from source: {cached_result.get('source')}")
                 return cached_result
         
-        # Search providers in the order they were added
-        for provider in self.providers:
-            provider_name = provider.__class__.__name__
-            try:
-                logger.info(f"Searching with provider: {provider_name} for '{artist} - {title}'")
-                result = provider.search(artist, title)
+        return self._discover_coalesced(artist, title, force_refresh)
+    
+    def search_many(self, songs: Iterable[Tuple[str, str]], force_refresh: bool = False,
+                    max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Search lyrics for many (artist, title) pairs, yielding one record per input song.
+        
+        Songs are de-duplicated by search key, so each distinct song is looked up once.
+        Cache hits are answered with a single bulk query and yielded first; misses are
+        searched concurrently and yielded as they complete, so output order is not input
+        order. Each record carries the input 'index', 'artist', 'title' and a 'status'
+        of 'found', 'not_found', 'invalid' or 'error', plus 'data' or 'error'.
+        """
+        pending: Dict[str, List[Tuple[int, str, str]]] = {}
+        for index, (artist, title) in enumerate(songs):
+            artist = (artist or '').strip()
+            title = (title or '').strip()
+            if not artist or not title:
+                yield {'index': index, 'artist': artist, 'title': title, 'status': 'invalid',
+                       'error': 'Artist and title are required'}
+                continue
+            search_key = self.db._generate_search_key(artist, title)
+            pending.setdefault(search_key, []).append((index, artist, title))
+        
+        if not pending:
+            return
+        
+        logger.info(f"Batch search: {sum(len(v) for v in pending.values())} songs, {len(pending)} unique")
+        
+        if not force_refresh:
+            cached = self.db.get_cached_lyrics_many([entries[0][1:] for entries in pending.values()])
+            for search_key in list(pending):
+                entries = pending[search_key]
+                result = cached.get(entries[0][1:])
+                if result:
+                    del pending[search_key]
+                    yield from self._batch_records(entries, result)
+            logger.info(f"Batch search: {len(cached)} cache hits, {len(pending)} to discover")
+        
+        if not pending:
+            return
+        
+        workers = max(1, min(max_workers or self.config.batch_max_workers, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lyrics-batch') as executor:
+            futures = {
+                executor.submit(self._discover_coalesced, entries[0][1], entries[0][2], force_refresh): entries
+                for entries in pending.values()
+            }
+            for future in as_completed(futures):
+                entries = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Batch search failed for '{entries[0][1]} - {entries[0][2]}': {e}", exc_info=True)
+                    for index, artist, title in entries:
+                        yield {'index': index, 'artist': artist, 'title': title, 'status': 'error', 'error': str(e)}
+                    continue
+                yield from self._batch_records(entries, result)
+    
+    def _batch_records(self, entries: List[Tuple[int, str, str]], result: Optional[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Build the search_many output records for all inputs sharing one search key."""
+        for index, artist, title in entries:
+            if result and result.get('lyrics'):
+                yield {'index': index, 'artist': artist, 'title': title, 'status': 'found', 'data': dict(result)}
+            else:
+                yield {'index': index, 'artist': artist, 'title': title, 'status': 'not_found'}
+    
+    def _discover_coalesced(self, artist: str, title: str, force_refresh: bool) -> Optional[Dict[str, Any]]:
+        """Run a provider search, joining one already in flight for the same search key."""
+        search_key = self.db._generate_search_key(artist, title)
+        
+        def discover():
+            if not force_refresh:
+                # A search for this key may have finished between our cache check and now
+                cached_result = self.db.get_cached_lyrics(artist, title)
+                if cached_result:
+                    return cached_result
+            return self._discover_and_store(artist, title, force_refresh)
+        
+        return self._inflight.do(search_key, discover)
+    
+    def _discover_and_store(self, artist: str, title: str, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Search the providers, bypassing the cache, and store a valid result."""
+        skipped = [] if force_refresh else self.db.get_negative_lookups(artist, title, self._provider_names())
+        providers = self._providers_to_query(artist, title, skipped)
+        if not providers:
+            return None
+        # Provider track IDs resolved by earlier lookups let those providers skip their search step
+        track_ids = self.db.get_provider_track_ids(artist, title)
+        misses: List[str] = []
+        if self.config.discovery_mode == 'concurrent' and len(providers) > 1:
+            result = self._search_providers_concurrently(artist, title, track_ids, providers, misses)
+        else:
+            result = self._search_providers_sequentially(artist, title, track_ids, providers, misses)
+        
+        if not result:
+            logger.warning(f"No valid lyrics found for '{artist} - {title}' after trying all providers.")
+            # Only definite misses are cached; providers that errored are asked again next time
+            self.db.store_negative_lookups(artist, title, misses)
+            return None
+        
+        # Store in cache
+        lyrics_text = result.pop('lyrics') # Use .pop to get and remove for storage
+        source = result.pop('source')
+        # Any other metadata from result can be passed via **result
+        lyrics_hash = self.db.store_lyrics(artist, title, lyrics_text, source, **result)
+        
+        # Return complete result including the popped items
+        return {
+            'artist': artist,
+            'title': title,
+            'lyrics': lyrics_text,
+            'lyrics_hash': lyrics_hash,
+            'source': source,
+            **result # Add back any other metadata
+        }
+    
+    def _providers_to_query(self, artist: str, title: str, skipped: List[str]) -> List[Any]:
+        """The providers to search, in order, leaving out those with a fresh negative cache entry for the song."""
+        ordered = self._ordered_providers()
+        if not skipped:
+            return ordered
+        providers = [provider for provider in ordered if self._provider_name(provider) not in skipped]
+        with self._negative_stats_lock:
+            self._negative_stats['provider_queries_skipped'] += len(self.providers) - len(providers)
+            if not providers:
+                self._negative_stats['searches_skipped'] += 1
+        if not providers:
+            logger.info(f"Negative cache: no provider has lyrics for '{artist} - {title}'; not searching.")
+        else:
+            logger.debug(f"Negative cache: skipping {', '.join(skipped)} for '{artist} - {title}'")
+        return providers
+    
+    def get_negative_cache_stats(self) -> Dict[str, int]:
+        """Searches and provider queries saved by the negative cache since startup."""
+        with self._negative_stats_lock:
+            return dict(self._negative_stats)
+    
+    def inflight_stats(self) -> Dict[str, Any]:
+        """Searches running now, callers waiting on them, and lookups coalesced into them since startup."""
+        return self._inflight.stats()
+    
+    @staticmethod
+    def _provider_name(provider: Any) -> str:
+        return getattr(provider, 'name', provider.__class__.__name__)
+    
+    def _provider_names(self) -> List[str]:
+        return [self._provider_name(provider) for provider in self.providers]
+    
+    def _provider_guards(self, provider: Any) -> Tuple[CircuitBreaker, ProviderHealth]:
+        """The circuit breaker and health tracker of a provider."""
+        name = self._provider_name(provider)
+        with self._guards_lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(
+                    name,
+                    failure_threshold=self.config.provider_circuit_failure_threshold,
+                    reset_timeout=self.config.provider_circuit_reset_timeout,
+                    half_open_max_calls=self.config.provider_circuit_half_open_max_calls,
+                )
+                self._health[name] = ProviderHealth(name)
+            return self._breakers[name], self._health[name]
+    
+    def _ordered_providers(self) -> List[Any]:
+        """Providers in the order they are tried.
+        
+        Static ordering keeps the configured preference. Adaptive ordering first gives
+        each provider ordering_min_samples lookups in preference order, then ranks
+        measured providers by expected time per song found (latency / hit rate).
+        Providers with an open circuit go last.
+        """
+        if self.config.provider_ordering != 'adaptive':
+            return list(self.providers)
+        
+        def rank(indexed_provider: Tuple[int, Any]) -> Tuple[bool, bool, float, int]:
+            position, provider = indexed_provider
+            breaker, health = self._provider_guards(provider)
+            cost = health.expected_cost()
+            measured = cost is not None and health.calls >= self.config.provider_ordering_min_samples
+            return breaker.state == OPEN, measured, cost if measured else 0.0, position
+        
+        return [provider for _, provider in sorted(enumerate(self.providers), key=rank)]
+    
+    def get_provider_status(self) -> List[Dict[str, Any]]:
+        """Providers in their current order, with circuit state and rolling health."""
+        status = []
+        for position, provider in enumerate(self._ordered_providers(), start=1):
+            breaker, health = self._provider_guards(provider)
+            status.append({
+                'name': self._provider_name(provider),
+                'class': provider.__class__.__name__,
+                'position': position,
+                'circuit': breaker.stats(),
+                'health': health.stats(),
+            })
+        return status
+    
+    def _search_providers_sequentially(self, artist: str, title: str,
+                                       track_ids: Optional[Dict[str, str]] = None,
+                                       providers: Optional[List[Any]] = None,
+                                       misses: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Query providers one after another, stopping at the first valid result."""
+        track_ids = track_ids or {}
+        for provider in self._ordered_providers() if providers is None else providers:
+            result = self._query_provider(provider, artist, title, track_ids.get(self._provider_name(provider)), misses)
+            if result:
+                return result
+        return None
+    
+    def _search_providers_concurrently(self, artist: str, title: str,
+                                       track_ids: Optional[Dict[str, str]] = None,
+                                       providers: Optional[List[Any]] = None,
+                                       misses: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Query all providers at once, but pick the winner by preference order.
+        
+        Futures are awaited in provider order, so a faster low-priority provider never
+        beats a higher-priority one that also returns valid lyrics. Once a winner is
+        known, queued lookups are cancelled and still-running ones are ignored.
+        """
+        executor = self._get_executor()
+        track_ids = track_ids or {}
+        futures = [
+            executor.submit(
+                self._query_provider, provider, artist, title, track_ids.get(self._provider_name(provider)), misses
+            )
+            for provider in (self._ordered_providers() if providers is None else providers)
+        ]
+        try:
+            for future in futures:
+                result = future.result()
+                if result:
+                    return result
+        finally:
+            for future in futures:
+                future.cancel()
+        return None
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazily create the thread pool shared by concurrent searches."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, self.config.discovery_max_workers),
+                    thread_name_prefix='lyrics-discovery'
+                )
+            return self._executor
+    
+    def _query_provider(self, provider: Any, artist: str, title: str, track_id: Optional[str] = None,
+                        misses: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Query a single provider. Returns its result only if the lyrics pass validation.
+        
+        When the provider answers but has no usable lyrics, its name is appended to misses.
+        """
+        provider_name = provider.__class__.__name__
+        semaphore = self._provider_semaphores.get(self._provider_name(provider))
+        breaker, health = self._provider_guards(provider)
+        if not breaker.allow_request():
+            logger.info(f"Skipping {provider_name} for '{artist} - {title}': circuit open")
+            return None
+        started = None
+        try:
+            logger.info(f"Searching with provider: {provider_name} for '{artist} - {title}'")
+            with semaphore or nullcontext():
+                started = time.perf_counter()
+                # Only providers with stored track IDs are passed one
+                result = provider.search(artist, title, track_id=track_id) if track_id else provider.search(artist, title)
+            
+            # The provider answered, so its circuit stays closed whether or not it had lyrics
+            valid = bool(result and result.get('lyrics') and self._is_valid_lyrics(result['lyrics']))
+            breaker.record_success()
+            health.record(valid, time.perf_counter() - started)
+            if valid:
+                logger.info(f"Found lyrics for '{artist} - {title}' from {result.get('source')} via {provider_name}.")
+                return result
+            elif result:
+                logger.info(f"Lyrics found by {provider_name} for '{artist} - {title}' but deemed invalid or empty.")
+            if misses is not None:
+                misses.append(self._provider_name(provider))
                 
-                if result and result.get('lyrics') and self._is_valid_lyrics(result['lyrics']):
-                    # Store in cache
-                    lyrics_text = result.pop('lyrics') # Use .pop to get and remove for storage
-                    source = result.pop('source')
-                    # Any other metadata from result can be passed via **result
-                    self.db.store_lyrics(artist, title, lyrics_text, source, **result)
-                    
-                    # Return complete result including the popped items
-                    logger.info(f"Found lyrics for '{artist} - {title}' from {source} via {provider_name}.")
-                    return {
-                        'artist': artist,
-                        'title': title,
-                        'lyrics': lyrics_text,
-                        'source': source,
-                        **result # Add back any other metadata
-                    }
-                elif result:
-                    logger.info(f"Lyrics found by {provider_name} for '{artist} - {title}' but deemed invalid or empty.")
-                    
-            except Exception as e:
-                logger.warning(f"Provider {provider_name} failed for '{artist} - {title}': {e}", exc_info=True)
-                continue # Try next provider
-        
-        logger.warning(f"No valid lyrics found for '{artist} - {title}' after trying all providers.")
+        except ProviderError as e:
+            logger.warning(f"Provider {provider_name} unavailable for '{artist} - {title}': {e}")
+            self._record_provider_error(breaker, health, started)
+        except Exception as e:
+            logger.warning(f"Provider {provider_name} failed for '{artist} - {title}': {e}", exc_info=True)
+            self._record_provider_error(breaker, health, started)
+        
         return None
     
+    @staticmethod
+    def _record_provider_error(breaker: CircuitBreaker, health: ProviderHealth, started: Optional[float]):
+        breaker.record_failure()
+        health.record_error(time.perf_counter() - started if started is not None else 0.0)
+    
     def _is_valid_lyrics(self, lyrics: str) -> bool:
         """Simple lyrics validation to avoid storing junk or placeholder text."""
         if not lyrics or not isinstance(lyrics, str):
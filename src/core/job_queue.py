@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from src.core.analyzer import LyricsAnalyzer
+from src.core.config import Config
+from src.core.database import Database
+from src.core.discovery import LyricsDiscovery
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class AnalysisJobQueue:
+    """Runs song discovery + analysis in a bounded background worker pool.
+
+    Job state lives in the database, so callers in any process can poll it and
+    jobs that were queued or running when the process stopped are picked up
+    again by resume(). max_pending caps the unfinished jobs in the database,
+    so it holds across all processes sharing it.
+    """
+
+    def __init__(self, config: Config, database: Database,
+                 discovery: LyricsDiscovery, analyzer: LyricsAnalyzer):
+        self.config = config
+        self.db = database
+        self.discovery = discovery
+        self.analyzer = analyzer
+        self.max_pending = max(1, config.job_max_pending)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, config.job_max_workers),
+            thread_name_prefix='analysis-job'
+        )
+        self._lock = threading.Lock()
+        self._local_jobs: Dict[str, threading.Event] = {}  # Jobs queued by this process
+
+    def submit(self, artist: str, title: str, framework: Optional[str] = None,
+               force_refresh: bool = False, frameworks: Optional[List[str]] = None,
+               profile: str = 'full') -> Dict[str, Any]:
+        """Queue an analysis job and return its record without waiting for it."""
+        if self.db.count_unfinished_jobs() >= self.max_pending:
+            raise JobQueueFull(
+                f"Too many pending analysis jobs ({self.max_pending}). Try again later."
+            )
+        job = self.db.create_job(artist, title, framework, force_refresh, frameworks, profile)
+        self._enqueue(job['id'])
+        logger.info(f"Queued analysis job {job['id']} for '{artist} - {title}'")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.db.get_job(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Long-poll: return the job once it finishes or timeout seconds pass."""
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            job = self.db.get_job(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in FINISHED_STATUSES or remaining <= 0:
+                return job
+            with self._lock:
+                done = self._local_jobs.get(job_id)
+            if done is not None:
+                done.wait(remaining)
+            else:
+                # Job belongs to another process; fall back to polling the database
+                time.sleep(min(0.5, remaining))
+
+    def resume(self) -> int:
+        """Re-queue jobs left unfinished by a previous run. Returns how many were queued."""
+        stale_before = datetime.utcnow() - timedelta(seconds=self.config.job_stale_after)
+        jobs = self.db.get_resumable_jobs(stale_before)
+        for job in jobs:
+            self._enqueue(job['id'])
+        if jobs:
+            logger.info(f"Resumed {len(jobs)} queued analysis jobs")
+        return len(jobs)
+
+    def stats(self) -> Dict[str, int]:
+        """Unfinished jobs in the database, those this process is working on, and the cap."""
+        pending = self.db.count_unfinished_jobs()
+        with self._lock:
+            return {'pending': pending, 'in_process': len(self._local_jobs), 'max_pending': self.max_pending}
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _enqueue(self, job_id: str):
+        with self._lock:
+            if job_id in self._local_jobs:
+                return
+            self._local_jobs[job_id] = threading.Event()
+        self._executor.submit(self._run_job, job_id)
+
+    def _run_job(self, job_id: str):
+        try:
+            # Another process may have picked up the same job after a restart
+            if not self.db.claim_job(job_id):
+                logger.debug(f"Analysis job {job_id} already claimed elsewhere")
+                return
+            job = self.db.get_job(job_id)
+            try:
+                result = self._analyze_song(
+                    job['artist'], job['title'], job['framework'], job['force_refresh'], job['frameworks'],
+                    job['profile']
+                )
+            except Exception as e:
+                logger.error(f"Analysis job {job_id} failed: {e}", exc_info=True)
+                self.db.finish_job(job_id, error=str(e))
+            else:
+                self.db.finish_job(job_id, result=result)
+                logger.info(f"Analysis job {job_id} completed")
+        except Exception as e:
+            logger.error(f"Could not update analysis job {job_id}: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                done = self._local_jobs.pop(job_id, None)
+            if done is not None:
+                done.set()
+
+    def _analyze_song(self, artist: str, title: str, framework: Optional[str],
+                      force_refresh: bool, frameworks: Optional[List[str]] = None,
+                      profile: str = 'full') -> Dict[str, Any]:
+        lyrics_result = self.discovery.search_lyrics(artist, title, force_refresh)
+        if not lyrics_result or not lyrics_result.get('lyrics'):
+            raise LookupError('Lyrics not found for song analysis')
+
+        analysis_result = self.analyzer.analyze_lyrics(
+            lyrics_result['lyrics'], framework, frameworks=frameworks, profile=profile,
+            lyrics_hash=lyrics_result.get('lyrics_hash')
+        )
+        if not analysis_result:
+            raise RuntimeError('Analysis failed to produce a result for the song')
+
+        return {
+            'analysis': analysis_result,
+            'metadata': {
+                'source': lyrics_result.get('source'),
+                'artist': lyrics_result.get('artist'),
+                'title': lyrics_result.get('title'),
+                **{k: v for k, v in lyrics_result.items() if k not in ['lyrics', 'artist', 'title', 'source']}
+            }
+        }
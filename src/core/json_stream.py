@@ -0,0 +1,69 @@
+import json
+from typing import Any, Iterator, List, Tuple
+
+
+class IncrementalJSONObjectParser:
+    """Parses a JSON object as it streams in, emitting each top-level member once it closes.
+
+    Feed text chunks as they arrive; feed() yields (key, value) for every top-level
+    member completed by that chunk, so e.g. "filtering_scores" is available long
+    before a later "detailed_analysis" has finished generating. Text before the
+    opening brace (prose, a ```json fence) is skipped, as is anything after the
+    closing one. Only the first top-level object is parsed.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []  # Text of the member currently being read
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.started = False
+        self.done = False
+
+    def feed(self, text: str) -> Iterator[Tuple[str, Any]]:
+        for char in text:
+            if self.done:
+                return
+            if not self.started:
+                if char == '{':
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._buffer.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    # End of the object closes the last member
+                    self.done = True
+                    member = self._take_member()
+                    if member is not None:
+                        yield member
+                    return
+            elif char == ',' and self._depth == 1:
+                member = self._take_member()
+                if member is not None:
+                    yield member
+                continue
+            self._buffer.append(char)
+
+    def _take_member(self) -> Any:
+        text = ''.join(self._buffer).strip()
+        self._buffer = []
+        if not text:
+            return None
+        member = json.loads('{' + text + '}')
+        return next(iter(member.items()))
@@ -0,0 +1,233 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.messages import BaseMessage
+
+from src.core.llm_scheduler import RateLimitScheduler, estimate_tokens, is_rate_limit_error, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+HEALTH_EWMA_ALPHA = 0.2  # Weight of the newest call in the latency and error-rate averages
+MIN_WEIGHT_FACTOR = 0.05  # Even a failing backend keeps a little traffic, so recovery is noticed
+
+
+class LLMBackend:
+    """One LLM client in the pool, with its rate-limit scheduler and health numbers."""
+
+    def __init__(self, name: str, provider: str, model: str, llm: Any, weight: float = 1.0,
+                 scheduler: Optional[RateLimitScheduler] = None, expected_output_tokens: int = 0):
+        self.name = name
+        self.provider = provider
+        self.model = model
+        self.llm = llm
+        self.weight = max(0.0, float(weight))
+        self.scheduler = scheduler
+        self.expected_output_tokens = expected_output_tokens
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._failures = 0
+        self._consecutive_failures = 0
+        self._latency: Optional[float] = None
+        self._error_rate = 0.0
+        self._cooldown_until = 0.0
+        self._last_error: Optional[str] = None
+
+    def invoke(self, messages: List[Any]) -> Any:
+        messages = self.prepare_messages(messages)
+        if not self.scheduler:
+            return self.llm.invoke(messages)
+        estimated = estimate_tokens(messages, self.expected_output_tokens)
+        return self.scheduler.run(self.llm.invoke, estimated, messages)
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        messages = self.prepare_messages(messages)
+        if not self.scheduler:
+            return await self.llm.ainvoke(messages)
+        estimated = estimate_tokens(messages, self.expected_output_tokens)
+        return await self.scheduler.arun(self.llm.ainvoke, estimated, messages)
+
+    def stream(self, messages: List[Any]) -> Iterator[Any]:
+        """Stream the response chunks. Rate limits apply, but a 429 is not retried here."""
+        messages = self.prepare_messages(messages)
+        estimated = estimate_tokens(messages, self.expected_output_tokens)
+        if self.scheduler:
+            self.scheduler.acquire(estimated)
+        response = None
+        try:
+            for chunk in self.llm.stream(messages):
+                response = chunk if response is None or isinstance(chunk, str) else response + chunk
+                yield chunk
+        except Exception as e:
+            if self.scheduler and is_rate_limit_error(e):
+                self.scheduler.throttle(retry_after_seconds(e))
+            raise
+        if self.scheduler:
+            self.scheduler.settle(estimated, response)
+
+    def available(self, now: float) -> bool:
+        with self._lock:
+            return now >= self._cooldown_until
+
+    def effective_weight(self) -> float:
+        with self._lock:
+            return self.weight * max(MIN_WEIGHT_FACTOR, 1.0 - self._error_rate)
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._calls += 1
+            self._consecutive_failures = 0
+            self._latency = latency if self._latency is None else (
+                HEALTH_EWMA_ALPHA * latency + (1 - HEALTH_EWMA_ALPHA) * self._latency
+            )
+            self._error_rate *= 1 - HEALTH_EWMA_ALPHA
+
+    def record_failure(self, error: Exception, failure_threshold: int, cooldown: float):
+        with self._lock:
+            self._calls += 1
+            self._failures += 1
+            self._consecutive_failures += 1
+            self._error_rate = HEALTH_EWMA_ALPHA + (1 - HEALTH_EWMA_ALPHA) * self._error_rate
+            self._last_error = f"{type(error).__name__}: {error}"
+            if failure_threshold and self._consecutive_failures >= failure_threshold:
+                self._cooldown_until = time.monotonic() + cooldown
+                logger.warning(f"LLM backend {self.name} failed {self._consecutive_failures} times in a row; "
+                               f"skipping it for {cooldown:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                'name': self.name,
+                'provider': self.provider,
+                'model': self.model,
+                'weight': self.weight,
+                'calls': self._calls,
+                'failures': self._failures,
+                'error_rate': round(self._error_rate, 4),
+                'avg_latency_seconds': round(self._latency, 3) if self._latency is not None else None,
+                'cooling_down_seconds': round(max(0.0, self._cooldown_until - time.monotonic()), 3),
+                'last_error': self._last_error,
+            }
+        if self.scheduler:
+            stats['rate_limit'] = self.scheduler.stats()
+        return stats
+
+    def prepare_messages(self, messages: List[Any]) -> List[Any]:
+        # cache_control content blocks are Anthropic-only; other providers get plain text
+        if self.provider == 'anthropic':
+            return messages
+        return [_without_cache_control(message) for message in messages]
+
+
+class LLMPool:
+    """Spreads LLM calls over weighted backends and fails over when one errors or times out.
+
+    Each call tries the backends in a weighted random order: a backend's configured
+    weight, discounted by its recent error rate. A backend that fails
+    failure_threshold times in a row is tried only as a last resort for the next
+    cooldown seconds. The error of the last backend tried is raised if all fail.
+    """
+
+    def __init__(self, backends: List[LLMBackend], failure_threshold: int = 3, cooldown: float = 30.0):
+        if not backends:
+            raise ValueError("LLMPool needs at least one backend.")
+        self.backends = backends
+        self.failure_threshold = max(0, failure_threshold)
+        self.cooldown = max(0.0, cooldown)
+
+    @property
+    def primary(self) -> LLMBackend:
+        return self.backends[0]
+
+    def has_provider(self, provider: str) -> bool:
+        return any(backend.provider == provider for backend in self.backends)
+
+    def cache_tag(self) -> str:
+        """Short stable id of the backend set, for caches keyed by backend."""
+        backend_ids = ','.join(sorted(f"{backend.provider}/{backend.model}" for backend in self.backends))
+        return hashlib.sha1(backend_ids.encode('utf-8')).hexdigest()[:8]
+
+    def invoke(self, messages: List[Any]) -> Any:
+        candidates = self._candidates()
+        for attempt, backend in enumerate(candidates, start=1):
+            started = time.monotonic()
+            try:
+                response = backend.invoke(messages)
+            except Exception as e:
+                self._on_failure(backend, e, attempt < len(candidates))
+                if attempt == len(candidates):
+                    raise
+                continue
+            backend.record_success(time.monotonic() - started)
+            return response
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        candidates = self._candidates()
+        for attempt, backend in enumerate(candidates, start=1):
+            started = time.monotonic()
+            try:
+                response = await backend.ainvoke(messages)
+            except Exception as e:
+                self._on_failure(backend, e, attempt < len(candidates))
+                if attempt == len(candidates):
+                    raise
+                continue
+            backend.record_success(time.monotonic() - started)
+            return response
+
+    def stream(self, messages: List[Any]) -> Iterator[Any]:
+        """Stream from the first backend that answers. Failover is only possible before the first chunk."""
+        candidates = self._candidates()
+        for attempt, backend in enumerate(candidates, start=1):
+            started = time.monotonic()
+            streamed = False
+            try:
+                for chunk in backend.stream(messages):
+                    streamed = True
+                    yield chunk
+            except Exception as e:
+                self._on_failure(backend, e, not streamed and attempt < len(candidates))
+                if streamed or attempt == len(candidates):
+                    raise
+                continue
+            backend.record_success(time.monotonic() - started)
+            return
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [backend.stats() for backend in self.backends]
+
+    def _candidates(self) -> List[LLMBackend]:
+        """Backends in the order to try them: healthy ones first, each group weighted-shuffled."""
+        if len(self.backends) == 1:
+            return list(self.backends)
+        now = time.monotonic()
+        healthy = [backend for backend in self.backends if backend.available(now)]
+        cooling = [backend for backend in self.backends if backend not in healthy]
+        return _weighted_shuffle(healthy) + _weighted_shuffle(cooling)
+
+    def _on_failure(self, backend: LLMBackend, error: Exception, failing_over: bool):
+        backend.record_failure(error, self.failure_threshold, self.cooldown)
+        if failing_over:
+            logger.warning(f"LLM backend {backend.name} failed ({type(error).__name__}: {error}); failing over")
+
+
+def _weighted_shuffle(backends: List[LLMBackend]) -> List[LLMBackend]:
+    # Efraimidis-Spirakis: sort by u ** (1 / weight); zero-weight backends go last
+    def key(backend: LLMBackend) -> float:
+        weight = backend.effective_weight()
+        return random.random() ** (1.0 / weight) if weight > 0 else -1.0
+    return sorted(backends, key=key, reverse=True)
+
+
+def _without_cache_control(message: Any) -> Any:
+    if not isinstance(message, BaseMessage) or not isinstance(message.content, list):
+        return message
+    content = []
+    for block in message.content:
+        if isinstance(block, dict) and 'cache_control' in block:
+            block = {key: value for key, value in block.items() if key != 'cache_control'}
+        content.append(block)
+    return message.model_copy(update={'content': content})
@@ -0,0 +1,321 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # Rough prompt size estimate; real usage is settled after each call
+RATE_LIMIT_STATUS_CODES = (429, 529)  # 529: Anthropic "overloaded"
+TRANSIENT_ERROR_NAMES = ('APIConnectionError', 'APITimeoutError', 'ConnectError', 'ReadTimeout', 'Timeout')
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY_STEP = 0.05
+
+_schedulers: Dict[Tuple[str, str], "RateLimitScheduler"] = {}
+_schedulers_lock = threading.Lock()
+
+
+def estimate_tokens(messages: Any, expected_output_tokens: int = 0) -> int:
+    """Estimate the tokens a call will use from its prompt length plus the expected output."""
+    if isinstance(messages, str):
+        chars = len(messages)
+    else:
+        chars = sum(len(str(getattr(message, 'content', message))) for message in messages)
+    return chars // CHARS_PER_TOKEN + max(0, expected_output_tokens)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return (getattr(error, 'status_code', None) in RATE_LIMIT_STATUS_CODES
+            or type(error).__name__ == 'RateLimitError')
+
+
+def is_transient_error(error: Exception) -> bool:
+    status_code = getattr(error, 'status_code', None)
+    return (isinstance(status_code, int) and status_code >= 500) or type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the server's retry-after hint from a provider error, if it sent one."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass  # HTTP-date retry-after values fall back to exponential backoff
+    return None
+
+
+class RateLimitScheduler:
+    """Keeps LLM calls for one provider/model within its requests- and tokens-per-minute budgets.
+
+    Both budgets are token buckets that refill continuously and hold up to one
+    minute's worth. Callers are served first-come, first-served; a call that does
+    not fit waits at the head of the queue until the buckets have refilled. Token
+    costs are estimated up front and settled against the real usage reported
+    with the response.
+
+    A 429 pauses every caller until the server's retry-after and halves the refill
+    rate; each success then restores a little of it, so sustained load settles at
+    the provider's actual ceiling. A budget of 0 means unlimited.
+
+    clock is the monotonic time source the buckets refill by; tests pass a fake one.
+    """
+
+    def __init__(self, name: str, requests_per_minute: int = 0, tokens_per_minute: int = 0,
+                 max_retries: int = 5, max_backoff: float = 60.0, transient_retries: int = 2,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.requests_per_minute = max(0, requests_per_minute or 0)
+        self.tokens_per_minute = max(0, tokens_per_minute or 0)
+        self.max_retries = max(0, max_retries)
+        self.max_backoff = max(0.0, max_backoff)
+        self.transient_retries = max(0, transient_retries)
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._queue: deque = deque()
+        # Async callers can't wait on the condition, so they get their own wakeup event
+        self._async_wakeups: Dict[object, Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = {}
+        self._request_bucket = float(self.requests_per_minute)
+        self._token_bucket = float(self.tokens_per_minute)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._rate_factor = 1.0
+        self._stats = {'calls': 0, 'rate_limited': 0, 'retries': 0, 'wait_seconds': 0.0}
+
+    def run(self, func: Callable[..., Any], estimated_tokens: int, *args, **kwargs) -> Any:
+        """Call func once there is budget for it, retrying rate-limit and transient errors."""
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                attempt += 1
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.settle(estimated_tokens, result)
+            return result
+
+    async def arun(self, func: Callable[..., Awaitable[Any]], estimated_tokens: int, *args, **kwargs) -> Any:
+        """Async version of run()."""
+        attempt = 0
+        while True:
+            await self.aacquire(estimated_tokens)
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                attempt += 1
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.settle(estimated_tokens, result)
+            return result
+
+    def acquire(self, tokens: int):
+        """Block until it is this caller's turn and the budgets allow a call of `tokens`."""
+        ticket = object()
+        started = self._clock()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    wait = self._try_take(ticket, tokens)
+                    if wait == 0:
+                        self._stats['wait_seconds'] += self._clock() - started
+                        return
+                    self._cond.wait(wait)
+            finally:
+                self._leave(ticket)
+
+    async def aacquire(self, tokens: int):
+        """Async version of acquire(); shares the same queue and buckets."""
+        ticket = object()
+        started = self._clock()
+        wakeup = asyncio.Event()
+        with self._cond:
+            self._queue.append(ticket)
+            self._async_wakeups[ticket] = (asyncio.get_running_loop(), wakeup)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(ticket, tokens)
+                    if wait == 0:
+                        self._stats['wait_seconds'] += self._clock() - started
+                        return
+                    wakeup.clear()
+                # Sleep until the buckets cover the deficit, or until notified like acquire()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._cond:
+                del self._async_wakeups[ticket]
+                self._leave(ticket)
+
+    def settle(self, estimated_tokens: int, response: Any = None):
+        """Charge the difference between the estimate and the usage the response reports."""
+        usage = getattr(response, 'usage_metadata', None) or {}
+        actual = usage.get('total_tokens') or (usage.get('input_tokens', 0) + usage.get('output_tokens', 0))
+        with self._cond:
+            if actual and self.tokens_per_minute:
+                self._token_bucket -= actual - estimated_tokens
+            self._rate_factor = min(1.0, self._rate_factor + RATE_RECOVERY_STEP)
+
+    def throttle(self, retry_after: Optional[float] = None, attempt: int = 1):
+        """Pause all callers after a rate-limit response and slow the refill rate."""
+        delay = retry_after if retry_after is not None else min(self.max_backoff, 2 ** (attempt - 1))
+        with self._cond:
+            now = self._clock()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + delay)
+            self._rate_factor = max(MIN_RATE_FACTOR, self._rate_factor / 2)
+            self._stats['rate_limited'] += 1
+            self._notify_all()
+        logger.warning(f"LLM rate limit hit for {self.name}; pausing {delay:.1f}s "
+                       f"and running at {self._rate_factor:.0%} of the configured budget")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = self._clock()
+            self._refill(now)
+            return {
+                'requests_per_minute': self.requests_per_minute,
+                'tokens_per_minute': self.tokens_per_minute,
+                'rate_factor': round(self._rate_factor, 3),
+                'queued': len(self._queue),
+                'paused_seconds': round(max(0.0, self._paused_until - now), 3),
+                'calls': self._stats['calls'],
+                'rate_limited': self._stats['rate_limited'],
+                'retries': self._stats['retries'],
+                'wait_seconds': round(self._stats['wait_seconds'], 3),
+            }
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying after error, or None if it should be raised."""
+        if is_rate_limit_error(error) and attempt <= self.max_retries:
+            self.throttle(retry_after_seconds(error), attempt)
+            with self._cond:
+                self._stats['retries'] += 1
+            return 0.0  # The pause is applied in acquire(), in queue order
+        if is_transient_error(error) and attempt <= self.transient_retries:
+            logger.warning(f"LLM call to {self.name} failed ({error}); retry {attempt}/{self.transient_retries}")
+            with self._cond:
+                self._stats['retries'] += 1
+            return min(self.max_backoff, 2 ** (attempt - 1))
+        return None
+
+    def _try_take(self, ticket: object, tokens: int) -> Optional[float]:
+        """Take budget for ticket if it is at the head of the queue and fits.
+
+        Returns 0 when taken, otherwise how long to wait (None: until notified).
+        Must be called with the condition held.
+        """
+        if self._queue[0] is not ticket:
+            return None
+        now = self._clock()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        wait = 0.0
+        if self.requests_per_minute:
+            wait = max(wait, self._deficit_seconds(self._request_bucket, 1, self.requests_per_minute))
+        # A call larger than the whole budget only has to wait for a full bucket
+        needed_tokens = min(tokens, self.tokens_per_minute)
+        if self.tokens_per_minute:
+            wait = max(wait, self._deficit_seconds(self._token_bucket, needed_tokens, self.tokens_per_minute))
+        if wait > 0:
+            return wait
+
+        if self.requests_per_minute:
+            self._request_bucket -= 1
+        if self.tokens_per_minute:
+            self._token_bucket -= tokens
+        self._stats['calls'] += 1
+        return 0
+
+    def _deficit_seconds(self, bucket: float, needed: float, per_minute: int) -> float:
+        return max(0.0, (needed - bucket) / (per_minute * self._rate_factor / 60.0))
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if elapsed <= 0:
+            return
+        if self.requests_per_minute:
+            self._request_bucket = min(
+                self.requests_per_minute,
+                self._request_bucket + elapsed * self.requests_per_minute * self._rate_factor / 60.0
+            )
+        if self.tokens_per_minute:
+            self._token_bucket = min(
+                self.tokens_per_minute,
+                self._token_bucket + elapsed * self.tokens_per_minute * self._rate_factor / 60.0
+            )
+
+    def _leave(self, ticket: object):
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+        self._notify_all()
+
+    def _notify_all(self):
+        """Wake every waiter, sync and async, to re-check its turn. Must be called with the condition held."""
+        self._cond.notify_all()
+        for loop, wakeup in self._async_wakeups.values():
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # The waiter's loop is closed
+
+
+def rate_limits_for(config: Config, provider: str, model: str) -> Tuple[int, int]:
+    """(requests_per_minute, tokens_per_minute) for a provider/model.
+
+    Entries in llm.rate_limit.models keyed "provider/model" win over ones keyed
+    "provider", which win over the global budgets.
+    """
+    limits = config.llm_rate_limits.get(f"{provider}/{model}") or config.llm_rate_limits.get(provider) or {}
+    return (
+        limits.get('requests_per_minute', config.llm_requests_per_minute),
+        limits.get('tokens_per_minute', config.llm_tokens_per_minute),
+    )
+
+
+def get_scheduler(config: Config, provider: str, model: str) -> Optional[RateLimitScheduler]:
+    """Return the process-wide scheduler for a provider/model, or None if it has no budget.
+
+    Schedulers are shared so every analyzer in the process draws from the same
+    provider budget.
+    """
+    provider = provider.lower()
+    requests_per_minute, tokens_per_minute = rate_limits_for(config, provider, model)
+    if not requests_per_minute and not tokens_per_minute:
+        return None
+    with _schedulers_lock:
+        scheduler = _schedulers.get((provider, model))
+        if scheduler is None:
+            scheduler = RateLimitScheduler(
+                f"{provider}/{model}",
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+                max_retries=config.llm_rate_limit_max_retries,
+                max_backoff=config.llm_rate_limit_max_backoff,
+                transient_retries=config.llm_max_retries,
+            )
+            _schedulers[(provider, model)] = scheduler
+            logger.info(f"LLM rate limits for {provider}/{model}: "
+                        f"{requests_per_minute or 'unlimited'} requests/min, {tokens_per_minute or 'unlimited'} tokens/min")
+        return scheduler
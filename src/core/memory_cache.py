@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with a TTL, bounded by total size in bytes.
+
+    Callers pass the size of each value (typically the length of its serialized
+    form) when storing it. Least recently used entries are evicted once the total
+    exceeds max_bytes; entries older than ttl_seconds are treated as misses.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (value, size, expires_at, created_at)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, size: int, created_at: Optional[datetime] = None):
+        if size > self.max_bytes:
+            return  # Would evict everything else; not worth caching
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (
+                value, size, time.monotonic() + self.ttl_seconds,
+                created_at or datetime.utcnow()
+            )
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def evict_where(self, predicate: Callable[[Hashable, datetime], bool]) -> int:
+        """Remove entries for which predicate(key, created_at) is true. Returns the count."""
+        with self._lock:
+            doomed = [key for key, entry in self._entries.items() if predicate(key, entry[3])]
+            for key in doomed:
+                self._remove(key)
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[1]
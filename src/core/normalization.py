@@ -0,0 +1,151 @@
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+# Letters NFKD leaves alone because they aren't a base letter plus an accent
+EXTRA_FOLDS = str.maketrans({
+    'ø': 'o', 'æ': 'ae', 'œ': 'oe', 'ł': 'l', 'đ': 'd', 'ð': 'd', 'þ': 'th', 'ı': 'i',
+})
+APOSTROPHES = re.compile(r"['’‘`´]")
+NON_WORD = re.compile(r'[\W_]+')
+# Words that set a recording apart from its namesake: fuzzy matches must agree on them
+MARKERS = re.compile(r'\b(?:\d+|live|remix|acoustic|demo|instrumental|unplugged)\b')
+
+# "feat. X", "ft X", "(featuring X)" and everything after it
+FEATURING = re.compile(r'(?:\s+|\s*[(\[])(?:feat|ft|featuring)\b\.?.*$')
+# A bracketed segment, or a " - " suffix, of a title
+BRACKETED = re.compile(r'\s*[(\[]([^)\]]*)[)\]]')
+DASH_SUFFIX = re.compile(r'\s+[-–—]\s+(.*)$')
+# Tags that mark another release of the same recording, not a different one. Remixes,
+# live recordings and soundtrack versions ("From ...") stay in the key, since their
+# lyrics often differ; year-dated mixes are remasters of the mix.
+VERSION_TAG = re.compile(
+    r'^(?:'
+    r'(?:\d{4}\s+)?(?:digital(?:ly)?\s+)?remaster(?:ed)?(?:\s+\d{4})?(?:\s+(?:version|edition))?'
+    r'|(?:radio|single|album|original|mono|stereo|extended|clean|explicit)\s+(?:edit|version|mix)'
+    r'|mono|stereo|explicit|clean|edit|bonus\s+track|deluxe(?:\s+(?:edition|version))?'
+    r'|\d{4}\s+mix'
+    r')$'
+)
+
+TRIGRAM_PADDING = '  '
+DEFAULT_FUZZY_THRESHOLD = 0.8
+
+
+def fold_text(text: str) -> str:
+    """Case- and accent-insensitive form of text: 'Beyoncé' and 'BEYONCE' fold alike."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.casefold().translate(EXTRA_FOLDS)
+
+
+def _collapse(text: str) -> str:
+    """Drop apostrophes, turn '&' into 'and' and collapse other punctuation into single spaces."""
+    text = APOSTROPHES.sub('', text).replace('&', ' and ')
+    return NON_WORD.sub(' ', text).strip()
+
+
+def normalize_artist(artist: str) -> str:
+    """Canonical artist name: folded, without featured artists, punctuation or a leading 'the'."""
+    folded = fold_text(artist).strip()
+    name = _collapse(FEATURING.sub('', folded))
+    # "The The" keeps both words, so it doesn't become "The"
+    if name.startswith('the ') and name[4:] != 'the':
+        name = name[4:]
+    # Names made only of punctuation ("!!!") keep their folded form
+    return name or folded
+
+
+def normalize_title(title: str) -> str:
+    """Canonical song title: folded, without featuring or version tags and punctuation."""
+    folded = fold_text(title).strip()
+    text = BRACKETED.sub(lambda match: '' if _is_tag(match.group(1)) else f' {match.group(1)} ', folded)
+    suffix = DASH_SUFFIX.search(text)
+    if suffix and _is_tag(suffix.group(1)):
+        text = text[:suffix.start()]
+    name = _collapse(FEATURING.sub('', text))
+    return name or folded
+
+
+def _is_tag(text: str) -> bool:
+    text = _collapse(text)
+    return bool(re.match(r'^(?:feat|ft|featuring)\b', text) or VERSION_TAG.match(text))
+
+
+def canonical_song_key(artist: str, title: str) -> str:
+    """The 'artist:title' string that spelling variants of one song share."""
+    return f"{normalize_artist(artist)}:{normalize_title(title)}"
+
+
+def _markers(text: str) -> Tuple[str, ...]:
+    return tuple(sorted(MARKERS.findall(text)))
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"{TRIGRAM_PADDING}{text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """In-memory fuzzy matcher over canonical song keys.
+
+    Similarity is the Jaccard index of the two strings' character trigrams, which
+    tolerates the odd typo ('carptenter') but not a different song. Candidates
+    must also contain the same numbers and marker words, so 'part 1' never
+    matches 'part 2' and a live recording never matches the studio one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[str, Set[str], Tuple[str, ...]]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def add(self, key: str, text: str):
+        """Index text (a canonical song key) under key, replacing what key held before."""
+        trigrams = _trigrams(text)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (text, trigrams, _markers(text))
+            for trigram in trigrams:
+                self._postings[trigram].add(key)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def best_match(self, text: str, threshold: float = DEFAULT_FUZZY_THRESHOLD) -> Optional[Tuple[str, float]]:
+        """The key of the most similar indexed text, and its similarity, if it reaches threshold."""
+        trigrams = _trigrams(text)
+        markers = _markers(text)
+        with self._lock:
+            shared: Dict[str, int] = defaultdict(int)
+            for trigram in trigrams:
+                for key in self._postings.get(trigram, ()):
+                    shared[key] += 1
+            best: Optional[Tuple[str, float]] = None
+            for key, count in shared.items():
+                _, candidate_trigrams, candidate_markers = self._entries[key]
+                if candidate_markers != markers:
+                    continue
+                score = count / (len(trigrams) + len(candidate_trigrams) - count)
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (key, score)
+        return best
+
+    def _remove(self, key: str):
+        """Drop key from the index. Lock must be held."""
+        entry = self._entries.pop(key, None)
+        if entry:
+            for trigram in entry[1]:
+                keys = self._postings.get(trigram)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self._postings[trigram]
+
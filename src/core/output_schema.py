@@ -0,0 +1,57 @@
+import json
+import re
+from typing import Any, Dict, Iterable, Optional
+
+from jsonschema import Draft7Validator
+
+# The ```json block under a framework's "Analysis Template" heading is the output the model is asked for
+TEMPLATE_PATTERN = re.compile(r"^#+\s*Analysis Template[^\n]*\n.*?```json\s*\n(.*?)\n\s*```", re.S | re.M)
+REQUIRED_KEY_DEPTH = 2  # Require the keys of the top two object levels; deeper objects are only type-checked
+
+
+def template_from_prompt(prompt: str) -> Optional[Dict[str, Any]]:
+    """The framework's JSON output template, or None if it has none that parses."""
+    match = TEMPLATE_PATTERN.search(prompt)
+    if not match:
+        return None
+    try:
+        template = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+    return template if isinstance(template, dict) else None
+
+
+def schema_from_template(template: Any, depth: int = REQUIRED_KEY_DEPTH) -> Dict[str, Any]:
+    """Derive a JSON schema from an example document.
+
+    Objects and arrays must keep their type, and objects within `depth` levels must
+    have every key of the template. Scalars are left unconstrained, since models
+    legitimately vary them (0 vs 0.0, null scores, free-text labels).
+    """
+    if isinstance(template, dict):
+        schema: Dict[str, Any] = {'type': 'object'}
+        if depth > 0:
+            schema['required'] = list(template)
+            schema['properties'] = {key: schema_from_template(value, depth - 1) for key, value in template.items()}
+        return schema
+    if isinstance(template, list):
+        return {'type': 'array'}
+    return {}
+
+
+def subset_schema(template: Dict[str, Any], keys: Iterable[str]) -> Dict[str, Any]:
+    """Schema for just some top-level fields of a template."""
+    return schema_from_template({key: template[key] for key in keys if key in template})
+
+
+def validation_error(result: Any, schema: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Describe the first way result breaks schema, or None if it conforms."""
+    if not schema:
+        return None
+    errors = sorted(Draft7Validator(schema).iter_errors(result), key=lambda error: list(error.absolute_path))
+    if not errors:
+        return None
+    error = errors[0]
+    location = '.'.join(str(part) for part in error.absolute_path) or '<root>'
+    more = f" (and {len(errors) - 1} more)" if len(errors) > 1 else ''
+    return f"{location}: {error.message}{more}"
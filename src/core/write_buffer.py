@@ -0,0 +1,143 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Collects cache rows in memory and writes them out in batches.
+
+    Rows are grouped by kind (e.g. 'lyrics', 'analysis') and keyed, so repeated
+    writes to the same key before a flush collapse into the latest one. A flush
+    happens when max_rows rows are pending or flush_interval seconds have passed,
+    whichever comes first, and hands all pending rows to flush_callback in one call.
+
+    If that call fails, the rows are written one at a time so a single bad row
+    can't hold back the rest. A row that keeps failing is dropped after
+    max_attempts flushes instead of being retried forever.
+    """
+
+    def __init__(
+        self,
+        flush_callback: Callable[[Dict[str, List[Dict[str, Any]]]], None],
+        max_rows: int = 500,
+        flush_interval: float = 5.0,
+        max_attempts: int = 3,
+    ):
+        self.flush_callback = flush_callback
+        self.max_rows = max(1, max_rows)
+        self.flush_interval = max(0.1, flush_interval)
+        self.max_attempts = max(1, max_attempts)
+        self._pending: Dict[str, Dict[Hashable, Dict[str, Any]]] = {}
+        self._pending_count = 0
+        self._attempts: Dict[Tuple[str, Hashable], int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Serializes flushes so batches land in order
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="cache-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def add(self, kind: str, key: Hashable, row: Dict[str, Any]):
+        """Queue a row for writing, replacing any pending row with the same key."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write-behind buffer is closed.")
+            rows = self._pending.setdefault(kind, {})
+            if key not in rows:
+                self._pending_count += 1
+            rows[key] = row
+            self._attempts.pop((kind, key), None)
+            full = self._pending_count >= self.max_rows
+        if full:
+            self._wakeup.set()
+
+    def get(self, kind: str, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Return a row that is queued but not yet flushed, so reads see recent writes."""
+        with self._lock:
+            return self._pending.get(kind, {}).get(key)
+
+    def pending_rows(self, kind: str) -> List[Dict[str, Any]]:
+        """Return all queued rows of one kind, for reads that can't go by key."""
+        with self._lock:
+            return list(self._pending.get(kind, {}).values())
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._pending_count
+
+    def flush(self):
+        """Write out all pending rows now."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending_count:
+                    return
+                # Keep rows visible to get() until they are written
+                snapshot = {kind: dict(rows) for kind, rows in self._pending.items() if rows}
+            batch = {kind: list(rows.values()) for kind, rows in snapshot.items()}
+            total = sum(len(rows) for rows in batch.values())
+            failed: Dict[str, Dict[Hashable, Exception]] = {}
+            try:
+                self.flush_callback(batch)
+            except Exception as e:
+                logger.warning(f"Write-behind flush of {total} rows failed, writing them one at a time: {e}")
+                failed = self._flush_rows(snapshot)
+            with self._lock:
+                for kind, rows in snapshot.items():
+                    pending_rows = self._pending.get(kind, {})
+                    for key, row in rows.items():
+                        # Rows replaced while the flush ran are left for the next one
+                        if pending_rows.get(key) is not row:
+                            continue
+                        error = failed.get(kind, {}).get(key)
+                        if error is not None:
+                            attempts = self._attempts.get((kind, key), 0) + 1
+                            if attempts < self.max_attempts:
+                                self._attempts[(kind, key)] = attempts
+                                continue
+                            logger.error(
+                                f"Dropping write-behind {kind} row {key!r} after {attempts} failed attempts: {error}"
+                            )
+                        self._attempts.pop((kind, key), None)
+                        del pending_rows[key]
+                        self._pending_count -= 1
+            failed_count = sum(len(errors) for errors in failed.values())
+            logger.debug(f"Write-behind flushed {total - failed_count} rows, {failed_count} failed")
+
+    def _flush_rows(self, snapshot: Dict[str, Dict[Hashable, Dict[str, Any]]]) -> Dict[str, Dict[Hashable, Exception]]:
+        """Write rows one per callback and return the ones that still fail, with their errors."""
+        failed: Dict[str, Dict[Hashable, Exception]] = {}
+        for kind, rows in snapshot.items():
+            for key, row in rows.items():
+                try:
+                    self.flush_callback({kind: [row]})
+                except Exception as e:
+                    failed.setdefault(kind, {})[key] = e
+        return failed
+
+    def close(self):
+        """Stop the background thread and flush what is left."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            with self._lock:
+                closed = self._closed
+            if closed:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep the flush thread alive; the rows stay pending for the next tick
+                logger.error(f"Write-behind flush failed: {e}", exc_info=True)
@@ -1,10 +1,15 @@
+import asyncio
 import lyricsgenius
 from typing import Optional, Dict, Any
 import logging
 
+from src.providers.http import ProviderError
+
 logger = logging.getLogger(__name__)
 
 class GeniusProvider:
+    name = "genius"
+    
     def __init__(self, token: str):
         try:
             self.genius = lyricsgenius.Genius(token, verbose=False, remove_section_headers=True, skip_non_songs=True, retries=2)
@@ -14,13 +19,20 @@ class GeniusProvider:
             # Optionally, re-raise or handle more gracefully depending on desired behavior
             # raise ConnectionError(f"Could not initialize Genius client: {e}") from e
     
-    def search(self, artist: str, title: str) -> Optional[Dict[str, Any]]:
-        """Search lyrics using Genius API"""
+    def search(self, artist: str, title: str, track_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Search lyrics using Genius API. A known track_id (Genius song ID) skips the search request."""
         if not self.genius:
             logger.warning("Genius client not initialized. Cannot search.")
-            return None
+            raise ProviderError("Genius client not initialized")
         try:
-            song = self.genius.search_song(title, artist)
+            song = None
+            if track_id:
+                song = self.genius.search_song(song_id=int(track_id))
+                if not song or not song.lyrics:
+                    logger.info(f"Genius: Stored song ID {track_id} for '{artist} - {title}' returned no lyrics. Searching again.")
+                    song = None
+            if song is None:
+                song = self.genius.search_song(title, artist)
             if song and song.lyrics:
                 # Clean up lyrics: remove [Verse], [Chorus] etc. and extra newlines
                 cleaned_lyrics = song.lyrics
@@ -39,6 +51,11 @@ class GeniusProvider:
         except Exception as e:
             # lyricsgenius can raise various exceptions, including timeout
             logger.error(f"Genius API error for '{artist} - {title}': {e}")
-            # Do not re-raise here to allow fallback to other providers
+            # Discovery falls back to other providers; ProviderError keeps this from being cached as a miss
+            raise ProviderError(f"Genius API error: {e}") from e
         
         return None
+    
+    async def asearch(self, artist: str, title: str, client=None, track_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Async version of search(). lyricsgenius is blocking, so it runs in a worker thread."""
+        return await asyncio.to_thread(self.search, artist, title, track_id)
@@ -0,0 +1,117 @@
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from src.core.config import Config
+
+
+class ProviderError(Exception):
+    """A provider could not answer: network error, timeout, server or auth error.
+
+    Unlike a None search result, it says nothing about whether the provider has
+    the song, so it must not be cached as a miss.
+    """
+
+
+class ConnectionCounter:
+    """Thread-safe counts of HTTP requests sent and connections opened."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_created = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.connections_created += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'connections_created': self.connections_created,
+                # Every request needs a connection; the ones not newly opened were reused
+                'connections_reused': max(0, self.requests - self.connections_created),
+            }
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts requests and newly opened connections."""
+
+    def __init__(self, counter: ConnectionCounter, **kwargs):
+        self.counter = counter
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        counter = self.counter
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                counter.record_connection()
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                counter.record_connection()
+                return super()._new_conn()
+
+        # Per-instance override; the module-level defaults stay untouched
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        self.counter.record_request()
+        return super().send(request, **kwargs)
+
+
+class ProviderSession(requests.Session):
+    """requests.Session shared by the lyrics providers.
+
+    Keeps connections alive in per-host pools, so repeated lookups (and the two
+    Musixmatch round trips) skip the TCP and TLS handshake. Requests that don't pass
+    a timeout get the configured default.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 timeout: float = 10.0, max_retries: int = 0):
+        super().__init__()
+        self.timeout = timeout
+        self.counter = ConnectionCounter()
+        adapter = CountingHTTPAdapter(
+            self.counter,
+            pool_connections=max(1, pool_connections),
+            pool_maxsize=max(1, pool_maxsize),
+            max_retries=max_retries,
+        )
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().request(method, url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'timeout_seconds': self.timeout, **self.counter.stats()}
+
+
+def create_provider_session(config: Optional[Config] = None) -> ProviderSession:
+    """Build the shared provider session from the providers.http settings."""
+    if config is None:
+        return ProviderSession()
+    return ProviderSession(
+        pool_connections=config.provider_http_pool_connections,
+        pool_maxsize=config.provider_http_pool_maxsize,
+        timeout=config.provider_http_timeout,
+        max_retries=config.provider_http_max_retries,
+    )
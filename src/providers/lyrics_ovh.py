@@ -1,46 +1,86 @@
+import httpx
 import requests
 from typing import Optional, Dict, Any
 from urllib.parse import quote
 import logging
 
+from src.providers.http import ProviderError, ProviderSession
+
 logger = logging.getLogger(__name__)
 
 class LyricsOVHProvider:
+    name = "lyrics_ovh"
     BASE_URL = "https://api.lyrics.ovh/v1"
     
+    def __init__(self, session: Optional[requests.Session] = None):
+        # Shared keep-alive session; a private one if none is given
+        self.session = session or ProviderSession()
+    
     def search(self, artist: str, title: str) -> Optional[Dict[str, Any]]:
         """Search lyrics using lyrics.ovh API"""
         try:
-            encoded_artist = quote(artist)
-            encoded_title = quote(title)
-            
-            url = f"{self.BASE_URL}/{encoded_artist}/{encoded_title}"
-            response = requests.get(url, timeout=10) # 10 seconds timeout
+            response = self.session.get(self._build_url(artist, title))
             
             response.raise_for_status() # Will raise HTTPError for bad responses (4xx or 5xx)
             
-            data = response.json()
-            lyrics = data.get('lyrics', '').strip()
-            
-            if lyrics:
-                # Basic cleaning: replace multiple newlines with single, remove leading/trailing on each line
-                cleaned_lyrics = '\n'.join([line.strip() for line in lyrics.split('\n')])
-                cleaned_lyrics = requests.utils.unquote(cleaned_lyrics) # Handle URL encoded chars if any
-                return {
-                    'lyrics': cleaned_lyrics.strip(),
-                    'source': 'lyrics_ovh',
-                    'confidence': 0.7 # Confidence is lower as it's a free API with less metadata
-                }
+            return self._parse_response(response.json())
         except requests.exceptions.HTTPError as http_err:
             if http_err.response.status_code == 404:
                 logger.info(f"Lyrics.ovh: No lyrics found for '{artist} - {title}' (404).")
             else:
                 logger.warning(f"Lyrics.ovh API HTTP error for '{artist} - {title}': {http_err}")
+                raise ProviderError(f"Lyrics.ovh HTTP error: {http_err}") from http_err
         except requests.exceptions.RequestException as e:
             # Includes timeouts, connection errors, etc.
             logger.error(f"Lyrics.ovh API request error for '{artist} - {title}': {e}")
+            raise ProviderError(f"Lyrics.ovh request error: {e}") from e
+        except Exception as e:
+            logger.error(f"Unexpected error in Lyrics.ovh provider for '{artist} - {title}': {e}")
+            # Raised as ProviderError so discovery falls back without caching a miss
+            raise ProviderError(f"Unexpected Lyrics.ovh error: {e}") from e
+        
+        return None
+
+    async def asearch(self, artist: str, title: str, client: Optional[httpx.AsyncClient] = None) -> Optional[Dict[str, Any]]:
+        """Async version of search(), using the given pooled client if any."""
+        try:
+            if client is None:
+                async with httpx.AsyncClient(timeout=10) as own_client:
+                    response = await own_client.get(self._build_url(artist, title))
+            else:
+                response = await client.get(self._build_url(artist, title))
+            
+            response.raise_for_status()
+            
+            return self._parse_response(response.json())
+        except httpx.HTTPStatusError as http_err:
+            if http_err.response.status_code == 404:
+                logger.info(f"Lyrics.ovh: No lyrics found for '{artist} - {title}' (404).")
+            else:
+                logger.warning(f"Lyrics.ovh API HTTP error for '{artist} - {title}': {http_err}")
+                raise ProviderError(f"Lyrics.ovh HTTP error: {http_err}") from http_err
+        except httpx.RequestError as e:
+            logger.error(f"Lyrics.ovh API request error for '{artist} - {title}': {e}")
+            raise ProviderError(f"Lyrics.ovh request error: {e}") from e
         except Exception as e:
             logger.error(f"Unexpected error in Lyrics.ovh provider for '{artist} - {title}': {e}")
-            # Do not re-raise here to allow fallback
+            raise ProviderError(f"Unexpected Lyrics.ovh error: {e}") from e
+        
+        return None
+    
+    def _build_url(self, artist: str, title: str) -> str:
+        return f"{self.BASE_URL}/{quote(artist)}/{quote(title)}"
+    
+    def _parse_response(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        lyrics = data.get('lyrics', '').strip()
         
+        if lyrics:
+            # Basic cleaning: replace multiple newlines with single, remove leading/trailing on each line
+            cleaned_lyrics = '\n'.join([line.strip() for line in lyrics.split('\n')])
+            cleaned_lyrics = requests.utils.unquote(cleaned_lyrics) # Handle URL encoded chars if any
+            return {
+                'lyrics': cleaned_lyrics.strip(),
+                'source': 'lyrics_ovh',
+                'confidence': 0.7 # Confidence is lower as it's a free API with less metadata
+            }
         return None
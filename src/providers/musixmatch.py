@@ -1,97 +1,184 @@
+import httpx
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 import logging
 
+from src.providers.http import ProviderError, ProviderSession
+
 logger = logging.getLogger(__name__)
 
 class MusixmatchProvider:
+    name = "musixmatch"
     BASE_URL = "https://api.musixmatch.com/ws/1.1"
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, session: Optional[requests.Session] = None):
         self.api_key = api_key
+        # Shared keep-alive session, so both round trips of a lookup reuse one connection
+        self.session = session or ProviderSession()
     
-    def search(self, artist: str, title: str) -> Optional[Dict[str, Any]]:
-        """Search lyrics using Musixmatch API"""
+    def search(self, artist: str, title: str, track_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Search lyrics using Musixmatch API. A known track_id skips the track.search round trip."""
         if not self.api_key:
             logger.warning("Musixmatch API key not provided. Cannot search.")
             return None
         try:
-            params = {
-                'format': 'json',
-                'apikey': self.api_key,
-                'q_artist': artist,
-                'q_track': title,
-                's_track_rating': 'desc' # Get best match
-            }
+            if track_id:
+                lyrics_response = self.session.get(
+                    f"{self.BASE_URL}/track.lyrics.get", params=self._lyrics_params(track_id, None)
+                )
+                lyrics_response.raise_for_status()
+                result = self._parse_lyrics(lyrics_response.json(), {}, track_id, artist, title)
+                if result:
+                    return result
+                logger.info(f"Musixmatch: Stored track ID {track_id} for '{artist} - {title}' returned no lyrics. Searching again.")
             
             # First, search for the track to get its ID
             track_search_url = f"{self.BASE_URL}/track.search"
-            track_response = requests.get(track_search_url, params=params, timeout=10)
+            track_response = self.session.get(track_search_url, params=self._track_search_params(artist, title))
             track_response.raise_for_status()
-            track_data = track_response.json()
-
-            track_message = track_data.get('message', {})
-            if track_message.get('header', {}).get('status_code') != 200 or not track_message.get('body', {}).get('track_list'):
-                logger.info(f"Musixmatch: Track not found for '{artist} - {title}'. Response: {track_data}")
-                return None
-
-            # Get the first track (best match)
-            track_info = track_message['body']['track_list'][0]['track']
-            track_id = track_info.get('track_id')
-            common_track_id = track_info.get('commontrack_id') # Prefer commontrack_id if available
-
-            if not track_id and not common_track_id:
-                logger.info(f"Musixmatch: No track ID found for '{artist} - {title}'.")
+            track = self._parse_track(track_response.json(), artist, title)
+            if not track:
                 return None
+            track_info, track_id, common_track_id = track
 
             # Now get lyrics using the track_id or commontrack_id
-            lyrics_params = {
-                'format': 'json',
-                'apikey': self.api_key,
-            }
-            if common_track_id:
-                 lyrics_params['commontrack_id'] = common_track_id
-            else:
-                 lyrics_params['track_id'] = track_id
-
             lyrics_get_url = f"{self.BASE_URL}/track.lyrics.get"
-            lyrics_response = requests.get(lyrics_get_url, params=lyrics_params, timeout=10)
+            lyrics_response = self.session.get(lyrics_get_url, params=self._lyrics_params(track_id, common_track_id))
             lyrics_response.raise_for_status()
-            lyrics_data = lyrics_response.json()
-            
-            lyrics_message = lyrics_data.get('message', {})
-            if lyrics_message.get('header', {}).get('status_code') == 200:
-                lyrics_body = lyrics_message.get('body', {}).get('lyrics', {})
-                lyrics_text = lyrics_body.get('lyrics_body', '').strip()
-                
-                # Musixmatch often returns '******* This Lyrics is NOT for Commercial use *******' or similar
-                # We should try to remove this if present and if it's a significant portion of the text it might mean no actual lyrics
-                if "*******" in lyrics_text and len(lyrics_text) < 200: # Arbitrary length check
-                    logger.info(f"Musixmatch: Lyrics for '{artist} - {title}' seem to be restricted or placeholder.")
-                    return None
-
-                # Remove common disclaimers
-                lyrics_text = lyrics_text.split("*******")[0].strip()
-                
-                if lyrics_text and len(lyrics_text) > 20: # Basic check for non-empty lyrics
-                    return {
-                        'lyrics': lyrics_text,
-                        'source': 'musixmatch',
-                        'confidence': 0.8,
-                        'musixmatch_id': track_id,
-                        'copyright_info': lyrics_body.get('lyrics_copyright'),
-                        'track_url': track_info.get('track_share_url')
-                    }
-                else:
-                    logger.info(f"Musixmatch: Empty or very short lyrics returned for '{artist} - {title}'.")
-            else:
-                logger.warning(f"Musixmatch API error getting lyrics for '{artist} - {title}'. Status: {lyrics_message.get('header', {}).get('status_code')}. Response: {lyrics_data}")
+            return self._parse_lyrics(lyrics_response.json(), track_info, track_id, artist, title)
 
+        except ProviderError:
+            raise
         except requests.exceptions.HTTPError as http_err:
             logger.warning(f"Musixmatch API HTTP error for '{artist} - {title}': {http_err}. Response: {http_err.response.text}")
+            raise ProviderError(f"Musixmatch HTTP error: {http_err}") from http_err
         except requests.exceptions.RequestException as e:
             logger.error(f"Musixmatch API request error for '{artist} - {title}': {e}")
+            raise ProviderError(f"Musixmatch request error: {e}") from e
+        except Exception as e:
+            logger.error(f"Unexpected error in Musixmatch provider for '{artist} - {title}': {e}")
+            raise ProviderError(f"Unexpected Musixmatch error: {e}") from e
+
+    async def asearch(self, artist: str, title: str, client: Optional[httpx.AsyncClient] = None,
+                      track_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Async version of search(), using the given pooled client if any."""
+        if not self.api_key:
+            logger.warning("Musixmatch API key not provided. Cannot search.")
+            return None
+        if client is None:
+            async with httpx.AsyncClient(timeout=10) as own_client:
+                return await self.asearch(artist, title, own_client, track_id)
+        try:
+            if track_id:
+                lyrics_response = await client.get(
+                    f"{self.BASE_URL}/track.lyrics.get", params=self._lyrics_params(track_id, None)
+                )
+                lyrics_response.raise_for_status()
+                result = self._parse_lyrics(lyrics_response.json(), {}, track_id, artist, title)
+                if result:
+                    return result
+                logger.info(f"Musixmatch: Stored track ID {track_id} for '{artist} - {title}' returned no lyrics. Searching again.")
+            
+            track_response = await client.get(
+                f"{self.BASE_URL}/track.search", params=self._track_search_params(artist, title)
+            )
+            track_response.raise_for_status()
+            track = self._parse_track(track_response.json(), artist, title)
+            if not track:
+                return None
+            track_info, track_id, common_track_id = track
+            
+            lyrics_response = await client.get(
+                f"{self.BASE_URL}/track.lyrics.get", params=self._lyrics_params(track_id, common_track_id)
+            )
+            lyrics_response.raise_for_status()
+            return self._parse_lyrics(lyrics_response.json(), track_info, track_id, artist, title)
+        
+        except ProviderError:
+            raise
+        except httpx.HTTPStatusError as http_err:
+            logger.warning(f"Musixmatch API HTTP error for '{artist} - {title}': {http_err}. Response: {http_err.response.text}")
+            raise ProviderError(f"Musixmatch HTTP error: {http_err}") from http_err
+        except httpx.RequestError as e:
+            logger.error(f"Musixmatch API request error for '{artist} - {title}': {e}")
+            raise ProviderError(f"Musixmatch request error: {e}") from e
         except Exception as e:
             logger.error(f"Unexpected error in Musixmatch provider for '{artist} - {title}': {e}")
+            raise ProviderError(f"Unexpected Musixmatch error: {e}") from e
+    
+    def _track_search_params(self, artist: str, title: str) -> Dict[str, Any]:
+        return {
+            'format': 'json',
+            'apikey': self.api_key,
+            'q_artist': artist,
+            'q_track': title,
+            's_track_rating': 'desc' # Get best match
+        }
+    
+    def _parse_track(self, track_data: Dict[str, Any], artist: str, title: str) -> Optional[Tuple[Dict[str, Any], Any, Any]]:
+        """Pick the best track from a track.search response. Returns (track_info, track_id, commontrack_id)."""
+        track_message = track_data.get('message', {})
+        self._check_status(track_message)
+        if track_message.get('header', {}).get('status_code') != 200 or not track_message.get('body', {}).get('track_list'):
+            logger.info(f"Musixmatch: Track not found for '{artist} - {title}'. Response: {track_data}")
+            return None
+        
+        # Get the first track (best match)
+        track_info = track_message['body']['track_list'][0]['track']
+        track_id = track_info.get('track_id')
+        common_track_id = track_info.get('commontrack_id') # Prefer commontrack_id if available
         
+        if not track_id and not common_track_id:
+            logger.info(f"Musixmatch: No track ID found for '{artist} - {title}'.")
+            return None
+        return track_info, track_id, common_track_id
+    
+    @staticmethod
+    def _check_status(message: Dict[str, Any]):
+        """Raise ProviderError for API statuses that are failures rather than 'not found' (bad key, quota, server error)."""
+        status_code = message.get('header', {}).get('status_code')
+        if status_code not in (200, 404):
+            raise ProviderError(f"Musixmatch API status {status_code}")
+    
+    def _lyrics_params(self, track_id: Any, common_track_id: Any) -> Dict[str, Any]:
+        lyrics_params = {
+            'format': 'json',
+            'apikey': self.api_key,
+        }
+        if common_track_id:
+             lyrics_params['commontrack_id'] = common_track_id
+        else:
+             lyrics_params['track_id'] = track_id
+        return lyrics_params
+    
+    def _parse_lyrics(self, lyrics_data: Dict[str, Any], track_info: Dict[str, Any], track_id: Any,
+                      artist: str, title: str) -> Optional[Dict[str, Any]]:
+        lyrics_message = lyrics_data.get('message', {})
+        self._check_status(lyrics_message)
+        if lyrics_message.get('header', {}).get('status_code') == 200:
+            lyrics_body = lyrics_message.get('body', {}).get('lyrics', {})
+            lyrics_text = lyrics_body.get('lyrics_body', '').strip()
+            
+            # Musixmatch often returns '******* This Lyrics is NOT for Commercial use *******' or similar
+            # We should try to remove this if present and if it's a significant portion of the text it might mean no actual lyrics
+            if "*******" in lyrics_text and len(lyrics_text) < 200: # Arbitrary length check
+                logger.info(f"Musixmatch: Lyrics for '{artist} - {title}' seem to be restricted or placeholder.")
+                return None
+            
+            # Remove common disclaimers
+            lyrics_text = lyrics_text.split("*******")[0].strip()
+            
+            if lyrics_text and len(lyrics_text) > 20: # Basic check for non-empty lyrics
+                return {
+                    'lyrics': lyrics_text,
+                    'source': 'musixmatch',
+                    'confidence': 0.8,
+                    'musixmatch_id': track_id,
+                    'copyright_info': lyrics_body.get('lyrics_copyright'),
+                    'track_url': track_info.get('track_share_url')
+                }
+            else:
+                logger.info(f"Musixmatch: Empty or very short lyrics returned for '{artist} - {title}'.")
+        else:
+            logger.warning(f"Musixmatch API error getting lyrics for '{artist} - {title}'. Status: {lyrics_message.get('header', {}).get('status_code')}. Response: {lyrics_data}")
         return None
@@ -0,0 +1,106 @@
+import asyncio
+import io
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.core.analyzer import LyricsAnalyzer
+from src.core.config import Config
+from src.core.database import Database
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    config = Config(
+        openai_api_key='test',
+        llm_prompt_caching=True,
+        llm_backends=[
+            {'name': 'claude', 'provider': 'openai', 'model': 'claude-test'},
+            {'name': 'gpt', 'provider': 'openai', 'model': 'gpt-test'},
+        ],
+    )
+    database = Database(f"sqlite:///{tmp_path / 'cache.db'}", config)
+    analyzer = LyricsAnalyzer(config, database)
+    yield analyzer
+    database.close()
+
+
+def _export_line(analyzer, backend_name):
+    output = io.StringIO()
+    analyzer.export_batch_requests([('Some lyrics', None)], 'vanilla', output, backend_name=backend_name)
+    return json.loads(output.getvalue())
+
+
+def test_batch_lines_keep_cache_control_for_anthropic_only(analyzer):
+    # Stands in for an Anthropic backend; only the provider name decides the message shape
+    analyzer.pool.backends[0].provider = 'anthropic'
+
+    anthropic_line = _export_line(analyzer, 'claude')
+    assert anthropic_line['params']['system'][0]['cache_control'] == {'type': 'ephemeral'}
+
+    openai_line = _export_line(analyzer, 'gpt')
+    system_content = openai_line['body']['messages'][0]['content']
+    assert 'cache_control' not in json.dumps(system_content)
+    assert system_content[0]['text'] == anthropic_line['params']['system'][0]['text']
+
+
+def _analysis(analyzer, name):
+    """A minimal analysis that passes the framework's output schema."""
+    schema = analyzer.frameworks[name]['schema']
+    result = {key: {} for key in schema['required']}
+    for key in ('filtering_scores', 'detailed_analysis'):
+        result[key] = {field: {} for field in schema['properties'][key]['required']}
+    result['framework_applied'] = name
+    return result
+
+
+def _fake_llm(analyzer, monkeypatch, replies):
+    """Answers LLM calls with `replies` in order; returns the list of prompts sent."""
+    calls = []
+
+    def invoke(messages):
+        calls.append(messages)
+        return AIMessage(content=json.dumps(replies.pop(0)))
+
+    async def ainvoke(messages):
+        return invoke(messages)
+
+    monkeypatch.setattr(analyzer, '_invoke_llm', invoke)
+    monkeypatch.setattr(analyzer, '_ainvoke_llm', ainvoke)
+    return calls
+
+
+def test_frameworks_need_the_full_profile(analyzer):
+    with pytest.raises(ValueError, match='profile'):
+        analyzer.analyze_lyrics('Some lyrics', frameworks=['vanilla', 'sage'], profile='scores')
+    with pytest.raises(ValueError, match='profile'):
+        asyncio.run(analyzer.aanalyze_lyrics('Some lyrics', frameworks=['vanilla', 'sage'], profile='scores'))
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_combined_analysis_falls_back_for_missing_sections(analyzer, monkeypatch, use_async):
+    frameworks = ['vanilla', 'sage', 'cinnamon']
+    combined = {
+        'vanilla': _analysis(analyzer, 'vanilla'),
+        'sage': {'filtering_scores': {}},  # Fails the sage schema
+    }
+    # The combined prompt lists the frameworks sorted, and the missing ones are retried in that order
+    calls = _fake_llm(analyzer, monkeypatch, [combined, _analysis(analyzer, 'cinnamon'), _analysis(analyzer, 'sage')])
+
+    if use_async:
+        results = asyncio.run(analyzer.aanalyze_lyrics('Some lyrics', frameworks=frameworks))
+    else:
+        results = analyzer.analyze_lyrics('Some lyrics', frameworks=frameworks)
+
+    assert list(results) == frameworks
+    assert {name: result['framework_applied'] for name, result in results.items()} == {name: name for name in frameworks}
+    assert len(calls) == 3
+    assert all(f"=== Framework: {name} ===" in str(calls[0]) for name in frameworks)
+    assert '=== Framework:' not in str(calls[1]) + str(calls[2])
+
+    # Every section was cached on its own, whether it came from the combined call or not
+    for name in frameworks:
+        assert analyzer.analyze_lyrics('Some lyrics', name) == results[name]
+    assert analyzer.analyze_lyrics('Some lyrics', frameworks=frameworks) == results
+    assert len(calls) == 3
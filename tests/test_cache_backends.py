@@ -0,0 +1,200 @@
+import fnmatch
+import socketserver
+import threading
+
+import pytest
+
+from src.core.cache_backends import CacheBackend, RedisCacheBackend, RedisProtocolError
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """A local stand-in for Redis speaking just enough RESP2 for RedisCacheBackend.
+
+    Replies are held back until pipeline_size commands have arrived, so a client
+    that waits for each reply before sending the next command times out.
+    Commands listed in drop_on close the connection instead of replying.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(('127.0.0.1', 0), FakeRedisHandler)
+        self.password = password
+        self.store = {}
+        self.commands = []
+        self.connections = 0
+        self.pipeline_size = 1
+        self.drop_on = set()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        authenticated = self.server.password is None
+        pending = []
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            with self.server.lock:
+                self.server.commands.append(command)
+            name = command[0].upper()
+            if name in self.server.drop_on:
+                return
+            if name == 'AUTH':
+                authenticated = command[1] == self.server.password
+                reply = b'+OK\r\n' if authenticated else b'-WRONGPASS invalid password\r\n'
+            elif not authenticated:
+                reply = b'-NOAUTH Authentication required.\r\n'
+            else:
+                reply = self._reply(name, command[1:])
+            pending.append(reply)
+            if len(pending) >= self.server.pipeline_size:
+                self.wfile.write(b''.join(pending))
+                pending = []
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2].decode('utf-8'))
+        return args
+
+    def _reply(self, name, args):
+        store = self.server.store
+        if name == 'PING':
+            return b'+PONG\r\n'
+        if name == 'SELECT':
+            return b'+OK\r\n'
+        if name == 'SET':
+            store[args[0]] = args[1]
+            return b'+OK\r\n'
+        if name == 'MGET':
+            return b'*%d\r\n' % len(args) + b''.join(_bulk(store.get(key)) for key in args)
+        if name == 'DEL':
+            return b':%d\r\n' % sum(store.pop(key, None) is not None for key in args)
+        if name == 'SCAN':
+            keys = [key for key in store if fnmatch.fnmatchcase(key, args[2])]
+            return b'*2\r\n$1\r\n0\r\n*%d\r\n' % len(keys) + b''.join(_bulk(key) for key in keys)
+        return b"-ERR unknown command '%s'\r\n" % name.encode('utf-8')
+
+
+def _bulk(value):
+    if value is None:
+        return b'$-1\r\n'
+    data = value.encode('utf-8')
+    return b'$%d\r\n%s\r\n' % (len(data), data)
+
+
+@pytest.fixture
+def server():
+    server = FakeRedisServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def backend(server):
+    backend = RedisCacheBackend(server.url, key_prefix='test:', ttl_seconds=60, socket_timeout=1.0)
+    yield backend
+    backend.close()
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class WithoutClear(CacheBackend):
+        def get_many(self, keys):
+            return {}
+
+        def set_many(self, items):
+            pass
+
+    with pytest.raises(TypeError):
+        WithoutClear()
+
+
+def test_round_trip(server, backend):
+    backend.set_many({'a': 'é', 'b': '{"value": 2}'})
+
+    assert backend.get_many(['a', 'b', 'missing']) == {'a': 'é', 'b': '{"value": 2}'}
+    assert backend.get('missing') is None
+    assert backend.ping()
+    assert ['SET', 'test:a', 'é', 'EX', '60'] in server.commands
+
+
+def test_clear_only_removes_own_prefix(server, backend):
+    server.store['other:a'] = 'kept'
+    backend.set_many({'a': '1', 'b': '2'})
+
+    backend.clear()
+
+    assert server.store == {'other:a': 'kept'}
+
+
+def test_commands_are_pipelined_on_one_connection(server, backend):
+    server.pipeline_size = 3
+
+    backend.set_many({'a': '1', 'b': '2', 'c': '3'})
+
+    assert server.connections == 1
+    assert sorted(server.store) == ['test:a', 'test:b', 'test:c']
+
+
+def test_error_reply_raises_and_keeps_connection(server, backend):
+    with pytest.raises(RedisProtocolError, match='unknown command'):
+        backend._execute([['PING'], ['BOGUS']])
+
+    # The replies were read in full, so the connection is still usable
+    assert backend._pool.qsize() == 1
+    assert backend.ping()
+    assert server.connections == 1
+
+
+def test_failed_connection_is_not_returned_to_pool(server, backend):
+    assert backend.ping()
+    server.drop_on.add('MGET')
+
+    with pytest.raises(ConnectionError):
+        backend.get_many(['a'])
+
+    assert backend._pool.qsize() == 0
+    server.drop_on.clear()
+    assert backend.ping()
+    assert server.connections == 2
+
+
+def test_auth_and_select_on_connect(server):
+    server.password = 'secret'
+    url = server.url.replace('redis://', 'redis://:secret@') + '/2'
+    backend = RedisCacheBackend(url, socket_timeout=1.0)
+    try:
+        assert backend.ping()
+    finally:
+        backend.close()
+
+    assert server.commands[:2] == [['AUTH', 'secret'], ['SELECT', '2']]
+
+
+def test_rejected_auth_closes_connection(server):
+    server.password = 'secret'
+    backend = RedisCacheBackend(server.url.replace('redis://', 'redis://:wrong@'), socket_timeout=1.0)
+
+    with pytest.raises(RedisProtocolError, match='WRONGPASS'):
+        backend.ping()
+
+    assert backend._pool.qsize() == 0
@@ -0,0 +1,198 @@
+import asyncio
+
+import pytest
+
+from src.core.async_discovery import AsyncLyricsDiscovery
+from src.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ProviderHealth
+from src.core.config import Config
+from src.core.database import Database
+from src.core.discovery import LyricsDiscovery
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('provider', failure_threshold=3, reset_timeout=30, clock=clock)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # A success resets the count
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    stats = breaker.stats()
+    assert stats['times_opened'] == 1
+    assert stats['rejected_calls'] == 1
+    assert stats['retry_in_seconds'] == 30.0
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_successful_probe_closes_the_circuit(breaker, clock):
+    _open(breaker)
+    clock.advance(29.9)
+    assert not breaker.allow_request()
+
+    clock.advance(0.1)
+    assert breaker.state == HALF_OPEN
+    # Only one probe goes through while half-open
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_failed_probe_reopens_the_circuit(breaker, clock):
+    _open(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()['times_opened'] == 2
+    assert breaker.stats()['retry_in_seconds'] == 30.0
+    clock.advance(30)
+    assert breaker.state == HALF_OPEN
+
+
+def test_released_probe_frees_the_slot(breaker, clock):
+    _open(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    # Releasing outside half-open changes nothing
+    breaker.record_success()
+    breaker.release()
+    assert breaker.state == CLOSED
+
+
+def test_zero_threshold_disables_the_breaker(clock):
+    breaker = CircuitBreaker('provider', failure_threshold=0, clock=clock)
+    for _ in range(100):
+        breaker.record_failure()
+
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_expected_cost_is_latency_per_hit():
+    health = ProviderHealth('provider')
+    assert health.expected_cost() is None
+
+    health.record(True, 1.0)
+    # Hit rate starts at 0.5 and moves 10% towards each outcome: 0.55 after a hit
+    assert health.expected_cost() == pytest.approx(1.0 / 0.55)
+
+    health.record_error(3.0)
+    assert health.stats()['avg_latency_seconds'] == 1.2
+    assert health.stats()['hit_rate'] == pytest.approx(0.495)
+    assert health.stats()['errors'] == 1
+
+
+class NamedProvider:
+    def __init__(self, name):
+        self.name = name
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(f"sqlite:///{tmp_path / 'cache.db'}", Config())
+    yield database
+    database.close()
+
+
+def test_adaptive_ordering_ranks_by_expected_cost(database):
+    config = Config(provider_ordering='adaptive', provider_ordering_min_samples=2)
+    discovery = LyricsDiscovery(config, database)
+    slow, fast, unmeasured, broken = (NamedProvider(name) for name in ('slow', 'fast', 'unmeasured', 'broken'))
+    discovery.providers = [slow, fast, unmeasured, broken]
+
+    def record(provider, hit, latency, times):
+        for _ in range(times):
+            discovery._provider_guards(provider)[1].record(hit, latency)
+
+    record(slow, True, 2.0, 5)
+    record(fast, True, 0.5, 5)
+    record(unmeasured, True, 9.0, 1)
+    record(broken, True, 0.1, 5)
+    for _ in range(config.provider_circuit_failure_threshold):
+        discovery._provider_guards(broken)[0].record_failure()
+
+    # Providers without enough samples keep their turn, open circuits go last
+    assert [provider.name for provider in discovery._ordered_providers()] == ['unmeasured', 'fast', 'slow', 'broken']
+    assert [status['name'] for status in discovery.get_provider_status()] == ['unmeasured', 'fast', 'slow', 'broken']
+
+    # A provider that stops finding songs falls behind a slower one that does
+    record(fast, False, 0.5, 30)
+    assert [provider.name for provider in discovery._ordered_providers()][:3] == ['unmeasured', 'slow', 'fast']
+
+    discovery.config.provider_ordering = 'static'
+    assert discovery._ordered_providers() == [slow, fast, unmeasured, broken]
+
+
+class AsyncStubProvider:
+    def __init__(self, name, wait=None):
+        self.name = name
+        self.wait = wait
+
+    async def asearch(self, artist, title, client, track_id=None):
+        if self.wait is not None:
+            await self.wait.wait()
+        return {'lyrics': f"Verse found by {self.name}, one line long enough to pass validation", 'source': self.name}
+
+
+def test_cancelled_probe_is_released(database):
+    config = Config(discovery_mode='concurrent')
+
+    async def main():
+        preferred = AsyncStubProvider('preferred')
+        probing = AsyncStubProvider('probing', wait=asyncio.Event())
+        async with AsyncLyricsDiscovery(config, database) as discovery:
+            discovery.providers = [preferred, probing]
+            breaker, _ = discovery._provider_guards(probing)
+            for _ in range(config.provider_circuit_failure_threshold):
+                breaker.record_failure()
+            breaker.reset_timeout = 0
+            assert breaker.state == HALF_OPEN
+
+            # The probe loses the race and is cancelled, which must hand its slot back
+            result = await discovery.asearch_lyrics('Artist', 'Song')
+            await asyncio.sleep(0)
+        return result, breaker
+
+    result, breaker = asyncio.run(main())
+
+    assert result['source'] == 'preferred'
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
@@ -0,0 +1,70 @@
+import pytest
+
+from src.core.config import Config
+from src.core.database import Database
+
+LYRICS = "first line\nsecond line\n\nthird line"
+RESULT = {
+    'framework_applied': 'vanilla',
+    'filtering_scores': {'explicit_language': {'score': 0.1, 'label': 'none'}},
+}
+
+
+@pytest.fixture(params=[False, True], ids=['write-through', 'write-behind'])
+def database(request, tmp_path):
+    config = Config(db_memory_cache_enabled=True, db_write_behind_enabled=request.param)
+    db = Database(f"sqlite:///{tmp_path / 'cache.db'}", config)
+    yield db
+    db.close()
+
+
+def _mutate(result):
+    result['framework_applied'] = 'changed'
+    result['filtering_scores']['explicit_language']['score'] = 1.0
+    result['extra'] = True
+
+
+def test_cached_analysis_is_a_copy(database):
+    lyrics_hash = database.hash_lyrics(LYRICS)
+    database.store_analysis_by_hash(lyrics_hash, 'vanilla', '1.0', RESULT)
+
+    _mutate(database.get_cached_analysis_by_hash(lyrics_hash, 'vanilla', '1.0'))
+    _mutate(database.get_cached_analysis(LYRICS, 'vanilla', '1.0'))
+
+    assert database.get_cached_analysis_by_hash(lyrics_hash, 'vanilla', '1.0') == RESULT
+
+
+def test_cached_analysis_many_returns_copies(database):
+    database.store_analysis(LYRICS, 'vanilla', '1.0', RESULT)
+    keys = [(LYRICS, 'vanilla', '1.0'), (f"  {LYRICS}\n", 'vanilla', '1.0')]
+
+    results = database.get_cached_analysis_many(keys)
+    assert results[keys[0]] is not results[keys[1]]
+    for result in results.values():
+        _mutate(result)
+    _mutate(database.get_cached_analysis_by_hash_many([
+        (database.hash_lyrics(LYRICS), 'vanilla', '1.0')
+    ])[(database.hash_lyrics(LYRICS), 'vanilla', '1.0')])
+
+    assert database.get_cached_analysis_many(keys) == {key: RESULT for key in keys}
+
+
+def test_analysis_read_from_sql_is_a_copy(database):
+    database.store_analysis(LYRICS, 'vanilla', '1.0', RESULT)
+    database.flush()
+    database.memory_cache.clear()
+
+    _mutate(database.get_cached_analysis(LYRICS, 'vanilla', '1.0'))
+
+    assert database.memory_cache.get(('analysis', (database.hash_lyrics(LYRICS), 'vanilla', '1.0'))) == RESULT
+    assert database.get_cached_analysis(LYRICS, 'vanilla', '1.0') == RESULT
+
+
+def test_negative_lookups_are_limited_to_the_given_providers(database):
+    database.store_negative_lookups('Nobody', 'Instrumental', ['musixmatch', 'genius'])
+
+    for _ in range(2):  # Queued, then flushed to SQL
+        assert database.get_negative_lookups('nobody', 'instrumental', ['genius', 'lyrics_ovh']) == ['genius']
+        assert database.get_negative_lookups('Nobody', 'Instrumental', ['lyrics_ovh']) == []
+        assert database.get_negative_lookups('Nobody', 'Instrumental', []) == []
+        database.flush()
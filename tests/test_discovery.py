@@ -0,0 +1,157 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.core.async_discovery import AsyncLyricsDiscovery
+from src.core.config import Config
+from src.core.database import Database
+from src.core.discovery import LyricsDiscovery
+
+
+def _lyrics(name):
+    return f"Verse found by {name}, one line long enough to pass lyrics validation"
+
+
+class StubProvider:
+    """Answers with its own lyrics once `wait_for` is set, then sets `signal`.
+
+    Calls and answers are appended to events, so tests can check their order.
+    """
+
+    def __init__(self, name, events, wait_for=None, signal=None, found=True):
+        self.name = name
+        self.events = events
+        self.wait_for = wait_for
+        self.signal = signal
+        self.found = found
+        self.started = threading.Event()
+        self.cancelled = False
+
+    def _answer(self):
+        self.events.append(f"{self.name} answered")
+        if self.signal is not None:
+            self.signal.set()
+        return {'lyrics': _lyrics(self.name), 'source': self.name} if self.found else None
+
+    def search(self, artist, title, track_id=None):
+        self.events.append(f"{self.name} called")
+        self.started.set()
+        if self.wait_for is not None:
+            assert self.wait_for.wait(5)
+        return self._answer()
+
+    async def asearch(self, artist, title, client, track_id=None):
+        self.events.append(f"{self.name} called")
+        try:
+            if self.wait_for is not None:
+                await self.wait_for.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self._answer()
+
+
+@pytest.fixture
+def config():
+    return Config(discovery_mode='concurrent', discovery_max_workers=4)
+
+
+@pytest.fixture
+def database(tmp_path, config):
+    database = Database(f"sqlite:///{tmp_path / 'cache.db'}", config)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def discovery(config, database):
+    discovery = LyricsDiscovery(config, database)
+    yield discovery
+    if discovery._executor is not None:
+        discovery._executor.shutdown(wait=True)
+
+
+def test_preferred_provider_wins_even_when_slower(discovery):
+    events = []
+    low_answered = threading.Event()
+    preferred = StubProvider('preferred', events, wait_for=low_answered)
+    # The preferred provider only answers after the fallback has
+    fallback = StubProvider('fallback', events, signal=low_answered)
+    discovery.providers = [preferred, fallback]
+
+    result = discovery.search_lyrics('Artist', 'Song')
+
+    assert result['source'] == 'preferred'
+    assert events.index('fallback answered') < events.index('preferred answered')
+
+
+def test_falls_back_in_preference_order(discovery):
+    events = []
+    discovery.providers = [
+        StubProvider('first', events, found=False),
+        StubProvider('second', events),
+        StubProvider('third', events),
+    ]
+
+    assert discovery.search_lyrics('Artist', 'Song')['source'] == 'second'
+
+
+def test_queued_lookups_are_cancelled_once_a_winner_is_known(config, database):
+    config.discovery_max_workers = 2
+    discovery = LyricsDiscovery(config, database)
+    events = []
+    release = threading.Event()
+    busy = StubProvider('busy', events, wait_for=release)
+    preferred = StubProvider('preferred', events, wait_for=busy.started)
+    next_in_line = StubProvider('next', events, wait_for=release)
+    queued = StubProvider('queued', events)
+    # One worker is held by 'busy'; the one 'preferred' frees takes 'next' and blocks too,
+    # so 'queued' is still waiting in the pool when the winner is known
+    discovery.providers = [preferred, busy, next_in_line, queued]
+
+    try:
+        assert discovery.search_lyrics('Artist', 'Song')['source'] == 'preferred'
+    finally:
+        release.set()
+        discovery._executor.shutdown(wait=True)
+
+    assert 'queued called' not in events
+    assert 'busy answered' in events
+
+
+def test_async_preferred_provider_wins_even_when_slower(config, database):
+    async def main():
+        events = []
+        low_answered = asyncio.Event()
+        preferred = StubProvider('preferred', events, wait_for=low_answered)
+        fallback = StubProvider('fallback', events, signal=low_answered)
+        async with AsyncLyricsDiscovery(config, database) as discovery:
+            discovery.providers = [preferred, fallback]
+            result = await discovery.asearch_lyrics('Artist', 'Song')
+        return events, result
+
+    events, result = asyncio.run(main())
+
+    assert result['source'] == 'preferred'
+    assert events.index('fallback answered') < events.index('preferred answered')
+
+
+def test_async_losing_lookups_are_cancelled(config, database):
+    async def main():
+        events = []
+        never = asyncio.Event()
+        preferred = StubProvider('preferred', events)
+        slow = StubProvider('slow', events, wait_for=never)
+        async with AsyncLyricsDiscovery(config, database) as discovery:
+            discovery.providers = [preferred, slow]
+            result = await discovery.asearch_lyrics('Artist', 'Song')
+            await asyncio.sleep(0)  # Let the cancellation reach the losing task
+            breaker, _ = discovery._provider_guards(slow)
+        return result, slow, breaker
+
+    result, slow, breaker = asyncio.run(main())
+
+    assert result['source'] == 'preferred'
+    assert slow.cancelled
+    assert breaker.stats()['state'] == 'closed'
@@ -0,0 +1,161 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src.core.config import Config
+from src.core.database import Database
+from src.core.job_queue import AnalysisJobQueue, JobQueueFull
+
+
+class StubDiscovery:
+    def search_lyrics(self, artist, title, force_refresh=False):
+        if artist == 'Unknown':
+            return None
+        return {'artist': artist, 'title': title, 'lyrics': f"Lyrics of {title}", 'source': 'stub', 'lyrics_hash': 'h'}
+
+
+class StubAnalyzer:
+    """Analyzes instantly, or once `release` is set when one is given."""
+
+    def __init__(self, release=None):
+        self.release = release
+        self.calls = []
+
+    def analyze_lyrics(self, lyrics, framework=None, frameworks=None, profile='full', lyrics_hash=None):
+        self.calls.append(lyrics)
+        if self.release is not None:
+            assert self.release.wait(5)
+        return {'summary': lyrics, 'framework': framework, 'profile': profile}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / 'jobs.db'
+
+
+@pytest.fixture
+def config():
+    return Config(job_max_workers=2, job_max_pending=2, job_stale_after=600)
+
+
+@pytest.fixture
+def database(db_path, config):
+    database = Database(f"sqlite:///{db_path}", config)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def queues(config, database):
+    """Creates job queues sharing one database, as separate processes would, and shuts them down."""
+    created = []
+
+    def make(analyzer=None):
+        queue = AnalysisJobQueue(config, database, StubDiscovery(), analyzer or StubAnalyzer())
+        created.append(queue)
+        return queue
+
+    yield make
+    for queue in created:
+        queue.shutdown()
+
+
+def test_submitted_job_completes(queues):
+    queue = queues()
+
+    job = queue.submit('Artist', 'Song', 'vanilla', profile='scores')
+    assert job['status'] == 'queued'
+    finished = queue.wait(job['id'], 5)
+
+    assert finished['status'] == 'completed'
+    assert finished['result']['analysis'] == {'summary': 'Lyrics of Song', 'framework': 'vanilla', 'profile': 'scores'}
+    assert finished['result']['metadata']['source'] == 'stub'
+    assert finished['started_at'] and finished['finished_at']
+
+
+def test_failed_job_records_the_error(queues):
+    queue = queues()
+
+    job = queue.wait(queue.submit('Unknown', 'Song')['id'], 5)
+
+    assert job['status'] == 'failed'
+    assert 'Lyrics not found' in job['error']
+
+
+def test_a_job_is_claimed_once(queues, database):
+    analyzer = StubAnalyzer()
+    queue = queues(analyzer)
+    job = database.create_job('Artist', 'Song', None, False, None, 'full')
+
+    assert database.claim_job(job['id'])
+    assert not database.claim_job(job['id'])
+    # A queue that picks up a job claimed elsewhere leaves it alone
+    queue._run_job(job['id'])
+    assert analyzer.calls == []
+    assert database.get_job(job['id'])['status'] == 'running'
+
+
+def test_resume_requeues_stale_running_jobs(queues, database, db_path):
+    stale = database.create_job('Artist', 'Stale', None, False, None, 'full')
+    recent = database.create_job('Artist', 'Recent', None, False, None, 'full')
+    queued = database.create_job('Artist', 'Queued', None, False, None, 'full')
+    database.claim_job(stale['id'])
+    database.claim_job(recent['id'])
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE analysis_jobs SET started_at = '2000-01-01 00:00:00' WHERE id = ?", (stale['id'],))
+
+    queue = queues()
+    assert queue.resume() == 2
+
+    assert queue.wait(stale['id'], 5)['status'] == 'completed'
+    assert queue.wait(queued['id'], 5)['status'] == 'completed'
+    # Still within job_stale_after, so presumably running in another process
+    assert database.get_job(recent['id'])['status'] == 'running'
+
+
+def test_wait_long_polls_until_the_job_finishes(queues):
+    release = threading.Event()
+    queue = queues(StubAnalyzer(release))
+    job = queue.submit('Artist', 'Song')
+
+    started = time.monotonic()
+    assert queue.wait(job['id'], 0.2)['status'] in ('queued', 'running')
+    assert time.monotonic() - started >= 0.2
+
+    threading.Timer(0.1, release.set).start()
+    started = time.monotonic()
+    assert queue.wait(job['id'], 5)['status'] == 'completed'
+    # Woken by the job finishing, not by the timeout
+    assert time.monotonic() - started < 2
+
+    assert queue.wait('missing', 1) is None
+
+
+def test_wait_polls_jobs_of_other_processes(queues):
+    release = threading.Event()
+    worker = queues(StubAnalyzer(release))
+    other = queues()
+    job = worker.submit('Artist', 'Song')
+
+    threading.Timer(0.1, release.set).start()
+
+    assert other.wait(job['id'], 5)['status'] == 'completed'
+
+
+def test_max_pending_counts_jobs_of_every_process(queues, config):
+    release = threading.Event()
+    first = queues(StubAnalyzer(release))
+    second = queues(StubAnalyzer(release))
+
+    one = first.submit('Artist', 'One')
+    two = second.submit('Artist', 'Two')
+    with pytest.raises(JobQueueFull):
+        first.submit('Artist', 'Three')
+    assert first.stats() == {'pending': 2, 'in_process': 1, 'max_pending': config.job_max_pending}
+
+    release.set()
+    assert first.wait(one['id'], 5)['status'] == second.wait(two['id'], 5)['status'] == 'completed'
+    assert first.stats()['pending'] == 0
+    assert first.submit('Artist', 'Three')['status'] == 'queued'
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from src.core.json_stream import IncrementalJSONObjectParser
+
+DOCUMENT = json.dumps({
+    'filtering_scores': {'overall': 7, 'dimensions': {'joy': [1, 2, {'deep': None}]}},
+    'quote': 'she said "hold on", then {left} [again], a, b',
+    'path': 'C:\\lyrics\\',
+    'unicode': 'caf\u00e9 \u2014 \U0001f3b5',
+    'empty': {},
+    'list': [],
+    'flag': True,
+    'detailed_analysis': 'line one\nline two',
+}, indent=2)
+
+
+def _parse(chunks):
+    parser = IncrementalJSONObjectParser()
+    members = []
+    for chunk in chunks:
+        members.extend(parser.feed(chunk))
+    return parser, members
+
+
+def _chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, len(DOCUMENT)])
+def test_any_chunking_yields_every_member(size):
+    parser, members = _parse(_chunked(DOCUMENT, size))
+
+    assert parser.done
+    assert members == list(json.loads(DOCUMENT).items())
+
+
+def test_split_inside_strings_and_escapes():
+    # Chunk boundaries right after a backslash, inside an escaped quote and inside a \u escape
+    text = '{"a": "x\\', '"y\\', '\\', '", "b": "\\u00', 'e9", "c": "}{"}'
+    parser, members = _parse(text)
+
+    assert members == [('a', 'x"y\\'), ('b', 'é'), ('c', '}{')]
+    assert parser.done
+
+
+def test_members_are_emitted_as_soon_as_they_close():
+    parser = IncrementalJSONObjectParser()
+
+    assert list(parser.feed('{"filtering_scores": {"overall": 7}')) == []
+    assert list(parser.feed(', "detailed_analysis": "still wri')) == [('filtering_scores', {'overall': 7})]
+    assert list(parser.feed('ting"}')) == [('detailed_analysis', 'still writing')]
+    assert parser.done
+
+
+def test_nested_commas_do_not_split_members():
+    _, members = _parse(['{"scores": {"a": 1, "b": [1, 2, {"c": 3, "d": 4}]}, "n": 1}'])
+
+    assert members == [('scores', {'a': 1, 'b': [1, 2, {'c': 3, 'd': 4}]}), ('n', 1)]
+
+
+def test_code_fence_and_prose_are_skipped():
+    text = 'Here is the analysis:\n```json\n{"a": 1,\n "b": "```"}\n```\nAnything else? {"c": 2}'
+    parser, members = _parse(_chunked(text, 5))
+
+    assert members == [('a', 1), ('b', '```')]
+    assert parser.done
+    assert list(parser.feed('{"d": 3}')) == []
+
+
+def test_incomplete_and_empty_objects():
+    parser, members = _parse(['{"a": 1, "b": {"c": '])
+    assert members == [('a', 1)]
+    assert parser.started and not parser.done
+
+    parser, members = _parse(['{ }'])
+    assert members == [] and parser.done
+
+    parser, members = _parse(['no json here'])
+    assert members == [] and not parser.started
+
+
+def test_malformed_member_raises():
+    parser = IncrementalJSONObjectParser()
+
+    with pytest.raises(ValueError):
+        list(parser.feed('{"a": tru, "b": 1}'))
@@ -0,0 +1,265 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.llm_scheduler import (
+    MIN_RATE_FACTOR,
+    RateLimitScheduler,
+    is_rate_limit_error,
+    retry_after_seconds,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _scheduler(clock, **budgets):
+    return RateLimitScheduler('test/model', clock=clock, **budgets)
+
+
+def _try(scheduler, tokens=0):
+    """Seconds until a call of `tokens` fits (0: taken now), as the next caller in line."""
+    ticket = object()
+    with scheduler._cond:
+        scheduler._queue.append(ticket)
+        try:
+            return scheduler._try_take(ticket, tokens)
+        finally:
+            scheduler._leave(ticket)
+
+
+def test_request_bucket_refills_continuously(clock):
+    scheduler = _scheduler(clock, requests_per_minute=60)
+    for _ in range(60):
+        scheduler.acquire(0)
+
+    assert _try(scheduler) == pytest.approx(1.0)
+    clock.advance(0.5)
+    assert _try(scheduler) == pytest.approx(0.5)
+    clock.advance(0.5)
+    assert _try(scheduler) == 0
+    # The bucket never holds more than a minute's worth
+    clock.advance(3600)
+    assert scheduler.stats()['calls'] == 61
+    for _ in range(60):
+        assert _try(scheduler) == 0
+    assert _try(scheduler) > 0
+
+
+def test_token_bucket_and_settling(clock):
+    scheduler = _scheduler(clock, tokens_per_minute=600)
+    scheduler.acquire(600)
+
+    assert _try(scheduler, 100) == pytest.approx(10.0)
+    # A call larger than the whole budget waits for a full bucket, then overdraws it
+    assert _try(scheduler, 1000) == pytest.approx(60.0)
+    clock.advance(60)
+    assert _try(scheduler, 1000) == 0
+    assert _try(scheduler, 100) == pytest.approx(50.0)
+
+    # Real usage above the estimate is charged too
+    clock.advance(50)
+    scheduler.settle(100, SimpleNamespace(usage_metadata={'input_tokens': 250, 'output_tokens': 50}))
+    assert _try(scheduler, 100) == pytest.approx(20.0)
+
+
+def test_callers_are_served_in_arrival_order(clock):
+    scheduler = _scheduler(clock, tokens_per_minute=600)
+    scheduler.acquire(500)
+    large, small = object(), object()
+    scheduler._queue.extend([large, small])
+
+    with scheduler._cond:
+        # The small call would fit, but it isn't its turn
+        assert scheduler._try_take(small, 50) is None
+        assert scheduler._try_take(large, 400) == pytest.approx(30.0)
+        clock.advance(30)
+        assert scheduler._try_take(large, 400) == 0
+        scheduler._leave(large)
+        assert scheduler._try_take(small, 50) == pytest.approx(5.0)
+
+
+def test_rate_limit_pauses_and_halves_the_refill_rate(clock):
+    scheduler = _scheduler(clock, requests_per_minute=60)
+    for _ in range(60):
+        scheduler.acquire(0)
+
+    scheduler.throttle(retry_after=2.0)
+    assert scheduler.stats()['rate_factor'] == 0.5
+    assert scheduler.stats()['paused_seconds'] == 2.0
+    assert _try(scheduler) == pytest.approx(2.0)
+
+    # While paused the bucket refilled at half rate: one request per two seconds
+    clock.advance(2)
+    assert _try(scheduler) == 0
+    assert _try(scheduler) == pytest.approx(2.0)
+
+    for _ in range(10):
+        scheduler.settle(0)
+    assert scheduler.stats()['rate_factor'] == 1.0
+    assert _try(scheduler) == pytest.approx(1.0)
+
+
+def test_rate_factor_has_a_floor(clock):
+    scheduler = _scheduler(clock, requests_per_minute=60)
+    for _ in range(10):
+        scheduler.throttle(retry_after=0)
+    assert scheduler.stats()['rate_factor'] == MIN_RATE_FACTOR
+    assert scheduler.stats()['rate_limited'] == 10
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(ProviderError(429, {'retry-after-ms': '1500'})) == 1.5
+    assert retry_after_seconds(ProviderError(429, {'retry-after': '3'})) == 3.0
+    assert retry_after_seconds(ProviderError(429, {'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'})) is None
+    assert retry_after_seconds(ValueError('no response')) is None
+    assert is_rate_limit_error(ProviderError(429))
+    assert is_rate_limit_error(ProviderError(529))
+    assert not is_rate_limit_error(ProviderError(500))
+
+
+def test_rate_limited_call_uses_retry_after_then_backoff(clock):
+    scheduler = _scheduler(clock, requests_per_minute=60, max_backoff=8.0)
+
+    assert scheduler._retry_delay(ProviderError(429, {'retry-after': '5'}), attempt=1) == 0.0
+    assert scheduler.stats()['paused_seconds'] == 5.0
+    clock.advance(5)
+    # Without a hint the pause doubles per attempt, up to max_backoff
+    scheduler._retry_delay(ProviderError(529), attempt=3)
+    assert scheduler.stats()['paused_seconds'] == 4.0
+    clock.advance(4)
+    scheduler._retry_delay(ProviderError(529), attempt=5)
+    assert scheduler.stats()['paused_seconds'] == 8.0
+    assert scheduler.stats()['retries'] == 3
+
+
+def test_run_retries_rate_limits_until_max_retries(clock):
+    scheduler = _scheduler(clock, requests_per_minute=60, max_retries=2)
+    responses = [ProviderError(429, {'retry-after': '0'}), 'ok']
+
+    def call():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert scheduler.run(call, 10) == 'ok'
+    assert scheduler.stats()['retries'] == 1
+
+    def always_limited():
+        raise ProviderError(429, {'retry-after': '0'})
+
+    with pytest.raises(ProviderError):
+        scheduler.run(always_limited, 10)
+    with pytest.raises(ValueError):
+        scheduler.run(lambda: (_ for _ in ()).throw(ValueError('bad request')), 10)
+
+
+def _count_attempts(scheduler):
+    attempts = []
+    try_take = scheduler._try_take
+
+    def counting_try_take(ticket, tokens):
+        attempts.append(ticket)
+        return try_take(ticket, tokens)
+
+    scheduler._try_take = counting_try_take
+    return attempts
+
+
+def test_async_waiter_sleeps_until_notified(clock):
+    scheduler = _scheduler(clock, requests_per_minute=60)
+    attempts = _count_attempts(scheduler)
+    head = object()
+    scheduler._queue.append(head)
+
+    def leave_head():
+        with scheduler._cond:
+            scheduler._leave(head)
+
+    async def main():
+        waiter = asyncio.ensure_future(scheduler.aacquire(0))
+        await asyncio.sleep(0.2)
+        # Not polled while another caller is at the head of the queue
+        assert len(attempts) == 1
+        await asyncio.to_thread(leave_head)
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(main())
+    assert len(attempts) == 2
+    assert scheduler.stats()['calls'] == 1
+
+
+def test_async_waiter_sleeps_for_the_deficit(clock):
+    scheduler = _scheduler(clock, requests_per_minute=60)
+    for _ in range(60):
+        scheduler.acquire(0)
+    scheduler.throttle(retry_after=30)
+    attempts = _count_attempts(scheduler)
+
+    async def main():
+        waiter = asyncio.ensure_future(scheduler.aacquire(0))
+        await asyncio.sleep(0.2)
+        # One check, then asleep for the 30s pause rather than re-checking every few ms
+        assert len(attempts) == 1
+        assert scheduler.stats()['queued'] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(main())
+    # A cancelled waiter gives up its place in the queue
+    assert scheduler.stats()['queued'] == 0
+    assert scheduler._async_wakeups == {}
+
+
+def test_sync_and_async_callers_share_the_queue(clock):
+    scheduler = _scheduler(clock, requests_per_minute=60)
+    for _ in range(60):
+        scheduler.acquire(0)
+    order = []
+
+    def sync_caller():
+        scheduler.acquire(0)
+        order.append('sync')
+
+    async def main():
+        thread = threading.Thread(target=sync_caller)
+        thread.start()
+        while not scheduler.stats()['queued']:
+            await asyncio.sleep(0.001)
+        waiter = asyncio.ensure_future(scheduler.aacquire(0))
+        while scheduler.stats()['queued'] < 2:
+            await asyncio.sleep(0.001)
+        # Refill two requests; the sync caller at the head goes first
+        clock.advance(2)
+        with scheduler._cond:
+            scheduler._notify_all()
+        await asyncio.wait_for(waiter, 1)
+        order.append('async')
+        await asyncio.to_thread(thread.join, 1)
+
+    asyncio.run(main())
+    assert order == ['sync', 'async']
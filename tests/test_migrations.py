@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from src.core.config import Config
+from src.core.database import Database
+
+# The sample database in the repository still has the original schema, with no migrations applied
+BASELINE_DB = os.path.join(os.path.dirname(__file__), '..', 'data', 'lyrics_system.db')
+
+
+def _legacy_search_key(artist, title):
+    return hashlib.sha256(f"{artist.lower().strip()}:{title.lower().strip()}".encode('utf-8')).hexdigest()
+
+
+@pytest.fixture
+def baseline_path(tmp_path):
+    path = tmp_path / 'baseline.db'
+    shutil.copyfile(BASELINE_DB, path)
+    return path
+
+
+def _insert_lyrics(path, artist, title, lyrics, created_at, metadata=None):
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "INSERT INTO cached_lyrics (search_key, artist, title, lyrics, source, lyric_metadata, created_at) "
+            "VALUES (?, ?, ?, ?, 'genius', ?, ?)",
+            (_legacy_search_key(artist, title), artist, title, lyrics,
+             json.dumps(metadata) if metadata else None, created_at)
+        )
+
+
+def _open(path):
+    return Database(f"sqlite:///{path}", Config())
+
+
+def test_canonical_search_keys_merge_variants(baseline_path):
+    _insert_lyrics(baseline_path, 'Heart', 'Crazy On You', 'old lyrics', '2024-01-01 00:00:00', {'genius_id': 42})
+    _insert_lyrics(baseline_path, 'HEART', 'Crazy On You (2004 Remaster)', 'new lyrics', '2024-06-01 00:00:00')
+    _insert_lyrics(baseline_path, 'Heart', 'Crazy On You (Live)', 'live lyrics', '2024-03-01 00:00:00')
+
+    db = _open(baseline_path)
+    try:
+        with sqlite3.connect(baseline_path) as conn:
+            titles = sorted(title for (title,) in conn.execute(
+                "SELECT title FROM cached_lyrics WHERE lower(artist) = 'heart' AND title LIKE 'Crazy On You%'"
+            ))
+            assert len({key for (key,) in conn.execute("SELECT search_key FROM cached_lyrics")}) == \
+                conn.execute("SELECT count(*) FROM cached_lyrics").fetchone()[0]
+        # The newest variant is kept; the live recording stays a song of its own
+        assert titles == ['Crazy On You (2004 Remaster)', 'Crazy On You (Live)']
+        assert db.get_cached_lyrics('Heart', 'Crazy on You')['lyrics'] == 'new lyrics'
+        assert db.get_cached_lyrics('heart', 'crazy on you (live)')['lyrics'] == 'live lyrics'
+        # Track IDs backfilled under the old key follow the song to its canonical key
+        assert db.get_provider_track_ids('The Heart', 'Crazy On You') == {'genius': '42'}
+        # Untouched songs still resolve
+        assert db.get_cached_lyrics('abba', 'waterloo')['artist'] == 'ABBA'
+    finally:
+        db.close()
+
+
+def _snapshot(path):
+    with sqlite3.connect(path) as conn:
+        return (
+            [name for (name,) in conn.execute("SELECT name FROM schema_migrations ORDER BY name")],
+            sorted(conn.execute("SELECT search_key, title FROM cached_lyrics")),
+        )
+
+
+def test_migrations_run_once(baseline_path):
+    _open(baseline_path).close()
+    applied, rows = _snapshot(baseline_path)
+    assert '0005_canonical_search_keys' in applied
+
+    # Reopening leaves the keys alone instead of re-keying them a second time
+    _open(baseline_path).close()
+    assert _snapshot(baseline_path) == (applied, rows)
+
+
+def _insert_analysis(path, content_hash, framework, result):
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "INSERT INTO cached_analysis (content_hash, framework, framework_version, result, created_at) "
+            "VALUES (?, ?, '1.0', ?, '2024-01-01 00:00:00')",
+            (content_hash, framework, json.dumps(result))
+        )
+
+
+def _count(path, table):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+
+@pytest.mark.parametrize('can_drop_column', [True, False], ids=['drop-column', 'rebuild'])
+def test_lyrics_blobs_migration_keeps_every_row(baseline_path, monkeypatch, can_drop_column):
+    # SQLite before 3.35 can't drop a column, so the table is rebuilt instead
+    monkeypatch.setattr(Database, '_can_drop_column', staticmethod(lambda conn: can_drop_column))
+    lyrics = "Line one\n\n  Line two  \n"
+    legacy_hash = hashlib.sha256(f"Line one\nLine two:vanilla:1.0".encode('utf-8')).hexdigest()
+    _insert_lyrics(baseline_path, 'Test Artist', 'Migration Song', lyrics, '2024-01-01 00:00:00')
+    _insert_analysis(baseline_path, legacy_hash, 'vanilla', {'summary': 'cached'})
+    _insert_analysis(baseline_path, 'f' * 64, 'vanilla', {'summary': 'lyrics were never cached'})
+    lyrics_rows = _count(baseline_path, 'cached_lyrics')
+    analysis_rows = _count(baseline_path, 'cached_analysis')
+
+    db = _open(baseline_path)
+    try:
+        with sqlite3.connect(baseline_path) as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cached_lyrics)")}
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(cached_lyrics)")}
+            legacy = [content_hash for (content_hash,) in conn.execute(
+                "SELECT content_hash FROM cached_analysis_legacy"
+            )]
+        assert 'lyrics' not in columns and 'lyrics_hash' in columns
+        assert {'ix_cached_lyrics_search_key', 'ix_cached_lyrics_lyrics_hash'} <= indexes
+        assert _count(baseline_path, 'cached_lyrics') == lyrics_rows
+
+        # Analyses of cached lyrics are found by lyrics hash; the others are set aside, not deleted
+        assert db.get_cached_analysis(lyrics, 'vanilla', '1.0') == {'summary': 'cached'}
+        assert 'f' * 64 in legacy
+        assert _count(baseline_path, 'cached_analysis') + len(legacy) == analysis_rows
+
+        cached = db.get_cached_lyrics('Test Artist', 'Migration Song')
+        assert cached['lyrics'] == lyrics and cached['lyrics_hash'] == Database.hash_lyrics(lyrics)
+    finally:
+        db.close()
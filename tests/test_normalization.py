@@ -0,0 +1,81 @@
+import pytest
+
+from src.core.normalization import TrigramIndex, canonical_song_key, normalize_artist
+
+
+@pytest.mark.parametrize('variant, canonical', [
+    (('BEYONCÉ', 'Halo'), ('Beyonce', 'Halo')),
+    (('The Weeknd', 'Blinding Lights'), ('Weeknd', 'Blinding Lights')),
+    (('Coolio feat. L.V.', "Gangsta's Paradise"), ('Coolio', 'Gangstas Paradise')),
+    (('Simon & Garfunkel', 'The Boxer'), ('Simon and Garfunkel', 'The Boxer')),
+    (("Guns N' Roses", 'Right Next Door To Hell - 2022 Remaster'), ("Guns N' Roses", 'Right Next Door To Hell')),
+    (('Queen', 'Bohemian Rhapsody (Remastered 2011)'), ('Queen', 'Bohemian Rhapsody')),
+    (('Carpenters', 'Happy Holiday - 2024 Mix'), ('Carpenters', 'Happy Holiday')),
+    (('Madonna', 'Vogue (Single Version)'), ('Madonna', 'Vogue')),
+    (('Drake', 'Nice For What (Explicit)'), ('Drake', 'Nice For What')),
+    (('Kendrick Lamar', 'LOVE. (feat. Zacari)'), ('Kendrick Lamar', 'Love')),
+])
+def test_variants_share_a_key(variant, canonical):
+    assert canonical_song_key(*variant) == canonical_song_key(*canonical)
+
+
+@pytest.mark.parametrize('song, other', [
+    (('Nirvana', 'Where Did You Sleep Last Night (Live)'), ('Nirvana', 'Where Did You Sleep Last Night')),
+    (('Queen', 'Love of My Life (Live at Wembley)'), ('Queen', 'Love of My Life')),
+    (('Queen', 'Love of My Life - Live'), ('Queen', 'Love of My Life')),
+    (('Idina Menzel', 'Let It Go (From "Frozen")'), ('Idina Menzel', 'Let It Go')),
+    (('Daft Punk', 'One More Time (Remix)'), ('Daft Punk', 'One More Time')),
+    (('The The', 'This Is the Day'), ('The', 'This Is the Day')),
+])
+def test_different_recordings_keep_their_own_key(song, other):
+    assert canonical_song_key(*song) != canonical_song_key(*other)
+
+
+def test_leading_the_is_dropped_unless_it_is_the_name():
+    assert normalize_artist('The Who') == 'who'
+    assert normalize_artist('The') == 'the'
+    assert normalize_artist('The The') == 'the the'
+    assert normalize_artist('!!!') == '!!!'
+
+
+@pytest.fixture
+def index():
+    index = TrigramIndex()
+    for artist, title in [
+        ('Sabrina Carpenter', 'Espresso'),
+        ('Sabrina Carpenter', 'Busy Woman'),
+        ('Olivia Newton-John', 'Physical'),
+        ('Nirvana', 'Where Did You Sleep Last Night'),
+        ('Kanye West', 'Part 1'),
+    ]:
+        index.add(f"{artist}/{title}", canonical_song_key(artist, title))
+    return index
+
+
+def test_best_match_tolerates_typos(index):
+    match = index.best_match(canonical_song_key('Sabrina Carptenter', 'Espresso'), 0.8)
+    assert match is not None and match[0] == 'Sabrina Carpenter/Espresso'
+    assert 0.8 <= match[1] < 1.0
+    match = index.best_match(canonical_song_key('Olivia Newtn-John', 'Physical'), 0.8)
+    assert match is not None and match[0] == 'Olivia Newton-John/Physical'
+
+
+def test_best_match_rejects_other_songs(index):
+    assert index.best_match(canonical_song_key('Sabrina Carpenter', 'Please Please Please'), 0.8) is None
+    assert index.best_match(canonical_song_key('Olivia Newton-John', 'Xanadu'), 0.8) is None
+
+
+def test_best_match_requires_the_same_numbers_and_markers(index):
+    assert index.best_match(canonical_song_key('Kanye West', 'Part 2'), 0.8) is None
+    assert index.best_match(canonical_song_key('Nirvana', 'Where Did You Sleep Last Night (Live)'), 0.8) is None
+
+
+def test_threshold_is_inclusive_and_discard_removes_entries(index):
+    text = canonical_song_key('Sabrina Carptenter', 'Espresso')
+    key, score = index.best_match(text, 0.8)
+    assert index.best_match(text, score) == (key, score)
+    assert index.best_match(text, score + 0.001) is None
+
+    index.discard(key)
+    assert index.best_match(text, 0.8) is None
+    assert len(index) == 4
@@ -0,0 +1,74 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.core.config import Config
+from src.providers.http import ProviderSession, create_provider_session
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps the connection open between requests
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.client_ports.append(self.client_address[1])
+
+    def do_GET(self):
+        body = b'{"lyrics": "la la la"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.client_ports = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join(5)
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/lyrics"
+
+
+def test_session_reuses_its_connection(server):
+    with ProviderSession() as session:
+        for _ in range(5):
+            response = session.get(_url(server))
+            assert response.json() == {'lyrics': 'la la la'}
+        stats = session.stats()
+
+    assert stats['requests'] == 5
+    assert stats['connections_created'] == 1
+    assert stats['connections_reused'] == 4
+    # The server agrees: every request came in over the same socket
+    assert len(server.client_ports) == 1
+
+
+def test_separate_sessions_open_their_own_connections(server):
+    sessions = [ProviderSession(), ProviderSession()]
+    for session in sessions:
+        session.get(_url(server))
+        session.get(_url(server))
+        session.close()
+
+    assert [session.stats()['connections_created'] for session in sessions] == [1, 1]
+    assert len(server.client_ports) == 2
+
+
+def test_session_uses_the_configured_timeout():
+    session = create_provider_session(Config(provider_http_timeout=2.5))
+
+    assert session.stats() == {'timeout_seconds': 2.5, 'requests': 0, 'connections_created': 0, 'connections_reused': 0}
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.core.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def _run_coalesced(flight, fn, callers=3):
+    """Call flight.do from several threads while the leader is blocked, and collect what each got."""
+    release = threading.Event()
+    outcomes = [None] * callers
+
+    def blocking():
+        assert release.wait(5)
+        return fn()
+
+    def caller(index):
+        try:
+            outcomes[index] = ('result', flight.do('key', blocking))
+        except Exception as e:
+            outcomes[index] = ('error', e)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    threads[0].start()
+    while not flight.in_flight():
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    while flight.stats()['waiting'] < callers - 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_waiters_get_their_own_copy_of_the_result():
+    flight = SingleFlight()
+    calls = []
+
+    def analyze():
+        calls.append(1)
+        return {'themes': ['love'], 'scores': {'joy': 1}}
+
+    outcomes = _run_coalesced(flight, analyze)
+
+    assert len(calls) == 1
+    assert flight.coalesced == 2
+    results = [value for kind, value in outcomes]
+    assert all(kind == 'result' for kind, _ in outcomes)
+    assert all(result == results[0] for result in results)
+    assert len({id(result) for result in results}) == 3
+    assert len({id(result['themes']) for result in results}) == 3
+
+    results[1]['themes'].append('loss')
+    assert results[0]['themes'] == results[2]['themes'] == ['love']
+
+
+def test_exceptions_reach_every_waiter():
+    flight = SingleFlight()
+    error = ValueError('provider down')
+
+    def fail():
+        raise error
+
+    outcomes = _run_coalesced(flight, fail)
+
+    assert outcomes == [('error', error)] * 3
+    assert flight.in_flight() == 0
+
+
+def test_keys_are_forgotten_once_done():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    assert flight.coalesced == 0
+
+
+def test_async_waiters_get_their_own_copy_of_the_result():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def analyze():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'themes': ['love']}
+
+    async def main():
+        return await asyncio.gather(*(flight.do('key', analyze) for _ in range(3)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert flight.coalesced == 2
+    assert len({id(result) for result in results}) == 3
+    results[1]['themes'].append('loss')
+    assert results[0]['themes'] == results[2]['themes'] == ['love']
+
+
+def test_async_exceptions_reach_every_waiter():
+    flight = AsyncSingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('provider down')
+
+    async def main():
+        return await asyncio.gather(*(flight.do('key', fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+
+    assert flight.coalesced == 2
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert flight.in_flight() == 0
+
+
+def test_async_cancelling_one_waiter_leaves_the_others():
+    flight = AsyncSingleFlight()
+
+    async def analyze():
+        await asyncio.sleep(0.05)
+        return 'done'
+
+    async def main():
+        first = asyncio.ensure_future(flight.do('key', analyze))
+        second = asyncio.ensure_future(flight.do('key', analyze))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 'done'
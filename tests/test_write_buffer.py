@@ -0,0 +1,149 @@
+import threading
+
+import pytest
+
+from src.core.write_buffer import WriteBehindBuffer
+
+
+class Sink:
+    """flush_callback that records written rows and rejects rows marked bad."""
+
+    def __init__(self):
+        self.calls = []
+        self.written = []
+        self.fail_all = False
+
+    def __call__(self, batch):
+        self.calls.append(batch)
+        if self.fail_all or any(row.get('bad') for rows in batch.values() for row in rows):
+            raise ValueError('constraint failed')
+        self.written.extend(row['id'] for rows in batch.values() for row in rows)
+
+
+@pytest.fixture
+def sink():
+    return Sink()
+
+
+@pytest.fixture
+def buffer(sink):
+    # A long interval keeps the background thread out of the way unless max_rows is hit
+    buffer = WriteBehindBuffer(sink, max_rows=100, flush_interval=60, max_attempts=3)
+    yield buffer
+    buffer.close()
+
+
+def test_rows_for_the_same_key_collapse(sink, buffer):
+    buffer.add('lyrics', 'a', {'id': 'a1'})
+    buffer.add('lyrics', 'a', {'id': 'a2'})
+    buffer.add('analysis', 'a', {'id': 'b'})
+
+    assert buffer.pending_count() == 2
+    assert buffer.get('lyrics', 'a') == {'id': 'a2'}
+    buffer.flush()
+
+    assert len(sink.calls) == 1
+    assert sorted(sink.written) == ['a2', 'b']
+    assert buffer.pending_count() == 0
+
+
+def test_poison_row_does_not_block_the_rest(sink, buffer):
+    buffer.add('lyrics', 'good', {'id': 'good'})
+    buffer.add('lyrics', 'bad', {'id': 'bad', 'bad': True})
+    buffer.add('analysis', 'other', {'id': 'other'})
+
+    buffer.flush()
+
+    assert sorted(sink.written) == ['good', 'other']
+    assert buffer.pending_count() == 1
+    assert buffer.get('lyrics', 'bad') is not None
+
+    # The bad row is retried, then dropped once it has failed max_attempts times
+    buffer.flush()
+    assert buffer.pending_count() == 1
+    buffer.flush()
+    assert buffer.pending_count() == 0
+    assert buffer.get('lyrics', 'bad') is None
+    assert sorted(sink.written) == ['good', 'other']
+
+
+def test_transient_failure_keeps_rows_for_the_next_flush(sink, buffer):
+    buffer.add('lyrics', 'a', {'id': 'a'})
+    sink.fail_all = True
+    buffer.flush()
+    assert buffer.pending_count() == 1
+
+    sink.fail_all = False
+    buffer.flush()
+    assert sink.written == ['a']
+    assert buffer.pending_count() == 0
+
+
+def test_replacing_a_failed_row_resets_its_attempts(sink, buffer):
+    buffer.add('lyrics', 'a', {'id': 'a', 'bad': True})
+    buffer.flush()
+    buffer.flush()
+    buffer.add('lyrics', 'a', {'id': 'a', 'bad': True})
+    buffer.flush()
+    buffer.flush()
+
+    assert buffer.pending_count() == 1
+
+
+def test_close_does_not_raise_on_failing_rows(sink):
+    buffer = WriteBehindBuffer(sink, max_rows=100, flush_interval=60, max_attempts=1)
+    buffer.add('lyrics', 'bad', {'id': 'bad', 'bad': True})
+    buffer.add('lyrics', 'good', {'id': 'good'})
+
+    buffer.close()
+
+    assert sink.written == ['good']
+    assert buffer.pending_count() == 0
+    with pytest.raises(RuntimeError):
+        buffer.add('lyrics', 'late', {'id': 'late'})
+
+
+def test_row_replaced_while_flushing_stays_pending(sink, buffer):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_sink(batch):
+        started.set()
+        assert release.wait(5)
+        sink(batch)
+
+    buffer.flush_callback = slow_sink
+    buffer.add('lyrics', 'a', {'id': 'old'})
+    flusher = threading.Thread(target=buffer.flush)
+    flusher.start()
+    assert started.wait(5)
+
+    buffer.add('lyrics', 'a', {'id': 'new'})
+    release.set()
+    flusher.join(5)
+
+    assert sink.written == ['old']
+    assert buffer.get('lyrics', 'a') == {'id': 'new'}
+    assert buffer.pending_count() == 1
+    buffer.flush()
+    assert sink.written == ['old', 'new']
+
+
+def test_max_rows_triggers_a_background_flush(sink):
+    flushed = threading.Event()
+
+    def signalling_sink(batch):
+        sink(batch)
+        flushed.set()
+
+    buffer = WriteBehindBuffer(signalling_sink, max_rows=3, flush_interval=60)
+    try:
+        buffer.add('lyrics', 'a', {'id': 'a'})
+        buffer.add('lyrics', 'b', {'id': 'b'})
+        assert not flushed.wait(0.2)
+
+        buffer.add('lyrics', 'c', {'id': 'c'})
+        assert flushed.wait(5)
+        assert sorted(sink.written) == ['a', 'b', 'c']
+    finally:
+        buffer.close()